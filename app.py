@@ -1,11 +1,9 @@
 import io, re, requests, os, tempfile, time, random, logging, gc, sys
 from io import BytesIO
 from pathlib import Path
+from collections import deque
 from datetime import datetime
-from collections import defaultdict
 from urllib.parse import urlparse
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 from concurrent.futures import ThreadPoolExecutor, TimeoutError
 
 # Memory monitoring
@@ -24,13 +22,13 @@ from reportlab.lib.pagesizes import A4
 from reportlab.lib.utils import ImageReader
 from reportlab.platypus.doctemplate import LayoutError
 
-# Import pour compression PDF
+# PyPDF2 : seule sa présence est vérifiée (message d'état de la page de téléchargement)
 try:
-    from pypdf2 import PdfReader, PdfWriter
+    import pypdf2  # noqa: F401
     HAVE_PYPDF2 = True
 except ImportError:
     try:
-        from PyPDF2 import PdfReader, PdfWriter
+        import PyPDF2  # noqa: F401
         HAVE_PYPDF2 = True
     except ImportError:
         HAVE_PYPDF2 = False
@@ -38,11 +36,24 @@ except ImportError:
 # Utils
 from utils.font_manager import download_and_register_fonts, validate_background_color
 from utils.helpers import update_progress_detailed
-from utils.image_processing import open_image
 from utils.data_processing import save_feedback_to_csv, save_feedback_to_sqlite
+from utils.image_prefetch import ImagePrefetcher
+from utils.image_urls import fetch_best_variant
+from utils.image_url_table import CELL_URL_PATTERN, image_url_table, row_url_lists
+from utils.image_cache import DiskImageCache, cache_dir
+from utils.rate_control import AdaptiveRateLimiter, parse_retry_after
+from utils.host_health import HostHealthRegistry, HostUnavailable
+from utils.failed_urls import FailedUrlRegistry, NOT_FOUND, TOO_LARGE, REJECTED, BLOCKED, TRANSIENT
+from utils.http_client import ConnectionStats, counting, get_shared_session
+from utils.image_preparation import QUALITY_TIERS, DocumentImageRegistry, PreparedImage, image_size, prune_prepared_cache, target_pixels
+from utils.csv_sniffer import read_csv_sniffed
+from utils.product_stream import ProductStream
+from utils.product_store import product_store
 
 # Générateur PDF moderne (local)
 from pdf_designer import generate_pdf_with_quality
+from pdf.spill_canvas import SpillingCanvas
+from pdf.pdf_optimize import optimize_pdf_bytes
 
 # Import de l'upload handler
 from upload_handler import UploadHandler
@@ -73,146 +84,160 @@ if os.getenv("STREAMLIT_CLOUD"):
     # Limiter la taille des fichiers temporaires
     os.environ["TMPDIR"] = "/tmp"
 
-class HostRateLimiter:
-    def __init__(self, rate_per_sec=2, burst=2):
-        self.allowance = defaultdict(lambda: burst)
-        self.last_check = defaultdict(lambda: time.time())
-        self.rate = rate_per_sec
-        self.burst = burst
-
-    def wait(self, host):
-        now = time.time()
-        elapsed = now - self.last_check[host]
-        self.last_check[host] = now
-        self.allowance[host] = min(self.burst, self.allowance[host] + elapsed * self.rate)
-        if self.allowance[host] < 1.0:
-            # attendre le temps nécessaire + un petit jitter
-            need = (1.0 - self.allowance[host]) / self.rate
-            time.sleep(need + random.uniform(0, 0.15))
-            self.allowance[host] = 0
-        else:
-            self.allowance[host] -= 1.0
-
 def http_session():
-    s = requests.Session()
-    r = Retry(
-        total=2, backoff_factor=0.8,
-        status_forcelist=[429,500,502,503,504],
-        allowed_methods=["GET", "HEAD"]
-    )
-    s.mount("http://", HTTPAdapter(max_retries=r))
-    s.mount("https://", HTTPAdapter(max_retries=r))
-    s.headers.update({"User-Agent": "SnapCatalog/1.0 (+contact@example.com)"})
-    return s
+    # Session partagée par le processus : connexions keep-alive réutilisées par hôte
+    return get_shared_session(pool_size=FETCH_WORKERS)
 
-rate = HostRateLimiter(rate_per_sec=1.0, burst=1)  # 1 req/s par hôte
+# Relectures d'une image limitée par l'hôte (429/503), chacune après la pause Retry-After
+THROTTLE_RETRIES = 2
+
+class HostThrottled(RuntimeError):
+    """Hôte qui limite la cadence (429/503) au-delà des relectures"""
+
+    def __init__(self, status_code):
+        super().__init__(f"Cadence limitée par l'hôte ({status_code}) malgré {THROTTLE_RETRIES} relectures.")
+        self.status_code = status_code
 
 def fetch_image_politely(url, timeout=8, max_bytes=2_000_000):
     host = urlparse(url).netloc
-    rate.wait(host)
+    # Entrée périmée en cache : revalidation conditionnelle (304 = un aller-retour, pas de transfert)
+    entry = image_cache.lookup(url)
+    cached = entry.read() if entry else None
+    headers = entry.conditional_headers() if cached is not None else {}
     s = http_session()
-    # Si vous avez déjà un ETag/Last-Modified en cache, ajoutez If-None-Match / If-Modified-Since ici
-    with s.get(url, timeout=timeout, stream=True, allow_redirects=True) as r:
-        if r.status_code in (403, 429):
-            # Backoff manuel plus long + message clair
-            wait = int(r.headers.get("Retry-After", "4"))
-            time.sleep(wait + random.uniform(0, 0.5))
-            raise RuntimeError(f"Accès bloqué par l'hôte ({r.status_code}). Réduisez la cadence ou utilisez des copies locales.")
-        r.raise_for_status()
-        buf, total = io.BytesIO(), 0
-        for chunk in r.iter_content(32_768):
-            if not chunk: break
-            total += len(chunk)
-            if total > max_bytes:
-                raise ValueError("Image trop volumineuse")
-            buf.write(chunk)
-        return buf.getvalue()
+    for attempt in range(THROTTLE_RETRIES + 1):
+        # Attend son tour, et la fin d'une pause Retry-After de cet hôte
+        rate.wait(host)
+        started = time.time()
+        try:
+            r = s.get(url, headers=headers, timeout=timeout, stream=True, allow_redirects=True)
+        except requests.RequestException:
+            rate.record(host, None)  # timeout / erreur réseau : on ralentit cet hôte
+            raise
+        with r:
+            latency = time.time() - started
+            if r.status_code in (403, 429, 503):
+                # Pas de sleep ici : seule la file de cet hôte est mise en pause (Retry-After)
+                retry_after = parse_retry_after(r.headers.get("Retry-After")) or 4
+                rate.record(host, r.status_code, latency, retry_after=retry_after)
+                if r.status_code == 403:
+                    raise RuntimeError(f"Accès bloqué par l'hôte ({r.status_code}). Réduisez la cadence ou utilisez des copies locales.")
+                if attempt < THROTTLE_RETRIES:
+                    continue  # même URL, après la pause
+                raise HostThrottled(r.status_code)
+            rate.record(host, r.status_code, latency)
+            if r.status_code == 304 and cached is not None:
+                image_cache.mark_revalidated(url, etag=r.headers.get("ETag"), last_modified=r.headers.get("Last-Modified"))
+                return cached
+            r.raise_for_status()
+            buf, total = io.BytesIO(), 0
+            for chunk in r.iter_content(32_768):
+                if not chunk: break
+                total += len(chunk)
+                if total > max_bytes:
+                    raise ValueError("Image trop volumineuse")
+                buf.write(chunk)
+            data = buf.getvalue()
+            image_cache.store(url, data, etag=r.headers.get("ETag"), last_modified=r.headers.get("Last-Modified"))
+            return data
 
 # Configuration des timeouts pour Streamlit Cloud
 if os.getenv("STREAMLIT_CLOUD"):
     # Timeouts plus courts pour éviter les timeouts de Streamlit
     IMAGE_TIMEOUT = 5
     MAX_IMAGE_SIZE = 1_000_000  # 1MB max
-    RATE_LIMIT = 0.5  # Plus lent pour éviter les blocages
+    RATE_LIMIT = 0.5  # Débit initial par hôte inconnu (ajusté ensuite selon les réponses)
+    MAX_RATE = 4.0    # Débit max par hôte
+    FETCH_WORKERS = 4  # Téléchargements simultanés (tous hôtes confondus)
+    PREFETCH_WINDOW = 12  # Lignes d'avance max sur le rendu (borne la mémoire)
+    IMAGE_CACHE_MAX_BYTES = 200_000_000  # Cache disque des images (LRU)
+    RENDER_WORKERS = 1  # Rendu PDF en un seul processus (chaque processus ajoute sa mémoire)
 else:
     IMAGE_TIMEOUT = 8
     MAX_IMAGE_SIZE = 2_000_000  # 2MB max
     RATE_LIMIT = 1.0
+    MAX_RATE = 8.0
+    FETCH_WORKERS = 8
+    PREFETCH_WINDOW = 32
+    IMAGE_CACHE_MAX_BYTES = 1_000_000_000
+    RENDER_WORKERS = min(4, os.cpu_count() or 1)  # Rendu des gros catalogues par parties en parallèle
+
+# Débit adaptatif par hôte (AIMD), débits appris conservés entre les exécutions
+rate = AdaptiveRateLimiter(
+    initial_rate=RATE_LIMIT, max_rate=MAX_RATE,
+    state_path=os.path.join(cache_dir("rate_control"), "hosts.json")
+)
 
-# Mise à jour des paramètres
-rate = HostRateLimiter(rate_per_sec=RATE_LIMIT, burst=1)
-
-class Circuit:
-    def __init__(self, threshold=5, cooldown=600):
-        self.errors = defaultdict(int)
-        self.block_until = defaultdict(float)
-        self.threshold = threshold
-        self.cooldown = cooldown
-
-    def check(self, host):
-        if time.time() < self.block_until[host]:
-            raise RuntimeError(f"Hôte {host} en cooldown, réessayez plus tard.")
-    def record(self, host, ok):
-        if ok:
-            self.errors[host] = 0
-        else:
-            self.errors[host] += 1
-            if self.errors[host] >= self.threshold:
-                self.block_until[host] = time.time() + self.cooldown
-
-circuit = Circuit()
+# Cache disque persistant (survit aux redéploiements/processus), revalidé après 1h
+image_cache = DiskImageCache(max_bytes=IMAGE_CACHE_MAX_BYTES, ttl=3600)
+
+# Santé des hôtes partagée entre sessions/processus (disjoncteur persistant avec sonde)
+host_health = HostHealthRegistry()
+
+def is_host_failure(exc):
+    """Erreurs imputables à l'hôte (réseau, timeout, 5xx, blocage) et non à l'image elle-même"""
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code >= 500
+    if isinstance(exc, HostThrottled):
+        # 429 : l'hôte répond, il demande seulement de ralentir ; 503 persistant : indisponible
+        return exc.status_code == 503
+    return isinstance(exc, RuntimeError)  # accès bloqué (403)
+
+failed_urls = FailedUrlRegistry()
+
+def classify_image_failure(exc):
+    """Classe d'échec d'une URL pour le cache négatif (None = ne pas mémoriser)"""
+    if isinstance(exc, (HostUnavailable, HostThrottled)):
+        return None  # l'hôte est déjà suivi par le disjoncteur / limitation passagère, pas l'URL
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        status = exc.response.status_code
+        if status in (404, 410):
+            return NOT_FOUND
+        return TRANSIENT if status >= 500 else REJECTED
+    if isinstance(exc, ValueError) and "volumineuse" in str(exc):
+        return TOO_LARGE
+    if isinstance(exc, RuntimeError):
+        return BLOCKED
+    return TRANSIENT
 
 def safe_fetch(url):
     host = urlparse(url).netloc
-    circuit.check(host)
+    host_health.check(host)  # échec immédiat si l'hôte est connu en panne
     try:
         data = fetch_image_politely(url, timeout=IMAGE_TIMEOUT, max_bytes=MAX_IMAGE_SIZE)
-        circuit.record(host, True)
+        host_health.record(host, True)
         return data
-    except Exception:
-        circuit.record(host, False)
+    except Exception as e:
+        # Une 404 ou une image trop lourde prouve que l'hôte répond
+        host_health.record(host, not is_host_failure(e), error=str(e))
         raise
 
-def compress_pdf(pdf_bytes, aggressive=False):
-    """Compresse un PDF en utilisant PyPDF2
-    
+def compress_pdf(pdf_bytes, report=None):
+    """Optimise le PDF final en flux (pdf.pdf_optimize)
+
+    Objets identiques dédoublonnés, objets inutilisés retirés, petits objets
+    regroupés en flux d'objets compressés ; PDF inchangé si le gain estimé est faible.
+
     Args:
-        pdf_bytes: Bytes du PDF à compresser
-        aggressive: Si True, compression plus agressive (peut dégrader qualité)
+        pdf_bytes: Bytes du PDF à optimiser
+        report: dict optionnel complété avec les statistiques d'optimisation
     """
-    if not HAVE_PYPDF2:
-        log.warning("PyPDF2 non disponible, compression ignorée")
-        return pdf_bytes
-    
     try:
-        log.info("Début compression PDF")
-        reader = PdfReader(BytesIO(pdf_bytes))
-        writer = PdfWriter()
-        
-        for page in reader.pages:
-            # Compression agressive si demandé
-            if aggressive:
-                page.compress_content_streams()
-            writer.add_page(page)
-        
-        # Préserver les métadonnées si elles existent
-        if reader.metadata:
-            writer.add_metadata(reader.metadata)
-        
-        output = BytesIO()
-        writer.write(output)
-        output.seek(0)
-        
-        compressed_bytes = output.getvalue()
-        original_size = len(pdf_bytes)
-        compressed_size = len(compressed_bytes)
-        compression_ratio = (1 - compressed_size / original_size) * 100
-        
-        log.info(f"PDF compressé: {original_size/1024/1024:.2f}MB -> {compressed_size/1024/1024:.2f}MB ({compression_ratio:.1f}% de réduction)")
-        
-        return compressed_bytes
+        log.info("Début optimisation PDF")
+        optimized, stats = optimize_pdf_bytes(pdf_bytes)
+        if report is not None:
+            report["optimization"] = stats
+        if stats["skipped"]:
+            log.info(f"Optimisation PDF ignorée (gain estimé faible), {stats['seconds']:.2f}s")
+            return pdf_bytes
+        original_size, optimized_size = stats["original_bytes"], stats["optimized_bytes"]
+        log.info(f"PDF optimisé: {original_size/1024/1024:.2f}MB -> {optimized_size/1024/1024:.2f}MB "
+                 f"({(1 - optimized_size / original_size) * 100:.1f}% de réduction, {stats['seconds']:.2f}s)")
+        return optimized
     except Exception as e:
-        log.warning(f"Erreur compression PDF: {e}, retour du PDF original")
+        log.warning(f"Erreur optimisation PDF: {e}, retour du PDF original")
         return pdf_bytes
 
 def should_split_catalog(num_products, is_cloud=False):
@@ -237,7 +262,6 @@ def should_split_catalog(num_products, is_cloud=False):
     return False, num_products
 
 IMG_COL_RE = re.compile(r"^\s*IMAGE\s*\d+\s*$", re.I)
-URL_RE = re.compile(r"^https?://[^\s\"']+$")
 
 def fetch_csv_bytes(url, timeout=12, max_bytes=15_000_000):
     with http_session().get(url, timeout=timeout, stream=True, allow_redirects=True) as r:
@@ -256,22 +280,7 @@ def fetch_csv_bytes(url, timeout=12, max_bytes=15_000_000):
 
 def read_etsy_csv(url):
     raw = fetch_csv_bytes(url)
-    # Essai 1: UTF‑8 strict
-    try:
-        df = pd.read_csv(
-            raw,
-            sep=",", quotechar='"', engine="python",
-            on_bad_lines="skip",
-        )
-    except UnicodeDecodeError:
-        # Essai 2: CP1252
-        raw.seek(0)
-        df = pd.read_csv(
-            raw,
-            sep=",", quotechar='"', engine="python",
-            encoding="cp1252",
-            on_bad_lines="skip",
-        )
+    df, _ = read_csv_sniffed(raw)
     # Normalisation des noms de colonnes
     df.columns = [c.strip().upper() for c in df.columns]
     # Renommer quelques colonnes françaises fréquentes
@@ -283,18 +292,9 @@ def read_etsy_csv(url):
         "QUANTITÉ": "QUANTITY",
         "RÉFÉRENCE": "SKU",
     })
-    # Collecte des colonnes image (IMAGE 1..10)
+    # Collecte des colonnes image (IMAGE 1..10) : cellules contenant une URL
     img_cols = [c for c in df.columns if IMG_COL_RE.match(c)]
-
-    def extract_urls(row):
-        urls = []
-        for c in img_cols:
-            val = str(row.get(c, "")).strip()
-            if val and URL_RE.match(val):
-                urls.append(val)
-        return urls
-
-    df["IMAGE_URLS"] = df.apply(extract_urls, axis=1)
+    df["IMAGE_URLS"] = row_url_lists(image_url_table(df, img_cols, pattern=CELL_URL_PATTERN), len(df))
     df = df[df["IMAGE_URLS"].map(len) > 0].reset_index(drop=True)
     return df
 
@@ -307,7 +307,7 @@ def run_with_timeout(fn, timeout, *args, **kwargs):
 # Fonction de génération sécurisée avec wrapper direct
 def safe_generate_pdf(products, filename, titre, sous_titre, logo_path, cover_path,
                       quality, products_per_page, bg_color, primary_color,
-                      output="bytes", progress_callback=None):
+                      output="bytes", progress_callback=None, report=None, workers=1, page_cache=True):
     # Adapter si generate_pdf_with_quality a une signature différente
     return generate_pdf_with_quality(
         products=products,
@@ -321,7 +321,10 @@ def safe_generate_pdf(products, filename, titre, sous_titre, logo_path, cover_pa
         bg_color=bg_color,
         primary_color=primary_color,
         output=output,
-        progress_callback=progress_callback
+        progress_callback=progress_callback,
+        report=report,
+        workers=workers,
+        page_cache=page_cache
     )
 
 # Réglages PDF simples (mode images URL)
@@ -338,18 +341,31 @@ PRICE_COL = "PRIX"
 CURR_COL  = "CODE_DEVISE"
 REF_COL   = "RÉFÉRENCE"
 
-@st.cache_data(show_spinner=False, ttl=3600)
 def fetch_image_bytes(url: str) -> bytes | None:
     url = (url or "").strip()
     if not url:
         return None
+    # Cache disque frais : ni réseau, ni limiteur, ni pickling
+    data = image_cache.get_fresh(url)
+    if data is not None:
+        return data
+    # Échec récent mémorisé : visuel de remplacement sans requête
+    failure = failed_urls.get(url)
+    if failure and failure.active:
+        log.info(f"Image ignorée ({failure.failure_class}): {url[:50]}")
+        return None
     try:
         log.info(f"Téléchargement image: {url[:50]}...")
         data = safe_fetch(url)
         log.info(f"Image téléchargée avec succès: {len(data)} bytes")
+        if failure:
+            failed_urls.clear(url)
         return data
     except Exception as e:
         log.warning(f"Échec téléchargement image {url[:50]}: {e}")
+        failure_class = classify_image_failure(e)
+        if failure_class:
+            failed_urls.record(url, failure_class, error=str(e))
         return None
 
 def load_pil_image_from_url(url: str) -> Image.Image | None:
@@ -364,41 +380,29 @@ def load_pil_image_from_url(url: str) -> Image.Image | None:
     except Exception:
         return None
 
-IMG_URL_RE = re.compile(
-    r"https?://[^\s\"']+?\.(?:png|jpe?g|webp|gif|bmp|tiff)(?:\?[^\s\"']*)?",
-    re.I
-)
-
-def extract_image_urls_from_cell(cell: str) -> list[str]:
-    s = str(cell or "")
-    s = s.replace(";ps://", "https://")
-    urls = IMG_URL_RE.findall(s)
-    out, seen = [], set()
-    for u in urls:
-        u = u.strip()
-        if u and u not in seen:
-            seen.add(u)
-            out.append(u)
-    return out
-
-def extract_row_image_urls(row: pd.Series) -> list[str]:
-    urls = []
-    for col in IMG_COLS:
-        if col in row:
-            urls.extend(extract_image_urls_from_cell(row[col]))
-    return urls[:4]
-
-def draw_image_keep_aspect(c, pil_img, x, y, max_w, max_h):
-    w, h = pil_img.size
+def draw_image_keep_aspect(c, img, x, y, max_w, max_h):
+    # img: PreparedImage (JPEG déjà à la taille de la zone) ou image PIL
+    w, h = img.size
     scale = min(max_w / w, max_h / h)
     nw, nh = w * scale, h * scale
-    c.drawImage(ImageReader(pil_img), x, y, width=nw, height=nh, preserveAspectRatio=True, mask='auto')
+    source = img.path if isinstance(img, PreparedImage) else ImageReader(img)
+    c.drawImage(source, x, y, width=nw, height=nh, preserveAspectRatio=True, mask='auto')
     return nw, nh
 
-def build_pdf_from_df(df: pd.DataFrame, progress_callback=None) -> bytes:
+def build_pdf_from_df(df: pd.DataFrame | ProductStream, progress_callback=None, quality="hd", report=None) -> bytes:
+    """PDF du mode images URL ; df: DataFrame ou export lu par blocs (ProductStream)"""
     log.info(f"Début génération PDF pour {len(df)} produits")
-    buf = BytesIO()
-    c = canvas.Canvas(buf, pagesize=A4)
+    tier = QUALITY_TIERS.get(quality, QUALITY_TIERS["hd"])
+    # Connexions de ce catalogue seulement (les compteurs du processus mêlent toutes les sessions)
+    conn_stats = ConnectionStats()
+    prune_prepared_cache()
+    # Une seule XObject par image distincte (variantes/lignes partageant une même image)
+    image_registry = DocumentImageRegistry(tier["dpi"], tier["image_quality"])
+    # Pages vidées sur disque toutes les SPILL_PAGES pages : mémoire stable quelle que soit la taille ;
+    # le PDF final est fusionné dans un fichier temporaire lu une seule fois
+    fd, pdf_path = tempfile.mkstemp(prefix="snapcatalog_url_", suffix=".pdf")
+    os.close(fd)
+    c = SpillingCanvas(pdf_path, pagesize=A4)
     y = PAGE_H - MARGIN
     max_img_w = PAGE_W - 2 * MARGIN
     max_img_h = 260
@@ -406,7 +410,35 @@ def build_pdf_from_df(df: pd.DataFrame, progress_callback=None) -> bytes:
     total_products = len(df)
     processed = 0
 
-    for idx, (_, row) in enumerate(df.iterrows()):
+    cols = 2
+    cell_w = (max_img_w - 12) / cols
+    cell_h = (max_img_h - 12) / 2
+    # Déclinaison CDN (Etsy) la plus légère qui couvre la cellule au DPI du niveau
+    box_px = target_pixels(cell_w - 12, cell_h - 12, tier["dpi"])
+
+    def fetch_for_cell(url):
+        with counting(conn_stats):
+            return fetch_best_variant(url, box_px, fetch_image_bytes)
+
+    # Pré-chargement : les URLs des lignes à venir sont lues en avance, on télécharge
+    # en parallèle (hôtes alternés) pendant que le rendu avance ligne par ligne ;
+    # seules les lignes de la fenêtre de pré-chargement sont gardées
+    frames = df.frames() if isinstance(df, ProductStream) else [df]
+    pending_rows = deque()
+
+    def url_rows():
+        for frame in frames:
+            # URLs de tout le bloc en une passe vectorisée (4 images max par produit)
+            frame_urls = row_url_lists(image_url_table(frame, IMG_COLS, max_slots=4), len(frame))
+            for (_, row), urls in zip(frame.iterrows(), frame_urls):
+                pending_rows.append((row, urls))
+                yield urls
+
+    prefetcher = ImagePrefetcher(fetch_for_cell, max_workers=FETCH_WORKERS, window=PREFETCH_WINDOW)
+    row_images = prefetcher.iter_rows(url_rows())
+
+    for idx, images in enumerate(row_images):
+        row, urls = pending_rows.popleft()
         if progress_callback:
             progress = (idx + 1) / total_products
             progress_callback(progress, f"Traitement produit {idx + 1}/{total_products}")
@@ -417,27 +449,24 @@ def build_pdf_from_df(df: pd.DataFrame, progress_callback=None) -> bytes:
         price = str(row.get(PRICE_COL, "") or "").strip()
         curr  = str(row.get(CURR_COL, "") or "").strip()
         ref   = str(row.get(REF_COL, "") or "").strip()
-        urls  = extract_row_image_urls(row)
 
         block_min_h = max_img_h + 80
         if y - block_min_h < MARGIN:
             c.showPage()
             y = PAGE_H - MARGIN
 
-        cols = 2
-        cell_w = (max_img_w - 12) / cols
-        cell_h = (max_img_h - 12) / 2
         top_y = y
 
         for idx, url in enumerate(urls):
             try:
-                pil_img = load_pil_image_from_url(url)
+                # Rééchantillonnage à la taille de la cellule pour le niveau de qualité
+                prepared = image_registry.get(images[idx], cell_w - 12, cell_h - 12) if images[idx] else None
                 r = idx // cols
                 cidx = idx % cols
                 cx = MARGIN + cidx * (cell_w + 12)
                 cy = top_y - (r + 1) * (cell_h + 12)
-                if pil_img:
-                    draw_image_keep_aspect(c, pil_img, cx + 6, cy + 6, cell_w - 12, cell_h - 12)
+                if prepared:
+                    draw_image_keep_aspect(c, prepared, cx + 6, cy + 6, cell_w - 12, cell_h - 12)
                 else:
                     c.setFillColorRGB(0.92, 0.92, 0.92)
                     c.rect(cx, cy, cell_w, cell_h, fill=1, stroke=0)
@@ -490,8 +519,17 @@ def build_pdf_from_df(df: pd.DataFrame, progress_callback=None) -> bytes:
             y = PAGE_H - MARGIN
 
     c.save()
-    buf.seek(0)
-    result = buf.read()
+    with open(pdf_path, "rb") as f:
+        result = f.read()
+    os.remove(pdf_path)
+    rate.save()
+    conn = conn_stats.snapshot()
+    log.info(f"Connexions HTTP: {conn['opened']} ouvertes, {conn['reused']} réutilisées ({conn['requests']} requêtes)")
+    stats = image_registry.report()
+    log.info(f"Images: {stats['images_drawn']} dessinées, {stats['unique_images']} intégrées, {stats['bytes_saved']/1024:.0f} Ko économisés")
+    if report is not None:
+        report.update(stats)
+        report["connections"] = conn
     log.info(f"PDF généré avec succès: {len(result)} bytes")
     return result
 
@@ -516,6 +554,26 @@ if "pdf_tmp_path" not in st.session_state:
 st.title("📒 SnapCatalog — Générateur de PDF produits")
 st.write("Importe ton fichier produits (Shopify, Etsy…), sélectionne tes colonnes, choisis un template et génère ton catalogue au format PDF!")
 
+def show_generation_report(report: dict):
+    """Résumé de la génération (pages réutilisées, déduplication des images)"""
+    if report and report.get("pages_cached"):
+        st.caption(f"♻️ {report['pages_cached']} pages inchangées réutilisées, "
+                   f"{report['pages_rendered']} pages redessinées")
+    if not report or not report.get("images_drawn"):
+        return
+    saved_kb = report.get("bytes_saved", 0) / 1024
+    st.caption(
+        f"🖼️ {report['images_drawn']} images dessinées, {report['unique_images']} intégrées au PDF"
+        f" ({report['duplicates']} doublons partagés, {saved_kb:.0f} Ko économisés)"
+    )
+    if report.get("render_workers", 1) > 1:
+        st.caption(f"⚙️ Rendu en {report['render_parts']} parties sur {report['render_workers']} processus")
+    optimization = report.get("optimization")
+    if optimization and not optimization["skipped"]:
+        saved_kb = (optimization["original_bytes"] - optimization["optimized_bytes"]) / 1024
+        st.caption(f"🗜️ PDF optimisé : {saved_kb:.0f} Ko gagnés en {optimization['seconds']:.1f}s "
+                   f"({optimization['duplicates']} objets en double retirés)")
+
 def detect_image_type(df: pd.DataFrame) -> tuple[str, str]:
     # Heuristique simple: si on voit "http" dans une colonne IMAGE, on dit "url"
     image_cols = [c for c in df.columns if c.upper().startswith("IMAGE")]
@@ -546,11 +604,22 @@ bg_color = validated_color
 uploaded_file = UploadHandler.handle_file_upload()
 
 if uploaded_file is not None:
-    df, csv_type = UploadHandler.validate_csv_file(uploaded_file)
+    # Lu une seule fois par contenu (réexécutions servies par le cache).
+    # Gros export : lu par blocs au fil du rendu, seul le premier bloc sert à l'aperçu et à la détection
+    parsed_upload = UploadHandler.read_upload(uploaded_file)
+    product_stream, df, csv_type = None, None, None
+    if parsed_upload is not None:
+        csv_type = parsed_upload.csv_type
+        if parsed_upload.stream is not None:
+            uploaded_file.seek(0)
+            product_stream = parsed_upload.stream.with_source(uploaded_file)
+            df = product_stream.head
+        else:
+            df = parsed_upload.view()
     
     if df is not None and csv_type:
         # Détection automatique du type d'images (silencieuse)
-        image_type, detection_message = detect_image_type(df)
+        image_type, detection_message = parsed_upload.derive("image_type", lambda: detect_image_type(df))
         
         # Option pour forcer le mode manuellement (masquée pour l'instant)
         # force_manual = st.checkbox("🔧 Forcer le choix manuel du mode", value=False)
@@ -599,7 +668,7 @@ if uploaded_file is not None:
         st.dataframe(filtered_df.head(12))
         
         # Affichage du nombre total de produits
-        total_products = len(filtered_df)
+        total_products = len(product_stream) if product_stream is not None else len(filtered_df)
         
         # ⚠️ ALERTE pour les gros catalogues sur Streamlit Cloud
         is_cloud = os.getenv("STREAMLIT_CLOUD") or os.getenv("STREAMLIT_SHARING")
@@ -630,8 +699,10 @@ if uploaded_file is not None:
         
         if max_products > 0:
             filtered_df = filtered_df.head(max_products)
-            total_products = len(filtered_df)
+            total_products = min(max_products, total_products)
             st.warning(f"⚠️ Mode test: seulement {total_products} produits seront traités")
+        if product_stream is not None:
+            product_stream = product_stream.select(choix_cols, max_products)
         
         st.info(f"📊 **{total_products} produits** seront traités pour la génération du PDF")
         
@@ -686,14 +757,17 @@ if uploaded_file is not None:
                 cover_temp.close()
                 cover_path = cover_temp.name
 
-                # Validation des dimensions de l'image de couverture
-                img = open_image(cover_path)
-                if img.size != (2480, 3508):
-                    st.warning("⚠️ Image de couverture non optimale (idéal: 2480x3508 px). Elle sera redimensionnée, mais pourrait se déformer.")
+                # Validation des dimensions de l'image de couverture (en-tête seul, sans décodage)
+                cover_size = image_size(cover_path)
+                if cover_size is None:
+                    st.error("❌ Image de couverture illisible")
+                else:
+                    if cover_size != (2480, 3508):
+                        st.warning("⚠️ Image de couverture non optimale (idéal: 2480x3508 px). Elle sera redimensionnée, mais pourrait se déformer.")
 
-                # Aperçu réduit (divisé par 8)
-                w, h = img.size
-                st.image(cover_img, width=int(w/8), caption="Aperçu de l'image de couverture")
+                    # Aperçu réduit (divisé par 8)
+                    w, h = cover_size
+                    st.image(cover_img, width=int(w/8), caption="Aperçu de l'image de couverture")
 
         # Sélection du nombre de produits par page
         produits_par_page = st.selectbox("Nombre de produits par page :", [1, 2, 3, 4], index=3, help="Plus de produits par page optimise l'espace mais réduit la taille des éléments")
@@ -733,20 +807,22 @@ if generation_mode == "Mode images URL (pour CSV Etsy avec URLs)":
                 log.info(f"Progression: {progress:.1%} - {message}")
 
             update_progress(0.05, "🔄 Préparation des données...")
-            
-            for col in IMG_COLS:
-                if col not in filtered_df.columns:
-                    filtered_df[col] = ""
 
             update_progress(0.10, "📡 Début téléchargement des images...")
             
+            # Même règle que le mode standard : qualité moyenne sur cloud pour >100 produits
+            is_cloud = os.getenv("STREAMLIT_CLOUD") or os.getenv("STREAMLIT_SHARING")
+            url_quality = "medium" if is_cloud and total_products > 100 else "hd"
+
             # Utiliser le callback de progression dans build_pdf_from_df
-            pdf_bytes = build_pdf_from_df(filtered_df, progress_callback=update_progress)
+            generation_report = {}
+            pdf_bytes = build_pdf_from_df(product_stream if product_stream is not None else filtered_df,
+                                          progress_callback=update_progress, quality=url_quality,
+                                          report=generation_report)
             
-            # Compression du PDF (agressive sur cloud)
-            update_progress(0.90, "🗜️ Compression du PDF...")
-            is_cloud = os.getenv("STREAMLIT_CLOUD") or os.getenv("STREAMLIT_SHARING")
-            pdf_bytes = compress_pdf(pdf_bytes, aggressive=is_cloud)
+            # Optimisation du PDF (laissé tel quel si le gain estimé est faible)
+            update_progress(0.90, "🗜️ Optimisation du PDF (si gain suffisant)...")
+            pdf_bytes = compress_pdf(pdf_bytes, report=generation_report)
             
             # Nettoyage mémoire
             gc.collect()
@@ -766,7 +842,10 @@ if generation_mode == "Mode images URL (pour CSV Etsy avec URLs)":
             st.session_state.pdf_tmp_path = tmp
 
             update_progress(1.0, "✅ PDF généré avec succès !")
-            st.success(f"Catalogue généré: {len(filtered_df)} articles")
+            st.success(f"Catalogue généré: {total_products} articles")
+            show_generation_report(generation_report)
+            conn = generation_report["connections"]
+            st.caption(f"🔌 Connexions HTTP : {conn['opened']} ouvertes, {conn['reused']} réutilisées sur {conn['requests']} requêtes")
             log.info(f"PDF généré avec succès: {len(pdf_bytes)} bytes")
 
         except Exception as e:
@@ -774,7 +853,21 @@ if generation_mode == "Mode images URL (pour CSV Etsy avec URLs)":
             st.error(f"Erreur de lecture/génération: {e}")
             st.exception(e)
             status_text.text("❌ Erreur lors de la génération")
-    
+
+    # Diagnostic : hôtes d'images en panne ou en cours de vérification
+    unhealthy_hosts = [h for h in host_health.states() if h["state"] != "closed"]
+    if unhealthy_hosts:
+        with st.expander(f"🩺 Hôtes d'images indisponibles ({len(unhealthy_hosts)})"):
+            st.dataframe(pd.DataFrame(unhealthy_hosts)[["host", "state", "failures", "retry_in", "last_error"]])
+
+    # Diagnostic : URLs d'images en échec mémorisées (remplacées par un visuel vide)
+    failed_images = failed_urls.active()
+    if failed_images:
+        with st.expander(f"🚫 Images en échec ignorées ({len(failed_images)})"):
+            st.dataframe(pd.DataFrame(failed_images)[["url", "failure_class", "failures", "retry_in", "last_error"]])
+            if st.button("🔄 Réessayer ces images à la prochaine génération"):
+                failed_urls.clear()
+                st.rerun()
 
 
 else:
@@ -811,14 +904,11 @@ else:
                 
                 update_progress(0.15, "📊 Pré-traitement des données...")
                 
-                def safe_truncate(text, max_len):
-                    s = str(text or "")
-                    return s if len(s) <= max_len else s[:max_len-3] + "..."
-
-                df_pdf = filtered_df.copy().fillna("").astype(str)
-                max_chars = 800
-                df_pdf = df_pdf.applymap(lambda s: safe_truncate(s, max_chars))
-                products = df_pdf.to_dict(orient="records")
+                if product_stream is not None:
+                    # Produits lus par blocs pendant le rendu
+                    products = product_stream
+                else:
+                    products = product_store(filtered_df, max_chars=800)
                 
                 update_progress(0.20, "📄 Génération de la couverture...")
                 
@@ -830,6 +920,7 @@ else:
                     selected_quality = "medium"  # Forcer qualité moyenne sur cloud pour >100 produits
                     st.info("🌐 Mode Cloud détecté : qualité automatiquement réduite pour optimiser la mémoire")
                 
+                generation_report = {}
                 pdf_bytes = safe_generate_pdf(
                     products=products,
                     filename=None,
@@ -842,16 +933,18 @@ else:
                     bg_color=bg_color,
                     primary_color=color,
                     output="bytes",
-                    progress_callback=update_progress_detailed
+                    progress_callback=update_progress_detailed,
+                    report=generation_report,
+                    workers=RENDER_WORKERS
                 )
                 
                 # Nettoyage mémoire après génération
                 gc.collect()
                 log.info(f"🧹 Nettoyage mémoire effectué")
                 
-                # Compression du PDF (agressive sur cloud pour économiser la mémoire)
-                update_progress(0.90, "🗜️ Compression du PDF...")
-                pdf_bytes = compress_pdf(pdf_bytes, aggressive=is_cloud)
+                # Optimisation du PDF (laissé tel quel si le gain estimé est faible)
+                update_progress(0.90, "🗜️ Optimisation du PDF (si gain suffisant)...")
+                pdf_bytes = compress_pdf(pdf_bytes, report=generation_report)
                 st.session_state.pdf_bytes = pdf_bytes
                 
                 # Vérification de la taille finale
@@ -870,6 +963,7 @@ else:
                 update_progress(1.0, "✅ PDF généré avec succès !")
                 
                 st.success("PDF moderne généré avec succès en Haute Définition (HD) !")
+                show_generation_report(generation_report)
                 log.info(f"PDF généré avec succès: {len(st.session_state.pdf_bytes)} bytes")
                 
             except LayoutError as e:
@@ -0,0 +1,90 @@
+# benchmarks/bench_cover_assets.py
+"""
+Couverture et logo : ancien dessin (couverture pleine résolution via
+ImageReader, logo ré-ouvert et converti en RGBA à chaque génération) vs
+draw_modern_cover (images rééchantillonnées pour le niveau, en cache).
+
+Couverture 2480x3508 px (A4 300 dpi), logo PNG 1200x1200 px avec transparence.
+Pour chaque niveau : temps et taille de la page de couverture seule, à froid
+(cache vide) puis avec la même charte graphique.
+
+Usage : python benchmarks/bench_cover_assets.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_parallel_render import quiet
+
+
+def build_assets(folder):
+    import numpy as np
+    from PIL import Image as PILImage
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:3508, 0:2480]
+    base = np.stack([x * 255 // 2480, y * 255 // 3508, (x + y) * 255 // 5988], axis=-1)
+    cover = (base + rng.integers(-20, 20, base.shape)).clip(0, 255).astype("uint8")
+    cover_path = os.path.join(folder, "cover.jpg")
+    PILImage.fromarray(cover).save(cover_path, quality=92)
+
+    logo = np.zeros((1200, 1200, 4), dtype="uint8")
+    logo[200:1000, 200:1000] = (25, 118, 210, 255)
+    logo_path = os.path.join(folder, "logo.png")
+    PILImage.fromarray(logo).save(logo_path)
+    return cover_path, logo_path
+
+
+def old_cover(c, logo_path, cover_path):
+    """Ancien dessin de la couverture (images seules)"""
+    from PIL import Image as PILImage
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm
+    from reportlab.lib.utils import ImageReader
+    page_width, page_height = A4
+    c.drawImage(ImageReader(cover_path), 0, 0, width=page_width, height=page_height)
+    logo = PILImage.open(logo_path)
+    if logo.mode != 'RGBA':
+        logo = logo.convert('RGBA')
+    c.drawImage(ImageReader(logo), page_width - 5 * cm, page_height - 5 * cm, width=3.5 * cm, height=3.5 * cm,
+                preserveAspectRatio=True, mask='auto')
+
+
+def render(draw):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    start = time.perf_counter()
+    with quiet():
+        draw(c)
+        c.showPage()
+        c.save()
+    return time.perf_counter() - start, len(buffer.getvalue())
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        os.environ["SNAPCATALOG_CACHE_DIR"] = os.path.join(folder, "cache")
+        from pdf_designer import draw_modern_cover
+        from utils.image_preparation import QUALITY_TIERS
+        cover_path, logo_path = build_assets(folder)
+
+        old_time, old_size = render(lambda c: old_cover(c, logo_path, cover_path))
+        print(f"{'niveau':>8} {'rendu':>10} {'temps (s)':>10} {'taille (Ko)':>12}")
+        print(f"{'tous':>8} {'ancien':>10} {old_time:>10.2f} {old_size / 1024:>12.0f}")
+        for tier, config in QUALITY_TIERS.items():
+            def draw(c):
+                draw_modern_cover(c, "Catalogue", "", logo_path, cover_path, config["dpi"], config["image_quality"])
+            cold, size = render(draw)
+            warm, _ = render(draw)
+            print(f"{tier:>8} {'à froid':>10} {cold:>10.2f} {size / 1024:>12.0f}")
+            print(f"{tier:>8} {'en cache':>10} {warm:>10.2f} {size / 1024:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
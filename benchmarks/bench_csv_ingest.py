@@ -0,0 +1,121 @@
+# benchmarks/bench_csv_ingest.py
+"""
+Lecture d'un export Shopify : ancien validate_csv_file (moteur python, puis
+boucle encodages x délimiteurs, une lecture complète par essai) vs
+read_csv_sniffed (format déduit d'un échantillon, une seule lecture pyarrow
+ou C).
+
+Trois fichiers de la même taille, descriptions HTML entre guillemets avec
+virgules :
+- UTF-8 séparé par des virgules, retours à la ligne dans les descriptions
+  (moteur C) ;
+- le même sans retours à la ligne (moteur pyarrow) ;
+- cp1252 séparé par des points-virgules, export Excel français : cas de repli
+  (l'ancienne boucle passait low_memory au moteur python, chaque essai échouait).
+
+Usage : python benchmarks/bench_csv_ingest.py [taille_mo]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from utils.csv_sniffer import read_csv_sniffed
+
+COLUMNS = ["Handle", "Title", "Body (HTML)", "Vendor", "Type", "Tags", "Published", "Option1 Name",
+           "Option1 Value", "Variant SKU", "Variant Grams", "Variant Inventory Qty", "Variant Price",
+           "Variant Compare At Price", "Image Src", "Image Position", "SEO Title", "SEO Description", "Status"]
+
+
+def build_export(path, size_mb, encoding, delimiter, multiline=True):
+    rng = random.Random(0)
+    words = ["thé", "café", "céramique", "tissé", "main", "naturel", "été", "coton", "lin", "bois"]
+    target = size_mb * 1_000_000
+    written = 0
+    with open(path, "w", encoding=encoding, newline="") as f:
+        f.write(delimiter.join(COLUMNS) + "\n")
+        i = 0
+        while written < target:
+            text = " ".join(rng.choice(words) for _ in range(30))
+            newline = "\n" if multiline else ""
+            body = f'"<p>{text.capitalize()}, fait {rng.choice(words)}.</p>{newline}<ul><li>{text[:40]}</li></ul>"'
+            price = f"{rng.randint(5, 500)},{rng.randint(0, 99):02d}" if delimiter == ";" else f"{rng.randint(5, 500)}.{rng.randint(0, 99):02d}"
+            row = [f"produit-{i}", f"Produit {i} {rng.choice(words)}", body, "Atelier Été", "Déco",
+                   f'"{rng.choice(words)}, {rng.choice(words)}"', "true", "Taille", rng.choice("SML"),
+                   f"SKU-{i:06d}", str(rng.randint(50, 900)), str(rng.randint(0, 40)), price, "",
+                   f"https://cdn.shopify.com/s/files/1/0000/{i}.jpg", "1", f"Produit {i}", text[:80], "active"]
+            line = delimiter.join(row) + "\n"
+            f.write(line)
+            written += len(line.encode(encoding))
+            i += 1
+    return i
+
+
+def old_validate_csv_file(uploaded_file):
+    """Ancienne lecture (sans les messages Streamlit) : (df, nombre de lectures)"""
+    attempts = 1
+    try:
+        uploaded_file.seek(0)
+        df = pd.read_csv(uploaded_file, engine='python')
+        if len(df) > 0 and len(df.columns) > 1:
+            return df, attempts
+    except Exception:
+        pass
+    for encoding in ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']:
+        for delimiter in [',', ';', '\t', '|', ':', ' ']:
+            attempts += 1
+            try:
+                uploaded_file.seek(0)
+                df = pd.read_csv(uploaded_file, delimiter=delimiter, encoding=encoding, on_bad_lines='skip',
+                                 low_memory=False, engine='python')
+                if len(df) > 0 and len(df.columns) > 1:
+                    return df, attempts
+            except Exception:
+                continue
+    # Analyse manuelle de la première ligne
+    attempts += 1
+    try:
+        uploaded_file.seek(0)
+        first_line = uploaded_file.read().decode('utf-8', errors='ignore').split('\n')[0]
+        counts = {char: first_line.count(char) for char in [',', ';', '\t', '|', ':']}
+        uploaded_file.seek(0)
+        df = pd.read_csv(uploaded_file, delimiter=max(counts, key=counts.get), encoding='utf-8',
+                         on_bad_lines='skip', engine='python')
+        if len(df) > 0 and len(df.columns) > 1:
+            return df, attempts
+    except Exception:
+        pass
+    return None, attempts
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    with tempfile.TemporaryDirectory() as folder:
+        print(f"{'fichier':>16} {'méthode':>18} {'lectures':>9} {'temps (s)':>10} {'forme':>14}")
+        for label, encoding, delimiter, multiline in (("utf-8 , multi", "utf-8", ",", True),
+                                                       ("utf-8 ,", "utf-8", ",", False),
+                                                       ("cp1252 ; multi", "cp1252", ";", True)):
+            path = os.path.join(folder, "export.csv")
+            build_export(path, size_mb, encoding, delimiter, multiline)
+            with open(path, "rb") as f:
+                start = time.perf_counter()
+                df, attempts = old_validate_csv_file(f)
+                old = time.perf_counter() - start
+            shape = df.shape if df is not None else None
+            print(f"{label:>16} {'validate_csv_file':>18} {attempts:>9} {old:>10.2f} {str(shape):>14}")
+            with open(path, "rb") as f:
+                start = time.perf_counter()
+                df, dialect = read_csv_sniffed(f)
+                new = time.perf_counter() - start
+            speedup = f"{old / new:.1f}x" if shape else "ancien : échec"
+            print(f"{label:>16} {'read_csv_sniffed':>18} {1:>9} {new:>10.2f} {str(df.shape):>14}  ({speedup})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/bench_decode.py
+"""
+Décodage complet vs décodage à résolution réduite (draft/reduce).
+
+Génère un corpus de photos produit synthétiques (JPEG et PNG, 12 à 24 Mpx),
+puis mesure pour chaque méthode le temps CPU et le pic de mémoire (RSS) du
+processus. Chaque méthode tourne dans un processus neuf pour isoler le pic.
+
+Usage : python benchmarks/bench_decode.py [nb_images]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from multiprocessing import get_context
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image as PILImage
+
+from utils.image_preparation import open_image_for_box, target_pixels
+
+# Zone d'une carte produit (4 cm x ~5 cm) à 150 dpi
+BOX_PT = (113.4, 141.7)
+DPI = 150
+
+
+def build_corpus(folder, count):
+    import numpy as np
+    sizes = [(4000, 3000), (6000, 4000), (3000, 4000)]
+    paths = []
+    rng = np.random.default_rng(0)
+    for i in range(count):
+        w, h = sizes[i % len(sizes)]
+        # Dégradé + bruit : se comprime comme une photo, pas comme un aplat
+        base = np.linspace(0, 255, w, dtype=np.float32)[None, :, None]
+        noise = rng.normal(0, 12, (h, w, 3)).astype(np.float32)
+        arr = np.clip(base + noise, 0, 255).astype("uint8")
+        fmt = "PNG" if i % 4 == 3 else "JPEG"
+        path = os.path.join(folder, f"img_{i}.{fmt.lower()}")
+        PILImage.fromarray(arr).save(path, fmt, quality=90)
+        paths.append(path)
+    return paths
+
+
+def decode_full(path, box_px):
+    with PILImage.open(path) as img:
+        img = img.convert("RGB")
+        img = img.resize(box_px, PILImage.LANCZOS)
+    return img.size
+
+
+def decode_reduced(path, box_px):
+    with open_image_for_box(path, box_px) as img:
+        img.thumbnail(box_px, PILImage.LANCZOS)
+        img = img.convert("RGB")
+    return img.size
+
+
+def _peak_rss_mb():
+    # VmHWM est propre au processus (ru_maxrss hérite du pic du parent après fork)
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run(method, paths, box_px, queue):
+    fn = decode_full if method == "full" else decode_reduced
+    start = time.process_time()
+    for path in paths:
+        fn(path, box_px)
+    cpu = time.process_time() - start
+    queue.put((cpu, _peak_rss_mb()))
+
+
+def measure(method, paths, box_px):
+    ctx = get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run, args=(method, paths, box_px, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    box_px = target_pixels(BOX_PT[0], BOX_PT[1], DPI)
+    with tempfile.TemporaryDirectory() as folder:
+        print(f"Corpus: {count} images, zone cible {box_px[0]}x{box_px[1]} px")
+        paths = build_corpus(folder, count)
+        full_cpu, full_rss = measure("full", paths, box_px)
+        red_cpu, red_rss = measure("reduced", paths, box_px)
+    print(f"{'méthode':<10} {'CPU (s)':>8} {'RSS max (Mo)':>13}")
+    print(f"{'complet':<10} {full_cpu:>8.2f} {full_rss:>13.0f}")
+    print(f"{'réduit':<10} {red_cpu:>8.2f} {red_rss:>13.0f}")
+    print(f"Gain CPU: x{full_cpu / max(red_cpu, 1e-6):.1f}")
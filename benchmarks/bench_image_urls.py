@@ -0,0 +1,101 @@
+# benchmarks/bench_image_urls.py
+"""
+Extraction des URLs d'images d'un export Etsy (colonnes IMAGE 1..10) :
+anciennes boucles ligne par ligne (extract_row_image_urls sur iterrows, un
+findall par cellule ; apply de read_etsy_csv) vs image_url_table (colonnes
+empilées, str.extract / str.extractall, table (row, slot, url)).
+
+Export au format Etsy : 1 à 10 images par produit, cellules vides au-delà,
+quelques cellules à plusieurs URLs ou abîmées (";ps://").
+
+Usage : python benchmarks/bench_image_urls.py [nb_lignes]
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from utils.image_url_table import CELL_URL_PATTERN, image_url_table, row_url_lists
+
+IMG_COLS = [f"IMAGE {i}" for i in range(1, 11)]
+
+IMG_URL_RE = re.compile(r"https?://[^\s\"']+?\.(?:png|jpe?g|webp|gif|bmp|tiff)(?:\?[^\s\"']*)?", re.I)
+URL_RE = re.compile(r"^https?://[^\s\"']+$")
+
+
+def old_cell_urls(cell):
+    s = str(cell or "").replace(";ps://", "https://")
+    out, seen = [], set()
+    for u in IMG_URL_RE.findall(s):
+        u = u.strip()
+        if u and u not in seen:
+            seen.add(u)
+            out.append(u)
+    return out
+
+
+def old_row_urls(row):
+    urls = []
+    for col in IMG_COLS:
+        if col in row:
+            urls.extend(old_cell_urls(row[col]))
+    return urls[:4]
+
+
+def old_etsy_urls(row):
+    urls = []
+    for c in IMG_COLS:
+        val = str(row.get(c, "")).strip()
+        if val and URL_RE.match(val):
+            urls.append(val)
+    return urls
+
+
+def build_export(rows):
+    rng = random.Random(0)
+    records = []
+    for i in range(rows):
+        record = {"TITLE": f"Produit {i}", "PRICE": f"{rng.randint(5, 200)}.00"}
+        for slot in range(rng.randint(1, 10)):
+            url = f"https://i.etsystatic.com/{rng.randint(1, 99999)}/r/il/abc{i}/{slot}/il_fullxfull.{i}{slot}.jpg"
+            k = rng.random()
+            if k < 0.02:
+                url = url.replace("https://", ";ps://")
+            elif k < 0.04:
+                url = f"{url} {url.replace('.jpg', '_b.jpg')}"
+            record[IMG_COLS[slot]] = url
+        records.append(record)
+    return pd.DataFrame(records, columns=["TITLE", "PRICE", *IMG_COLS])
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    df = build_export(rows)
+    print(f"{rows} lignes, {int(df[IMG_COLS].notna().sum().sum())} cellules image")
+    print(f"{'étape':>22} {'boucles (s)':>12} {'vectorisé (s)':>14}")
+
+    old, per_row = timed(lambda: [old_row_urls(row) for _, row in df.iterrows()])
+    new, table = timed(lambda: row_url_lists(image_url_table(df, IMG_COLS, max_slots=4), len(df)))
+    assert per_row == table
+    print(f"{'rendu (4 par produit)':>22} {old:>12.2f} {new:>14.3f}")
+
+    old, per_row = timed(lambda: df.apply(old_etsy_urls, axis=1).tolist())
+    new, table = timed(lambda: row_url_lists(image_url_table(df, IMG_COLS, pattern=CELL_URL_PATTERN), len(df)))
+    repaired = sum(a != b for a, b in zip(per_row, table))
+    print(f"{'read_etsy_csv':>22} {old:>12.2f} {new:>14.3f}  ({repaired} lignes à URL réparée)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# benchmarks/bench_incremental.py
+"""
+Régénération après modification de quelques lignes : rendu complet vs
+rendu incrémental (page_cache=True, seules les pages modifiées sont redessinées).
+
+Premier rendu à froid (caches vides), puis modification de 3 produits
+répartis dans le catalogue et nouvelle génération, avec et sans cache de pages.
+Les images préparées sont en cache dans les deux cas : l'écart mesuré est
+celui du dessin et de l'intégration des pages.
+
+Usage : python benchmarks/bench_incremental.py [nb_produits] [lignes_modifiées]
+        ex. python benchmarks/bench_incremental.py 500 3
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_parallel_render import ROOT, build_products, quiet
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    with quiet():
+        fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    edits = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    with tempfile.TemporaryDirectory() as folder:
+        os.environ["SNAPCATALOG_CACHE_DIR"] = os.path.join(folder, "cache")
+        from pdf_designer import generate_modern_catalog_with_progress
+        products = build_products(folder, count, distinct_images=count)
+        os.chdir(folder)  # images locales dans ./images
+        out = os.path.join(folder, "catalog.pdf")
+
+        cold = timed(generate_modern_catalog_with_progress, products, filename=out, page_cache=True)
+
+        edited = [dict(p) for p in products]
+        for k in range(edits):
+            edited[(k * 2 + 1) * count // (edits * 2)]["PRIX"] = "9,99 €"
+        full = timed(generate_modern_catalog_with_progress, edited, filename=out)
+        report = {}
+        incremental = timed(generate_modern_catalog_with_progress, edited, filename=out,
+                            page_cache=True, report=report)
+
+        print(f"{count} produits, {edits} lignes modifiées")
+        print(f"{'rendu':>24} {'temps (s)':>10}")
+        print(f"{'initial (caches vides)':>24} {cold:>10.2f}")
+        print(f"{'complet':>24} {full:>10.2f}")
+        print(f"{'incrémental':>24} {incremental:>10.2f}   "
+              f"({report['pages_rendered']} pages redessinées, {report['pages_cached']} réutilisées)")
+        os.chdir(ROOT)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/bench_page_chrome.py
+"""
+Décor des pages produits : dessiné sur chaque page (ancien _paint_product_page)
+vs formulaire PDF défini une fois par document (doForm + numéro de page).
+
+Catalogue synthétique de N produits (4 par page, images en cache après un
+premier rendu) : temps de rendu, taille du PDF et octets d'opérations de
+dessin par page produits (flux de contenu décompressé).
+
+Usage : python benchmarks/bench_page_chrome.py [nb_produits]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_parallel_render import ROOT, build_products, quiet
+
+
+def old_paint_product_page(c, page, designer, image_registry, image_dpi=300, image_quality=95, on_card=None,
+                           titre="Catalogue", sous_titre="", bg_color="#F0F0F0"):
+    """Ancien dessin : fond, bandeau et filigrane émis sur chaque page"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from pdf_designer import draw_snapcatalog_filigrane
+    c.setFillColor(colors.HexColor(bg_color))
+    c.rect(0, 0, A4[0], A4[1], fill=1, stroke=0)
+    designer.draw_catalog_header(c, page.number, 0, titre, sous_titre)
+    draw_snapcatalog_filigrane(c, page.number + 1, A4)
+    for card in page.cards:
+        designer.paint_card(c, card, image_dpi, image_quality, image_registry)
+
+
+def content_bytes(path):
+    """Octets moyens (décompressés) des flux de contenu des pages produits (hors couverture)"""
+    from PyPDF2 import PdfReader
+    reader = PdfReader(path)
+    sizes = [len(page.get_contents().get_data()) for page in reader.pages[1:]]
+    return sum(sizes) / len(sizes), len(reader.pages)
+
+
+def render(generate, products, out, **kwargs):
+    start = time.perf_counter()
+    with quiet():
+        generate(products, filename=out, titre="Catalogue Printemps", sous_titre="Nouveautés et best-sellers",
+                 **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    with tempfile.TemporaryDirectory() as folder:
+        os.environ["SNAPCATALOG_CACHE_DIR"] = os.path.join(folder, "cache")
+        import pdf_designer
+        from pdf_designer import CatalogDesigner, generate_modern_catalog_with_progress
+        products = build_products(folder, count)
+        os.chdir(folder)  # images locales dans ./images
+        out = os.path.join(folder, "catalog.pdf")
+        render(generate_modern_catalog_with_progress, products, out)  # préchauffage du cache d'images
+
+        print(f"{count} produits")
+        print(f"{'décor':>12} {'temps (s)':>10} {'PDF (Ko)':>9} {'contenu/page (o)':>17}")
+        new_paint, new_use = pdf_designer._paint_product_page, CatalogDesigner.use_page_chrome
+        for label, paint, use in (("par page", old_paint_product_page, lambda *args: None),
+                                  ("formulaire", new_paint, new_use)):
+            pdf_designer._paint_product_page, CatalogDesigner.use_page_chrome = paint, use
+            elapsed = min(render(generate_modern_catalog_with_progress, products, out) for _ in range(2))
+            per_page, pages = content_bytes(out)
+            print(f"{label:>12} {elapsed:>10.2f} {os.path.getsize(out) / 1024:>9.0f} {per_page:>17.0f}")
+        pdf_designer._paint_product_page, CatalogDesigner.use_page_chrome = new_paint, new_use
+        os.chdir(ROOT)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_parallel_render.py
+"""
+Rendu du catalogue : un processus vs rendu par parties en parallèle.
+
+Génère un catalogue synthétique (N produits, images locales dans images/),
+fait un premier rendu pour remplir le cache des images préparées, puis mesure
+le temps de generate_modern_catalog_with_progress pour chaque nombre de
+processus et l'accélération par rapport au rendu en un processus.
+
+Usage : python benchmarks/bench_parallel_render.py [nb_produits] [processus...]
+        ex. python benchmarks/bench_parallel_render.py 1000 1 2 4
+"""
+
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@contextlib.contextmanager
+def quiet():
+    """Coupe la sortie standard (logs du rendu), y compris celle des processus fils"""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with open(os.devnull, "w") as devnull:
+        os.dup2(devnull.fileno(), 1)
+        try:
+            yield
+        finally:
+            sys.stdout.flush()
+            os.dup2(saved, 1)
+            os.close(saved)
+
+
+def build_products(folder, count, distinct_images=50):
+    import numpy as np
+    from PIL import Image as PILImage
+    images = os.path.join(folder, "images")
+    os.makedirs(images)
+    rng = np.random.default_rng(0)
+    for i in range(count):
+        if i < distinct_images:
+            arr = rng.integers(0, 255, (1200, 1600, 3), dtype="uint8")
+            PILImage.fromarray(arr).save(os.path.join(images, f"{i}_IMAGE 1_bench.jpg"), quality=85)
+        else:
+            # Les produits suivants réutilisent les mêmes photos (lien physique)
+            os.link(os.path.join(images, f"{i % distinct_images}_IMAGE 1_bench.jpg"),
+                    os.path.join(images, f"{i}_IMAGE 1_bench.jpg"))
+    return [
+        {
+            "TITRE": f"Produit {i} - titre de démonstration assez long pour tenir sur deux lignes",
+            "PRIX": f"{10 + i % 90},{i % 100:02d} €",
+            "DESCRIPTION": "Description détaillée du produit. " * 12,
+            "RÉFÉRENCE": f"REF-{i:05d}",
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    worker_counts = [int(w) for w in sys.argv[2:]] or [1, 2, 4]
+    with tempfile.TemporaryDirectory() as folder:
+        os.environ["SNAPCATALOG_CACHE_DIR"] = os.path.join(folder, "cache")
+        from pdf_designer import generate_modern_catalog_with_progress
+        products = build_products(folder, count)
+        os.chdir(folder)  # get_local_image cherche dans ./images
+        out = os.path.join(folder, "catalog.pdf")
+
+        with quiet():
+            generate_modern_catalog_with_progress(products, filename=out)  # préchauffage du cache
+
+        print(f"{count} produits, {os.cpu_count()} CPU")
+        print(f"{'processus':>9} {'temps (s)':>10} {'accélération':>13} {'taille (Mo)':>12}")
+        baseline = None
+        for workers in worker_counts:
+            start = time.perf_counter()
+            with quiet():
+                generate_modern_catalog_with_progress(products, filename=out, workers=workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            size = os.path.getsize(out) / 1_000_000
+            print(f"{workers:>9} {elapsed:>10.2f} {baseline / elapsed:>12.2f}x {size:>12.1f}")
+        os.chdir(ROOT)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# benchmarks/bench_pdf_optimize.py
+"""
+Optimisation du PDF final : ancien compress_pdf (réécriture PyPDF2 page par
+page) vs optimize_pdf_bytes (dédoublonnage, objets inutilisés retirés, flux
+d'objets, sans décompresser les flux).
+
+Catalogue synthétique de N produits rendu par fragments (page_cache), donc
+fusionné : polices et décors répétés dans chaque fragment. Pour chaque
+méthode : taille, temps et pic mémoire Python (tracemalloc).
+
+Usage : python benchmarks/bench_pdf_optimize.py [nb_produits]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_parallel_render import ROOT, build_products, quiet
+
+
+def old_compress_pdf(pdf_bytes, aggressive=False):
+    """Ancien compress_pdf d'app.py"""
+    from PyPDF2 import PdfReader, PdfWriter
+    reader = PdfReader(BytesIO(pdf_bytes))
+    writer = PdfWriter()
+    for page in reader.pages:
+        if aggressive:
+            page.compress_content_streams()
+        writer.add_page(page)
+    if reader.metadata:
+        writer.add_metadata(reader.metadata)
+    output = BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def measure(fn, pdf_bytes):
+    tracemalloc.start()
+    start = time.perf_counter()
+    with quiet():
+        result = fn(pdf_bytes)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return len(result), elapsed, peak
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    with tempfile.TemporaryDirectory() as folder:
+        os.environ["SNAPCATALOG_CACHE_DIR"] = os.path.join(folder, "cache")
+        from pdf.pdf_optimize import optimize_pdf_bytes
+        from pdf_designer import generate_modern_catalog_with_progress
+        products = build_products(folder, count)
+        os.chdir(folder)  # images locales dans ./images
+        out = os.path.join(folder, "catalog.pdf")
+        with quiet():
+            generate_modern_catalog_with_progress(products, filename=out, titre="Catalogue Printemps",
+                                                  sous_titre="Nouveautés et best-sellers", page_cache=True)
+        with open(out, "rb") as f:
+            pdf_bytes = f.read()
+        os.chdir(ROOT)
+
+        print(f"{count} produits, PDF fusionné {len(pdf_bytes) / 1024:.0f} Ko")
+        print(f"{'méthode':>18} {'taille (Ko)':>12} {'temps (s)':>10} {'pic mémoire (Mo)':>17}")
+        for label, fn in (("PyPDF2", old_compress_pdf),
+                          ("PyPDF2 agressif", lambda b: old_compress_pdf(b, aggressive=True)),
+                          ("optimize_pdf", lambda b: optimize_pdf_bytes(b)[0])):
+            size, elapsed, peak = measure(fn, pdf_bytes)
+            print(f"{label:>18} {size / 1024:>12.0f} {elapsed:>10.2f} {peak / 1024 / 1024:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_price_columns.py
+"""
+Normalisation d'une colonne de prix presque tous distincts (le mémo ne sert
+plus) : normalize_prices (analyse cellule par cellule des valeurs distinctes)
+vs normalize_price_column (format déduit une fois, analyse vectorisée, repli
+cellule par cellule pour les valeurs atypiques).
+
+Colonne au format d'un export : "1 234,50 €", quelques "HT", fourchettes et
+"Gratuit" comme valeurs atypiques.
+
+Usage : python benchmarks/bench_price_columns.py [nb_lignes]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from utils import price_engine
+from utils.price_columns import normalize_price_column
+from utils.price_engine import normalize_prices
+
+
+def build_column(rows):
+    rng = random.Random(0)
+    column = []
+    for _ in range(rows):
+        value = f"{rng.randint(1, 99999):,}".replace(",", " ") + f",{rng.randint(0, 99):02d} €"
+        k = rng.random()
+        if k < 0.1:
+            value += " HT"
+        elif k < 0.12:
+            value = f"{rng.randint(1, 50)} – {rng.randint(50, 99)} €"
+        elif k < 0.13:
+            value = "Gratuit"
+        column.append(value)
+    return column
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        price_engine._normalize_memo.cache_clear()
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    column = build_column(rows)
+    print(f"{rows} lignes, {len(set(column))} prix distincts")
+
+    cell, per_cell = timed(lambda: normalize_prices(column))
+    vector, by_column = timed(lambda: normalize_price_column(pd.Series(column)))
+    same = sum(a["display"] == b for a, b in zip(per_cell, by_column["display"]))
+    print(f"{'normalize_prices':>24} {cell * 1000:>8.1f} ms")
+    print(f"{'normalize_price_column':>24} {vector * 1000:>8.1f} ms  ({cell / vector:.1f}x)")
+    print(f"{'affichages identiques':>24} {same}/{rows}")
+
+
+if __name__ == "__main__":
+    main()
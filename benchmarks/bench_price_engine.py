@@ -0,0 +1,57 @@
+# benchmarks/bench_price_engine.py
+"""
+Normalisation des prix d'une colonne de catalogue : analyse de chaque cellule
+(sans mémo) vs normalize_price mémorisé vs normalize_prices (dédoublonnage).
+
+La colonne reprend les formats courants des exports (FR, US, devises, unités,
+TTC/HT, fourchettes) ; les prix se répètent comme dans un vrai catalogue.
+
+Usage : python benchmarks/bench_price_engine.py [nb_lignes] [prix_distincts]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import price_engine
+from utils.price_engine import _normalize_price, normalize_price, normalize_prices
+
+FORMATS = [
+    "{v},{c:02d} €", "{v},{c:02d} € TTC", "{v} € HT", "${v}.{c:02d}", "{v}.{c:02d} USD",
+    "à partir de {v},{c:02d} €", "env. {v} € / m2", "{v} – {w} €", "£{v}.{c:02d}", "{v} CHF",
+]
+
+
+def build_column(rows, distinct):
+    rng = random.Random(0)
+    values = [rng.choice(FORMATS).format(v=rng.randint(1, 2000), w=rng.randint(2000, 3000), c=rng.randint(0, 99))
+              for _ in range(distinct)]
+    return [rng.choice(values) for _ in range(rows)]
+
+
+def timed(fn):
+    price_engine._normalize_memo.cache_clear()
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    distinct = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    column = build_column(rows, distinct)
+    print(f"{rows} lignes, {distinct} prix distincts")
+
+    cell = timed(lambda: [_normalize_price(v) for v in column])
+    memo = timed(lambda: [normalize_price(v) for v in column])
+    batch = timed(lambda: normalize_prices(column))
+    print(f"{'cellule par cellule':>20} {cell * 1000:>8.1f} ms")
+    print(f"{'mémo':>20} {memo * 1000:>8.1f} ms  ({cell / memo:.1f}x)")
+    print(f"{'normalize_prices':>20} {batch * 1000:>8.1f} ms  ({cell / batch:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/bench_product_store.py
+"""
+Produits prêts pour le rendu : liste de dicts (ancien to_dict(orient="records")
+de toutes les colonnes choisies, lectures en cascade product.get('title',
+product.get('TITRE', ...)) à chaque carte) vs product_store (ProductRecord à
+__slots__, colonnes des champs résolues une fois, autres colonnes ignorées).
+
+Mesures : mémoire Python gardée par produit (tracemalloc, produits vivants),
+temps de construction, temps de lecture des champs d'une carte.
+
+Export au format des colonnes françaises : TITRE, PRIX, CODE_DEVISE,
+DESCRIPTION, RÉFÉRENCE, QUANTITÉ, IMAGE 1..3, TAGS.
+
+Usage : python benchmarks/bench_product_store.py [nb_lignes]
+"""
+
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from utils.product_store import PRICE_DISPLAY_FIELD, product_store, text_frame
+
+
+def build_frame(rows):
+    rng = random.Random(0)
+    words = ["thé", "café", "céramique", "tissé", "main", "naturel", "été", "coton", "lin", "bois"]
+    data = []
+    for i in range(rows):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(10, 60)))
+        data.append({
+            "TITRE": f"Produit {i} {rng.choice(words)}", "PRIX": f"{rng.randint(5, 500)},{rng.randint(0, 99):02d}",
+            "CODE_DEVISE": "EUR", "DESCRIPTION": text.capitalize() + ".", "RÉFÉRENCE": f"REF-{i:06d}",
+            "QUANTITÉ": str(rng.randint(0, 40)),
+            "IMAGE 1": f"https://i.etsystatic.com/{i}/il_fullxfull.{i}1.jpg",
+            "IMAGE 2": f"https://i.etsystatic.com/{i}/il_fullxfull.{i}2.jpg",
+            "IMAGE 3": f"https://i.etsystatic.com/{i}/il_fullxfull.{i}3.jpg",
+            "TAGS": ", ".join(rng.sample(words, 4)),
+        })
+    return pd.DataFrame(data)
+
+
+def old_records(frame):
+    return text_frame(frame).to_dict(orient="records")
+
+
+def old_fields(product):
+    """Lectures d'une carte dans l'ancien layout_card"""
+    title = str(product.get('title', product.get('TITRE', 'Produit sans nom')))
+    price = product.get(PRICE_DISPLAY_FIELD)
+    if price is None:
+        price = product.get('price', product.get('PRIX', 'Prix N/A'))
+    description = product.get('description', product.get('DESCRIPTION', ''))
+    ref = product.get('Ref', product.get('ref', product.get('RÉFÉRENCE', 'N/A')))
+    qty = product.get('Quantité', product.get('quantity', product.get('QUANTITÉ', 'N/A')))
+    material = product.get('Matériaux', product.get('material', product.get('MATÉRIAUX', 'N/A')))
+    label = str(product.get('title', product.get('TITRE', 'NO NAME')))[:50]
+    return title, price, description, ref, qty, material, label
+
+
+def record_fields(record):
+    """Mêmes lectures sur un ProductRecord"""
+    title = str(record.title if record.title is not None else 'Produit sans nom')
+    price = record.price_display
+    if price is None:
+        price = record.price if record.price is not None else 'Prix N/A'
+    description = record.description
+    ref = record.ref if record.ref is not None else 'N/A'
+    qty = record.quantity if record.quantity is not None else 'N/A'
+    material = record.material if record.material is not None else 'N/A'
+    label = str(record.title if record.title is not None else 'NO NAME')[:50]
+    return title, price, description, ref, qty, material, label
+
+
+def measure(build, frame):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    products = build(frame)
+    elapsed = time.perf_counter() - start
+    kept, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return products, elapsed, kept, peak
+
+
+def lookup_time(fields, products, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for product in products:
+            fields(product)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    frame = build_frame(rows)
+    print(f"{rows} produits, {len(frame.columns)} colonnes choisies")
+    print(f"{'produits':>14} {'construction (s)':>17} {'gardé/produit (o)':>18} {'pic (Mo)':>9} {'lecture/carte (µs)':>19}")
+    results = []
+    for label, build, fields in (("dicts", old_records, old_fields), ("ProductRecord", product_store, record_fields)):
+        products, elapsed, kept, peak = measure(build, frame)
+        lookup = lookup_time(fields, products)
+        results.append([fields(p) for p in products])
+        print(f"{label:>14} {elapsed:>17.2f} {kept / rows:>18.0f} {peak / 1e6:>9.1f} {lookup / rows * 1e6:>19.2f}")
+        del products
+    assert results[0] == results[1]
+
+
+if __name__ == "__main__":
+    main()
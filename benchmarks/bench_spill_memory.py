@@ -0,0 +1,70 @@
+# benchmarks/bench_spill_memory.py
+"""
+Pic de mémoire du rendu selon la taille du catalogue : Canvas classique
+(toutes les pages en mémoire jusqu'à save) vs SpillingCanvas (pages vidées
+sur disque toutes les SPILL_PAGES pages).
+
+Chaque mesure tourne dans un processus neuf (pic RSS = VmHWM du processus).
+Toutes les photos sont distinctes, comme dans un vrai catalogue.
+
+Usage : python benchmarks/bench_spill_memory.py [nb_produits...]
+        ex. python benchmarks/bench_spill_memory.py 100 300 1000
+"""
+
+import os
+import sys
+import tempfile
+import time
+from multiprocessing import get_context
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_decode import _peak_rss_mb
+from bench_parallel_render import ROOT, build_products, quiet
+
+
+def _run(folder, products, spill_pages, return_bytes, queue):
+    os.chdir(folder)
+    from pdf_designer import generate_modern_catalog_with_progress
+    start = time.perf_counter()
+    with quiet():
+        generate_modern_catalog_with_progress(products, filename=os.path.join(folder, "catalog.pdf"),
+                                              return_bytes=return_bytes, spill_pages=spill_pages)
+    queue.put((time.perf_counter() - start, _peak_rss_mb()))
+
+
+def measure(folder, products, spill_pages, return_bytes=True):
+    ctx = get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run, args=(folder, products, spill_pages, return_bytes, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    sizes = [int(n) for n in sys.argv[1:]] or [100, 300, 1000]
+    from pdf.spill_canvas import SPILL_PAGES
+    with tempfile.TemporaryDirectory() as folder:
+        os.environ["SNAPCATALOG_CACHE_DIR"] = os.path.join(folder, "cache")
+        all_products = build_products(folder, max(sizes), distinct_images=max(sizes))
+        # Préchauffage : images préparées une fois pour toutes
+        measure(folder, all_products, SPILL_PAGES)
+
+        # "octets" : PDF renvoyé en bytes (mode Streamlit) ; "fichier" : PDF écrit sur disque
+        print(f"{'produits':>8} {'PDF (Mo)':>9} {'classique octets':>17} {'spill octets':>13} "
+              f"{'spill fichier':>14} {'classique (s)':>14} {'spill (s)':>10}")
+        for n in sizes:
+            products = all_products[:n]
+            plain_time, plain_rss = measure(folder, products, 0)
+            spill_time, spill_rss = measure(folder, products, SPILL_PAGES)
+            _, file_rss = measure(folder, products, SPILL_PAGES, return_bytes=False)
+            pdf_mb = os.path.getsize(os.path.join(folder, "catalog.pdf")) / 1_000_000
+            print(f"{n:>8} {pdf_mb:>9.0f} {plain_rss:>14.0f} Mo {spill_rss:>10.0f} Mo "
+                  f"{file_rss:>11.0f} Mo {plain_time:>14.2f} {spill_time:>10.2f}")
+    os.chdir(ROOT)
+
+
+if __name__ == "__main__":
+    main()
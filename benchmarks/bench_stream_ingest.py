@@ -0,0 +1,66 @@
+# benchmarks/bench_stream_ingest.py
+"""
+Gros export produits jusqu'aux fenêtres de rendu : DataFrame complet (lecture,
+copie des colonnes choisies, conversion en texte, liste de produits) vs
+ProductStream (lecture par blocs, produits rendus fenêtre par fenêtre).
+
+Les deux chemins s'arrêtent aux fenêtres de produits que consomme le rendu
+(pdf_designer._product_windows, prix affichés compris), sans dessin : temps et
+pic mémoire Python (tracemalloc).
+
+Usage : python benchmarks/bench_stream_ingest.py [taille_mo]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_csv_ingest import build_export
+
+COLUMNS = ["Title", "Body (HTML)", "Variant Price", "Variant SKU", "Image Src"]
+
+
+def full_frame(path):
+    from pdf_designer import _product_windows, _with_price_display
+    from utils.csv_sniffer import read_csv_sniffed
+    from utils.product_store import product_store
+    df, _ = read_csv_sniffed(path)
+    products = _with_price_display(product_store(df[COLUMNS].copy()))
+    return sum(len(window) for _, window, _ in _product_windows(products, 4, {}))
+
+
+def streamed(path):
+    from pdf_designer import _product_windows
+    from utils.product_stream import ProductStream
+    stream = ProductStream(path).select(COLUMNS)
+    return sum(len(window) for _, window, _ in _product_windows(stream, 4, {}))
+
+
+def measure(fn, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = fn(path)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, elapsed, peak
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 55
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "export.csv")
+        rows = build_export(path, size_mb, "utf-8", ",")
+        print(f"{rows} lignes, {os.path.getsize(path) / 1e6:.0f} Mo")
+        print(f"{'chemin':>14} {'produits':>9} {'temps (s)':>10} {'pic mémoire (Mo)':>17}")
+        for label, fn in (("DataFrame", full_frame), ("ProductStream", streamed)):
+            count, elapsed, peak = measure(fn, path)
+            print(f"{label:>14} {count:>9} {elapsed:>10.2f} {peak / 1024 / 1024:>17.0f}")
+
+
+if __name__ == "__main__":
+    main()
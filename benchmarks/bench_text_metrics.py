@@ -0,0 +1,85 @@
+# benchmarks/bench_text_metrics.py
+"""
+Mesure de texte : anciennes implémentations (stringWidth appelé sur des
+chaînes entières) vs utils.text_metrics (largeurs de glyphes en cache,
+sommes préfixes, dichotomie, retour à la ligne en un passage).
+
+Corpus : descriptions Etsy longues (~2 000 caractères) générées.
+
+Usage : python benchmarks/bench_text_metrics.py [nb_descriptions]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from utils.text_metrics import truncate_to_width, wrap_to_width
+
+FONT, SIZE = "Helvetica", 9
+WIDTH = 377  # colonne de texte d'une carte (points)
+
+WORDS = ("sac cuir véritable fait main atelier bohème vintage bandoulière réglable "
+         "livraison offerte cadeau idéal pour elle dimensions 30x20cm couleur cognac "
+         "finitions soignées chaque pièce est unique ✨ écologique recyclé").split()
+
+
+def old_truncate(text, max_width, font_name, font_size):
+    """Ancien truncate_text_to_fit : un stringWidth par position, de la fin vers le début"""
+    if stringWidth(text, font_name, font_size) <= max_width:
+        return text
+    for i in range(len(text), 0, -1):
+        truncated = text[:i] + "..."
+        if stringWidth(truncated, font_name, font_size) <= max_width:
+            return truncated
+    return "..."
+
+
+def old_wrap(text, font_name, font_size, max_width):
+    """Ancien wrap_lines_by_width (sans limite de lignes) : la ligne entière re-mesurée à chaque mot"""
+    lines, cur = [], []
+    for w in text.split():
+        test = cur + [w]
+        if stringWidth(" ".join(test), font_name, font_size) <= max_width or not cur:
+            cur = test
+        else:
+            lines.append(" ".join(cur))
+            cur = [w]
+    if cur:
+        lines.append(" ".join(cur))
+    return lines
+
+
+def bench(fn, texts, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for t in texts:
+            fn(t)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    rng = random.Random(0)
+    texts = [" ".join(rng.choice(WORDS) for _ in range(300)) for _ in range(count)]
+    print(f"{count} descriptions de ~{sum(map(len, texts)) // count} caractères, {FONT} {SIZE} pt")
+
+    # Troncature sur une ligne de carte (méta, titre court)
+    old = bench(lambda t: old_truncate(t, WIDTH, FONT, SIZE), texts, repeat=1)
+    new = bench(lambda t: truncate_to_width(t, WIDTH, FONT, SIZE), texts)
+    print(f"{'troncature':>12} {old * 1000:>9.1f} ms -> {new * 1000:>7.1f} ms  ({old / new:.0f}x)")
+
+    # Retour à la ligne de toute la description
+    old = bench(lambda t: old_wrap(t, FONT, SIZE, WIDTH), texts)
+    new = bench(lambda t: wrap_to_width(t, WIDTH, FONT, SIZE), texts)
+    print(f"{'retour ligne':>12} {old * 1000:>9.1f} ms -> {new * 1000:>7.1f} ms  ({old / new:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_upload_rerun.py
+"""
+Réexécution Streamlit sur un upload déjà lu : lecture du CSV à chaque
+réexécution (ancien comportement) vs UploadHandler.read_upload (cache par
+empreinte du contenu).
+
+Trois cas pour un export de la même taille :
+- première lecture (analyse complète, écriture Parquet) ;
+- réexécution (même upload : cache mémoire) ;
+- après éviction de la mémoire ou redémarrage (Parquet relu).
+
+Hors session Streamlit, les messages st.* sont sans effet (avertissements
+"bare mode" de Streamlit à ignorer).
+
+Usage : python benchmarks/bench_upload_rerun.py [taille_mo]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from streamlit.runtime.uploaded_file_manager import UploadedFile, UploadedFileRec
+
+from bench_csv_ingest import build_export
+
+
+def uploaded(data, file_id="bench"):
+    return UploadedFile(UploadedFileRec(file_id, "export.csv", "text/csv", data), None)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    os.environ["SNAPCATALOG_CACHE_DIR"] = tempfile.mkdtemp()
+
+    from upload_handler import UploadHandler
+    from utils import upload_cache
+    from utils.csv_sniffer import read_csv_sniffed
+    from utils.data_processing import detect_csv_type
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "export.csv")
+        build_export(path, size_mb, "utf-8", ",")
+        with open(path, "rb") as f:
+            data = f.read()
+
+    def reparse():
+        df, _ = read_csv_sniffed(uploaded(data))
+        return df, detect_csv_type(df)
+
+    (df, _), old = timed(reparse)
+    print(f"{len(df)} lignes, {len(data) / 1e6:.0f} Mo")
+    print(f"{'cas':>26} {'temps (ms)':>11}")
+    print(f"{'relecture à chaque fois':>26} {old * 1000:>11.1f}")
+    for label in ("première lecture", "réexécution", "réexécution"):
+        _, elapsed = timed(lambda: UploadHandler.read_upload(uploaded(data), stream=False))
+        print(f"{label:>26} {elapsed * 1000:>11.1f}")
+    upload_cache._memo.clear()
+    upload_cache._upload_digests.clear()
+    parsed, elapsed = timed(lambda: UploadHandler.read_upload(uploaded(data, "autre"), stream=False))
+    print(f"{'après redémarrage':>26} {elapsed * 1000:>11.1f}")
+    assert parsed.view().equals(df)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+# pdf/layout.py
+"""
+Mise en page du catalogue, séparée du dessin.
+
+layout_catalog() calcule une fois pour toutes la géométrie des pages produits
+et, pour chaque carte, les positions, les lignes de texte déjà coupées, le prix
+formaté et la zone image. Le dessin (pdf_designer) ne fait ensuite qu'émettre
+les opérations ReportLab à partir de ce modèle.
+
+La mise en page ne dépend que des produits, du nombre de produits par page et
+des images locales : elle est mise en cache et réutilisée quand seuls les
+couleurs, le titre ou la couverture changent. Le nombre de pages est connu
+avant tout dessin.
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+
+from utils.product_store import PRICE_DISPLAY_FIELD, ProductRecord, as_record
+from utils.text_metrics import font_metrics
+
+# Géométrie des pages produits
+LEFT_MARGIN = RIGHT_MARGIN = 1.20 * cm
+TOP_MARGIN = 3.0 * cm       # un peu plus haut pour l'en-tête
+BOTTOM_MARGIN = 2.0 * cm
+GAP = 0.5 * cm              # écart fixe entre cartes
+OVERFLOW_TOLERANCE = 0.01   # pt : la dernière carte tombe pile sur la marge (arrondis flottants)
+
+# Géométrie interne d'une carte
+IMAGE_WIDTH = 4 * cm
+CARD_PADDING = 0.3 * cm
+TEXT_RIGHT_PADDING = 0.5 * cm
+TITLE_FONT = ("Helvetica-Bold", 13)
+TITLE_MAX_LINES = 2
+TITLE_LINE_HEIGHT = 0.6 * cm
+DESCRIPTION_FONT = ("Helvetica", 9)
+DESCRIPTION_MAX_CHARS = 400
+DESCRIPTION_MAX_LINES = 6
+DESCRIPTION_LINE_HEIGHT = 0.35 * cm
+
+LAYOUT_CACHE_SIZE = 8
+# Cartes gardées en cache au total (fenêtres d'un flux de produits, gros catalogues)
+LAYOUT_CACHE_MAX_CARDS = 20000
+
+
+class PageGeometry:
+    """Position des cartes sur une page produits"""
+
+    __slots__ = ("page_width", "page_height", "products_per_page", "card_width", "card_height",
+                 "available_height")
+
+    def __init__(self, products_per_page: int, pagesize=A4):
+        self.page_width, self.page_height = pagesize
+        self.products_per_page = products_per_page
+        # Aire utile verticale
+        self.available_height = self.page_height - TOP_MARGIN - BOTTOM_MARGIN
+        if products_per_page > 0:
+            card_height = (self.available_height - (products_per_page - 1) * GAP) / products_per_page
+            # Sécurité: ne pas dépasser l'aire utile
+            self.card_height = min(card_height, self.available_height)
+        else:
+            self.card_height = 6.5 * cm  # fallback
+        self.card_width = self.page_width - LEFT_MARGIN - RIGHT_MARGIN
+
+    def y_bottom(self, index_on_page: int) -> float:
+        """Bas de la carte n° index_on_page (de haut en bas)"""
+        y_top = self.page_height - TOP_MARGIN
+        return y_top - index_on_page * (self.card_height + GAP) - self.card_height
+
+
+class CardLayout:
+    """Carte produit mise en page : tout ce qu'il faut pour la dessiner"""
+
+    __slots__ = ("index", "x", "y", "width", "height", "image_box", "image_file",
+                 "title_lines", "price_text", "price_y", "description_lines", "meta_text", "label")
+
+    def __init__(self, index, x, y, width, height, image_box, image_file, title_lines,
+                 price_text, price_y, description_lines, meta_text, label):
+        self.index = index
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.image_box = image_box              # (x, y, largeur, hauteur)
+        self.image_file = image_file            # chemin local ou None
+        self.title_lines = title_lines          # [(x, y, texte)]
+        self.price_text = price_text
+        self.price_y = price_y
+        self.description_lines = description_lines  # [(x, y, texte)]
+        self.meta_text = meta_text
+        self.label = label                      # libellé court pour les logs
+
+    @property
+    def content_x(self):
+        return self.x + IMAGE_WIDTH + 0.8 * cm
+
+
+class PageLayout:
+    """Page produits : numéro (1 = couverture) et cartes"""
+
+    __slots__ = ("number", "cards")
+
+    def __init__(self, number, cards=None):
+        self.number = number
+        self.cards = cards if cards is not None else []
+
+
+class CatalogLayout:
+    """Mise en page des pages produits d'un catalogue (ou d'une partie)"""
+
+    __slots__ = ("geometry", "pages", "total_products", "total_pages", "key")
+
+    def __init__(self, geometry, pages, total_products, total_pages, key):
+        self.geometry = geometry
+        self.pages = pages
+        self.total_products = total_products
+        self.total_pages = total_pages      # pages produits du catalogue complet
+        self.key = key
+
+    @property
+    def page_count(self) -> int:
+        """Nombre de pages du PDF complet, couverture comprise"""
+        return 1 + self.total_pages
+
+
+def smart_truncate_description(text, max_chars=DESCRIPTION_MAX_CHARS):
+    """Tronque intelligemment la description en respectant les phrases"""
+    if not text or len(text) <= max_chars:
+        return text or ""
+
+    # Tronquer à max_chars
+    truncated = text[:max_chars]
+
+    # Chercher la fin de phrase la plus proche
+    last_sentence = truncated.rfind('.')
+
+    if last_sentence > max_chars * 0.7:  # Si on trouve une phrase pas trop courte
+        return truncated[:last_sentence + 1]
+    else:
+        # Sinon, tronquer au dernier espace
+        last_space = truncated.rfind(' ')
+        if last_space > 0:
+            return truncated[:last_space] + "..."
+        return truncated[:max_chars - 3] + "..."
+
+
+def local_image_index(images_folder="images") -> dict:
+    """index produit -> fichier image locale "{index}_IMAGE 1_*" (une seule lecture du dossier)"""
+    index = {}
+    try:
+        names = os.listdir(images_folder)
+    except OSError:
+        return index
+    for fname in names:
+        prefix, sep, _ = fname.partition("_IMAGE 1_")
+        if sep and prefix.isdigit() and int(prefix) not in index:
+            index[int(prefix)] = os.path.join(images_folder, fname)
+    return index
+
+
+def layout_card(product, index, x, y, width, height, format_price: Callable[[object], str],
+                image_file: Optional[str] = None) -> CardLayout:
+    """Calcule positions et textes d'une carte produit (aucun dessin)"""
+    image_box = (x + CARD_PADDING, y + CARD_PADDING, IMAGE_WIDTH, height - 0.6 * cm)
+    content_x = x + IMAGE_WIDTH + 0.8 * cm
+    text_width = x + width - TEXT_RIGHT_PADDING - content_x
+    current_y = y + height - 0.5 * cm
+
+    # Champs résolus une fois (ProductRecord), produit dict converti
+    fields = as_record(product)
+
+    # Titre avec retour à la ligne selon la largeur réelle, "..." si tronqué
+    title = str(fields.title if fields.title is not None else 'Produit sans nom')
+    title_lines = []
+    for line in font_metrics(*TITLE_FONT).wrap(title, text_width, TITLE_MAX_LINES, ellipsis="..."):
+        title_lines.append((content_x, current_y, line))
+        current_y -= TITLE_LINE_HEIGHT
+    current_y -= 0.4 * cm  # Espacement supplémentaire après le titre
+
+    # Prix (avec un carré devant), déjà mis en forme pour la colonne si disponible
+    price_display = fields.price_display
+    if price_display is None:
+        price_display = format_price(fields.price if fields.price is not None else 'Prix N/A')
+    price_text = f"■ {price_display}"
+    price_y = current_y
+    current_y -= 1 * cm
+
+    # Description
+    description = smart_truncate_description(fields.description)
+    description_lines = []
+    if description:
+        for line in font_metrics(*DESCRIPTION_FONT).wrap(str(description), text_width, DESCRIPTION_MAX_LINES,
+                                                         ellipsis="..."):
+            description_lines.append((content_x, current_y, line))
+            current_y -= DESCRIPTION_LINE_HEIGHT
+
+    # Metadata
+    ref = fields.ref if fields.ref is not None else 'N/A'
+    qty = fields.quantity if fields.quantity is not None else 'N/A'
+    material = fields.material if fields.material is not None else 'N/A'
+    meta_text = f"■ Qté: {qty} • ■ Réf: {ref} • ■ {material}"
+
+    label = str(fields.title if fields.title is not None else 'NO NAME')[:50]
+    return CardLayout(index, x, y, width, height, image_box, image_file, title_lines,
+                      price_text, price_y, description_lines, meta_text, label)
+
+
+_layout_cache = OrderedDict()
+
+
+def _cached_cards() -> int:
+    return sum(len(page.cards) for layout in _layout_cache.values() for page in layout.pages)
+
+
+def _layout_key(products, products_per_page, first_index, total_products, images, format_price):
+    h = hashlib.sha256()
+    h.update(json.dumps([products_per_page, first_index, total_products,
+                         f"{format_price.__module__}.{format_price.__qualname__}"]).encode())
+    h.update(json.dumps(sorted(images.items())).encode())
+    for product in products:
+        if isinstance(product, ProductRecord):
+            product = product.values()
+        h.update(json.dumps(product, sort_keys=True, default=str, ensure_ascii=False).encode())
+    return h.hexdigest()
+
+
+def layout_catalog(products, products_per_page=4, format_price: Callable[[object], str] = str,
+                   first_index=0, total_products=None, images_folder="images",
+                   pagesize=A4) -> CatalogLayout:
+    """Met en page les pages produits (résultat mis en cache)
+
+    Args:
+        products: produits à placer (ProductRecord ou dicts)
+        products_per_page: cartes par page
+        format_price: prix brut -> texte affiché
+        first_index: index global du premier produit (rendu par parties) ; multiple
+            de products_per_page pour une pagination continue
+        total_products: nombre total de produits du catalogue (défaut: len(products))
+        images_folder: dossier des images locales "{index}_IMAGE 1_*"
+    """
+    total_products = len(products) if total_products is None else total_products
+    per_page = max(1, products_per_page)
+    images = local_image_index(images_folder)
+    key = _layout_key(products, products_per_page, first_index, total_products, images, format_price)
+    cached = _layout_cache.get(key)
+    if cached is not None:
+        _layout_cache.move_to_end(key)
+        return cached
+
+    geometry = PageGeometry(products_per_page, pagesize)
+    pages = []
+    page = None
+    page_number = 1 + first_index // per_page
+    for j, product in enumerate(products):
+        i = first_index + j
+        index_on_page = i % per_page
+        if index_on_page == 0 or page is None:
+            if page is not None:
+                page_number += 1
+            page = PageLayout(page_number)
+            pages.append(page)
+        y = geometry.y_bottom(index_on_page)
+        if y < BOTTOM_MARGIN - OVERFLOW_TOLERANCE:
+            # Ne devrait pas arriver avec le calcul de hauteur : carte sur une nouvelle page
+            page_number += 1
+            page = PageLayout(page_number)
+            pages.append(page)
+            y = geometry.y_bottom(0)
+        page.cards.append(layout_card(product, i, LEFT_MARGIN, y, geometry.card_width, geometry.card_height,
+                                      format_price, images.get(i)))
+
+    total_pages = (total_products + products_per_page - 1) // per_page
+    layout = CatalogLayout(geometry, pages, total_products, total_pages, key)
+    _layout_cache[key] = layout
+    while len(_layout_cache) > 1 and (len(_layout_cache) > LAYOUT_CACHE_SIZE or
+                                      _cached_cards() > LAYOUT_CACHE_MAX_CARDS):
+        _layout_cache.popitem(last=False)
+    return layout
@@ -0,0 +1,98 @@
+# pdf/page_cache.py
+"""
+Cache disque des pages rendues, pour la régénération incrémentale.
+
+Chaque page (couverture, pages produits) est rendue dans un PDF d'une page,
+rangé sous une clé qui résume tout ce qui influe sur son dessin : cartes mises
+en page (pdf.layout), style (couleurs, titres, niveau d'image) et empreinte du
+contenu des images. Après modification de quelques lignes, seules les pages
+dont la clé a changé sont redessinées ; le document est réassemblé à partir
+des fragments (pdf.pdf_merge, images identiques intégrées une seule fois).
+"""
+
+import hashlib
+import json
+import os
+from typing import Iterable, Optional
+
+import reportlab
+
+from utils.image_cache import cache_dir, prune_directory
+
+# À incrémenter quand le dessin d'une page change (invalide les fragments existants)
+PAGE_RENDER_VERSION = 3
+
+PAGE_CACHE_MAX_BYTES = 500_000_000
+
+_STYLE_KEYS = ("titre", "sous_titre", "bg_color", "primary_color", "image_dpi", "image_quality")
+
+_file_digests = {}      # (chemin, taille, mtime) -> sha256 du contenu
+
+
+def file_digest(path: Optional[str]) -> Optional[str]:
+    """Empreinte SHA-256 du contenu d'un fichier (mémorisée tant qu'il n'est pas modifié)"""
+    if not path:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    stamp = (path, st.st_size, st.st_mtime_ns)
+    digest = _file_digests.get(stamp)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = _file_digests[stamp] = h.hexdigest()
+    return digest
+
+
+def _key(payload) -> str:
+    payload = [PAGE_RENDER_VERSION, reportlab.Version, payload]
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False, default=str).encode()).hexdigest()
+
+
+def page_key(page, options: dict, is_last: bool) -> str:
+    """Clé d'une page produits (pdf.layout.PageLayout)
+
+    Ni le nombre total de pages ni le rang des produits n'y figurent : ajouter des
+    produits en fin de catalogue ne change que la dernière page (is_last, filigrane
+    de fin) et les nouvelles pages.
+    """
+    cards = [
+        [card.x, card.y, card.width, card.height, card.image_box, file_digest(card.image_file),
+         card.title_lines, card.price_text, card.price_y, card.description_lines, card.meta_text]
+        for card in page.cards
+    ]
+    style = [options[k] for k in _STYLE_KEYS]
+    return _key(["page", page.number, is_last, style, cards])
+
+
+def cover_key(options: dict) -> str:
+    """Clé de la couverture (titres, logo et image de couverture, niveau de qualité)"""
+    return _key(["cover", options["titre"], options["sous_titre"], options["image_dpi"], options["image_quality"],
+                 file_digest(options["logo_path"]), file_digest(options["cover_path"])])
+
+
+def fragment_path(key: str) -> str:
+    return os.path.join(cache_dir("pages"), f"{key}.pdf")
+
+
+def cached_fragment(key: str) -> Optional[str]:
+    """Chemin du fragment s'il est en cache (date d'accès rafraîchie pour l'éviction LRU)"""
+    path = fragment_path(key)
+    try:
+        os.utime(path)
+    except OSError:
+        return None
+    return path
+
+
+def missing_keys(keys: Iterable[str]) -> set:
+    return {key for key in keys if cached_fragment(key) is None}
+
+
+def prune_page_cache(max_bytes: int = PAGE_CACHE_MAX_BYTES):
+    """Borne la taille du cache des pages (LRU)"""
+    prune_directory(cache_dir("pages"), max_bytes)
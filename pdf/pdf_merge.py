@@ -0,0 +1,240 @@
+# pdf/pdf_merge.py
+"""
+Fusion en flux de PDF générés par ReportLab.
+
+Les parties sont lues objet par objet (mmap) et recopiées directement dans la
+sortie : la mémoire utilisée ne dépend pas de la taille totale du catalogue.
+Seule la partie dictionnaire de chaque objet est réécrite (renumérotation des
+références "N 0 R") ; les données des flux (images, contenus de page) sont
+copiées telles quelles. Un nouvel arbre de pages regroupe les pages de toutes
+les parties, dans l'ordre. Les images identiques d'une partie à l'autre
+(même dictionnaire, mêmes données) ne sont écrites qu'une fois.
+
+Limites : xref classique (pas de flux d'objets ni de xref compressée), ce que
+produit ReportLab. Les signets/annotations inter-parties ne sont pas gérés.
+"""
+
+import hashlib
+import mmap
+import os
+import re
+from typing import BinaryIO, Iterable, Union
+
+_STARTXREF_RE = re.compile(rb"startxref\s+(\d+)")
+_OBJ_HEADER_RE = re.compile(rb"(\d+)\s+(\d+)\s+obj\b")
+_STREAM_RE = re.compile(rb">>\s*stream(?:\r\n|\n|\r)")
+_REF_RE = re.compile(rb"(?<![\d.])(\d+) 0 R\b")
+_LENGTH_RE = re.compile(rb"/Length\s+(\d+)(\s+0\s+R)?")
+_KIDS_RE = re.compile(rb"/Kids\s*\[([^\]]*)\]")
+_TYPE_RE = re.compile(rb"/Type\s*/(\w+)")
+_VERSION_RE = re.compile(rb"%PDF-(\d\.\d)")
+
+
+class PdfPart:
+    """Un PDF source ouvert en lecture (mmap, ou contenu déjà en mémoire), avec sa table xref"""
+
+    def __init__(self, path: Union[str, bytes]):
+        if isinstance(path, (bytes, bytearray)):
+            self.path = "<bytes>"
+            self._file = None
+            self.data = path
+        else:
+            self.path = path
+            self._file = open(path, "rb")
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        m = _VERSION_RE.match(self.data, 0)
+        self.version = m.group(1).decode() if m else "1.4"
+        self.offsets, self.trailer = self._read_xref()
+        self.root = self._trailer_ref(self.trailer, b"Root")
+        self.info = self._trailer_ref(self.trailer, b"Info")
+
+    def close(self):
+        if self._file is not None:
+            self.data.close()
+            self._file.close()
+
+    def _read_xref(self):
+        tail = self.data[max(0, len(self.data) - 1024):]
+        m = None
+        for m in _STARTXREF_RE.finditer(tail):
+            pass
+        if m is None:
+            raise ValueError(f"startxref introuvable: {self.path}")
+        pos = int(m.group(1))
+        end = self.data.find(b"trailer", pos)
+        if self.data[pos:pos + 4] != b"xref" or end < 0:
+            raise ValueError(f"Table xref classique attendue: {self.path}")
+        offsets = {}
+        lines = self.data[pos + 4:end].split()
+        i = 0
+        while i < len(lines):
+            first, count = int(lines[i]), int(lines[i + 1])
+            i += 2
+            for n in range(count):
+                offset, _gen, kind = lines[i:i + 3]
+                i += 3
+                if kind == b"n":
+                    offsets[first + n] = int(offset)
+        trailer_end = self.data.find(b"startxref", end)
+        return offsets, self.data[end:trailer_end]
+
+    @staticmethod
+    def _trailer_ref(trailer: bytes, key: bytes):
+        m = re.search(rb"/" + key + rb"\s+(\d+)\s+0\s+R", trailer)
+        return int(m.group(1)) if m else None
+
+    def object_span(self, num: int):
+        """(début du dictionnaire, fin du dictionnaire, début des données, fin de l'objet)
+
+        Pour un objet sans flux, les données sont vides (début = fin du dictionnaire).
+        """
+        offset = self.offsets[num]
+        header = _OBJ_HEADER_RE.match(self.data, offset)
+        if header is None or int(header.group(1)) != num:
+            raise ValueError(f"Objet {num} introuvable à l'offset {offset}: {self.path}")
+        body = header.end()
+        endobj = self.data.find(b"endobj", body)
+        stream = _STREAM_RE.search(self.data, body, endobj if endobj >= 0 else len(self.data))
+        if stream is None:
+            return body, endobj, endobj, endobj + len(b"endobj")
+        dict_end = stream.start() + 2  # inclut ">>"
+        length = _LENGTH_RE.search(self.data, body, dict_end)
+        if length is None or length.group(2):
+            raise ValueError(f"/Length direct attendu pour l'objet {num}: {self.path}")
+        data_end = stream.end() + int(length.group(1))
+        endobj = self.data.find(b"endobj", data_end)
+        return body, dict_end, dict_end, endobj + len(b"endobj")
+
+    def dictionary(self, num: int) -> bytes:
+        start, dict_end, _, _ = self.object_span(num)
+        return self.data[start:dict_end]
+
+    def page_tree(self):
+        """(numéros des pages dans l'ordre, numéros des nœuds /Pages)"""
+        catalog = self.dictionary(self.root)
+        m = re.search(rb"/Pages\s+(\d+)\s+0\s+R", catalog)
+        if m is None:
+            raise ValueError(f"Arbre de pages introuvable: {self.path}")
+        pages, nodes = [], []
+
+        def walk(num):
+            d = self.dictionary(num)
+            t = _TYPE_RE.search(d)
+            if t and t.group(1) == b"Pages":
+                nodes.append(num)
+                kids = _KIDS_RE.search(d)
+                for ref in _REF_RE.finditer(kids.group(1) if kids else b""):
+                    walk(int(ref.group(1)))
+            else:
+                pages.append(num)
+
+        walk(int(m.group(1)))
+        return pages, nodes
+
+
+def _image_key(part: PdfPart, num: int):
+    """Empreinte d'une image XObject sans référence indirecte (sinon None)"""
+    start, dict_end, data_start, end = part.object_span(num)
+    dictionary = part.data[start:dict_end]
+    if b"/Image" not in dictionary or _REF_RE.search(dictionary):
+        return None
+    digest = hashlib.sha1(dictionary)
+    digest.update(part.data[data_start:end])
+    return digest.digest()
+
+
+def merge_pdfs(sources: Iterable[str], output: Union[str, BinaryIO]) -> int:
+    """Fusionne des PDF ReportLab, dans l'ordre, vers un chemin ou un fichier binaire
+
+    Args:
+        sources: chemins des PDF à concaténer
+        output: chemin du PDF final ou objet fichier binaire (BytesIO...)
+
+    Returns:
+        Nombre de pages du document fusionné
+    """
+    if isinstance(output, (str, os.PathLike)):
+        with open(output, "wb") as f:
+            return merge_pdfs(sources, f)
+
+    out = output
+    base = out.tell()
+    offsets = {}            # nouveau numéro -> offset dans la sortie
+    kids = []               # nouvelles pages, dans l'ordre
+    CATALOG, PAGES, INFO = 1, 2, 3
+    next_num = 4
+    info_dict = None
+    version = "1.4"
+    images = {}             # empreinte (dictionnaire + données) -> numéro dans la sortie
+
+    def write(chunk):
+        out.write(chunk)
+
+    def position():
+        return out.tell() - base
+
+    header_written = False
+    for path in sources:
+        part = PdfPart(path)
+        try:
+            if not header_written:
+                version = max(version, part.version)
+                write(b"%PDF-" + version.encode() + b"\n%\x93\x8c\x8b\x9e\n")
+                header_written = True
+            pages, nodes = part.page_tree()
+            skipped = {part.root, part.info, *nodes}
+            if info_dict is None and part.info is not None:
+                info_dict = part.dictionary(part.info)
+            mapping = {num: PAGES for num in nodes}
+            reused = set()
+            for num in sorted(part.offsets):
+                if num in skipped:
+                    continue
+                key = _image_key(part, num)
+                if key is not None and key in images:
+                    # Image déjà écrite par une partie précédente : on pointe dessus
+                    mapping[num] = images[key]
+                    reused.add(num)
+                    continue
+                mapping[num] = next_num
+                if key is not None:
+                    images[key] = next_num
+                next_num += 1
+            # Référence vers un objet écarté (catalogue, infos) : remplacée par null
+            renumber = lambda m: b"%d 0 R" % mapping[int(m.group(1))] if int(m.group(1)) in mapping else b"null"
+            for num in sorted(part.offsets):
+                if num in skipped or num in reused:
+                    continue
+                start, dict_end, data_start, end = part.object_span(num)
+                offsets[mapping[num]] = position()
+                write(b"%d 0 obj\n" % mapping[num])
+                write(_REF_RE.sub(renumber, part.data[start:dict_end]))
+                write(part.data[data_start:end])
+                write(b"\n")
+            kids.extend(mapping[num] for num in pages)
+        finally:
+            part.close()
+
+    if not header_written:
+        raise ValueError("Aucun PDF à fusionner")
+
+    offsets[PAGES] = position()
+    write(b"%d 0 obj\n<<\n/Count %d /Kids [ %s ] /Type /Pages\n>>\nendobj\n"
+          % (PAGES, len(kids), b" ".join(b"%d 0 R" % k for k in kids)))
+    offsets[CATALOG] = position()
+    write(b"%d 0 obj\n<<\n/PageMode /UseNone /Pages %d 0 R /Type /Catalog\n>>\nendobj\n" % (CATALOG, PAGES))
+    if info_dict is not None:
+        offsets[INFO] = position()
+        write(b"%d 0 obj\n%s\nendobj\n" % (INFO, info_dict.strip()))
+
+    xref_pos = position()
+    write(b"xref\n0 %d\n0000000000 65535 f \n" % next_num)
+    for num in range(1, next_num):
+        if num in offsets:
+            write(b"%010d 00000 n \n" % offsets[num])
+        else:
+            write(b"0000000000 65535 f \n")
+    info_ref = b"/Info %d 0 R\n" % INFO if info_dict is not None else b""
+    write(b"trailer\n<<\n%s/Root %d 0 R\n/Size %d\n>>\nstartxref\n%d\n%%%%EOF\n"
+          % (info_ref, CATALOG, next_num, xref_pos))
+    return len(kids)
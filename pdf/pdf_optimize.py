@@ -0,0 +1,278 @@
+# pdf/pdf_optimize.py
+"""
+Optimisation en flux du PDF final.
+
+Une passe d'analyse parcourt les objets depuis le catalogue (mmap, un objet à
+la fois) ; une passe d'écriture recopie les objets retenus dans la sortie :
+- objets inaccessibles retirés (signets et catalogues des parties fusionnées...) ;
+- objets identiques dédoublonnés (polices et décors de chaque partie fusionnée,
+  images, flux de contenu), après renumérotation de leurs références ;
+- objets sans flux regroupés dans des flux d'objets compressés (PDF 1.5), avec
+  une table xref compressée.
+Les données des flux (images, contenus de page) sont copiées telles quelles.
+La mémoire dépend du nombre d'objets, pas de la taille du PDF.
+
+Si l'estimation du gain est trop faible, le PDF est laissé tel quel.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import struct
+import time
+import zlib
+from io import BytesIO
+from typing import BinaryIO, Union
+
+from pdf.pdf_merge import PdfPart, _REF_RE, _TYPE_RE
+
+# Gain estimé minimal (part de la taille d'origine) pour réécrire le PDF
+OPTIMIZE_MIN_GAIN = 0.02
+
+# Objets par flux d'objets
+OBJECTS_PER_STREAM = 100
+
+# Échantillon (octets) compressé pour estimer le gain des flux d'objets
+_SAMPLE_BYTES = 65536
+
+_ID_RE = re.compile(rb"/ID\s*(\[[^\]]*\])")
+
+# Jamais dédoublonnés : chaque page reste un objet distinct de l'arbre
+_UNIQUE_TYPES = {b"Page", b"Pages", b"Catalog"}
+
+
+class _Plan:
+    """Résultat de l'analyse : objets retenus, représentants, estimation du gain"""
+
+    def __init__(self, part: PdfPart):
+        self.part = part
+        self.canon = {}         # numéro source -> numéro du représentant
+        self.order = []         # représentants, dans l'ordre d'écriture
+        self.streams = set()    # représentants qui ont un flux
+        self.duplicates = 0
+        self.removed_bytes = 0
+        self.packable_bytes = 0
+        self._analyse()
+        self.unreachable = len(part.offsets) - len(self.canon)
+        for num in part.offsets:
+            if num not in self.canon:
+                start, _, _, end = part.object_span(num)
+                self.removed_bytes += end - start
+
+    def _refs(self, num):
+        return [int(m.group(1)) for m in _REF_RE.finditer(self.part.dictionary(num))
+                if int(m.group(1)) in self.part.offsets]
+
+    def _analyse(self):
+        """Parcours en profondeur depuis le catalogue ; un objet est traité après ses références"""
+        part = self.part
+        fingerprints = {}       # empreinte -> représentant
+        done = set()
+        roots = [num for num in (part.root, part.info) if num is not None]
+        for root in roots:
+            if root in done:
+                continue
+            done.add(root)
+            stack = [(root, iter(self._refs(root)))]
+            while stack:
+                num, children = stack[-1]
+                child = next(children, None)
+                if child is not None:
+                    if child not in done:
+                        done.add(child)
+                        stack.append((child, iter(self._refs(child))))
+                    continue
+                stack.pop()
+                self._settle(num, fingerprints)
+
+    def _settle(self, num, fingerprints):
+        part = self.part
+        start, dict_end, data_start, end = part.object_span(num)
+        dictionary = part.data[start:dict_end]
+        has_stream = part.data[dict_end:dict_end + 16].lstrip().startswith(b"stream")
+        kind = _TYPE_RE.search(dictionary)
+        if kind is None or kind.group(1) not in _UNIQUE_TYPES:
+            # Références déjà résolues vers leur représentant (en cours de parcours : inchangées)
+            canonical = _REF_RE.sub(lambda m: b"%d 0 R" % self.canon.get(int(m.group(1)), int(m.group(1))),
+                                    dictionary)
+            digest = hashlib.sha1(canonical)
+            digest.update(part.data[data_start:end])
+            key = digest.digest()
+            twin = fingerprints.get(key)
+            if twin is not None:
+                self.canon[num] = twin
+                self.duplicates += 1
+                self.removed_bytes += end - start
+                return
+            fingerprints[key] = num
+        self.canon[num] = num
+        self.order.append(num)
+        if has_stream:
+            self.streams.add(num)
+        else:
+            self.packable_bytes += dict_end - start
+
+    def estimated_gain(self) -> int:
+        """Octets gagnés estimés : objets retirés + compression des objets regroupés"""
+        sample = b"".join(self._body(num) for num in self._sample())
+        ratio = len(zlib.compress(sample, 6)) / len(sample) if sample else 1.0
+        # ~20 octets par entrée xref classique, ~7 en table compressée
+        return int(self.removed_bytes + self.packable_bytes * (1 - ratio) + 13 * len(self.order))
+
+    def _sample(self):
+        size = 0
+        for num in self.order:
+            if num in self.streams:
+                continue
+            yield num
+            start, dict_end, _, _ = self.part.object_span(num)
+            size += dict_end - start
+            if size >= _SAMPLE_BYTES:
+                return
+
+    def _body(self, num) -> bytes:
+        start, dict_end, _, _ = self.part.object_span(num)
+        return self.part.data[start:dict_end].strip()
+
+
+def _write(plan: _Plan, out: BinaryIO) -> int:
+    """Écrit le PDF optimisé ; retourne le nombre d'octets écrits"""
+    part = plan.part
+    base = out.tell()
+    number = {num: n for n, num in enumerate(plan.order, start=1)}
+    next_num = len(plan.order) + 1
+    entries = {}            # numéro -> (type xref, champ 2, champ 3)
+
+    def renumber(match):
+        target = plan.canon.get(int(match.group(1)))
+        return b"%d 0 R" % number[target] if target is not None else b"null"
+
+    version = max(part.version, "1.5")
+    out.write(b"%PDF-" + version.encode() + b"\n%\x93\x8c\x8b\x9e\n")
+
+    batch = []
+
+    def flush_batch():
+        nonlocal next_num
+        if not batch:
+            return
+        stream_num = next_num
+        next_num += 1
+        header, bodies, offset = [], [], 0
+        for index, (num, body) in enumerate(batch):
+            entries[num] = (2, stream_num, index)
+            header.append(b"%d %d" % (num, offset))
+            bodies.append(body)
+            offset += len(body) + 1
+        head = b" ".join(header) + b"\n"
+        data = zlib.compress(head + b"\n".join(bodies) + b"\n", 6)
+        entries[stream_num] = (1, out.tell() - base, 0)
+        out.write(b"%d 0 obj\n<< /Type /ObjStm /N %d /First %d /Filter /FlateDecode /Length %d >>\nstream\n"
+                  % (stream_num, len(batch), len(head), len(data)))
+        out.write(data)
+        out.write(b"\nendstream\nendobj\n")
+        batch.clear()
+
+    for num in plan.order:
+        start, dict_end, data_start, end = part.object_span(num)
+        dictionary = _REF_RE.sub(renumber, part.data[start:dict_end])
+        if num in plan.streams:
+            entries[number[num]] = (1, out.tell() - base, 0)
+            out.write(b"%d 0 obj\n" % number[num])
+            out.write(dictionary)
+            out.write(part.data[data_start:end])
+            out.write(b"\n")
+        else:
+            batch.append((number[num], dictionary.strip()))
+            if len(batch) >= OBJECTS_PER_STREAM:
+                flush_batch()
+    flush_batch()
+
+    # Table xref compressée (W [1 4 2]), elle-même dernier objet
+    xref_num = next_num
+    size = xref_num + 1
+    xref_pos = out.tell() - base
+    entries[xref_num] = (1, xref_pos, 0)
+    rows = [struct.pack(">BIH", 0, 0, 65535)]
+    for n in range(1, size):
+        rows.append(struct.pack(">BIH", *entries.get(n, (0, 0, 0))))
+    data = zlib.compress(b"".join(rows), 6)
+    extra = b""
+    if part.info is not None and part.info in plan.canon:
+        extra += b" /Info %d 0 R" % number[plan.canon[part.info]]
+    ids = _ID_RE.search(part.trailer)
+    if ids:
+        extra += b" /ID " + ids.group(1)
+    out.write(b"%d 0 obj\n<< /Type /XRef /Size %d /W [ 1 4 2 ] /Root %d 0 R%s /Filter /FlateDecode /Length %d >>\n"
+              b"stream\n" % (xref_num, size, number[part.root], extra, len(data)))
+    out.write(data)
+    out.write(b"\nendstream\nendobj\nstartxref\n%d\n%%%%EOF\n" % xref_pos)
+    return out.tell() - base
+
+
+def _copy(source: Union[str, bytes], out: BinaryIO):
+    if isinstance(source, (bytes, bytearray)):
+        out.write(source)
+    else:
+        with open(source, "rb") as f:
+            shutil.copyfileobj(f, out)
+
+
+def optimize_pdf(source: Union[str, bytes], output: Union[str, BinaryIO],
+                 min_gain: float = OPTIMIZE_MIN_GAIN) -> dict:
+    """Optimise un PDF (chemin ou contenu) vers un chemin ou un fichier binaire
+
+    Le PDF est recopié tel quel si le gain estimé est inférieur à min_gain
+    (part de la taille) ou s'il n'a pas la structure attendue (xref classique).
+
+    Returns:
+        statistiques : original_bytes, optimized_bytes, duplicates, unreachable,
+        packed, seconds, skipped
+    """
+    if isinstance(output, str):
+        with open(output, "wb") as f:
+            return optimize_pdf(source, f, min_gain)
+
+    start = time.perf_counter()
+    stats = _optimize(source, output, min_gain)
+    if stats["skipped"]:
+        _copy(source, output)
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def optimize_pdf_bytes(pdf_bytes: bytes, min_gain: float = OPTIMIZE_MIN_GAIN) -> tuple[bytes, dict]:
+    """Variante en mémoire : (PDF optimisé ou pdf_bytes inchangé, statistiques)"""
+    start = time.perf_counter()
+    out = BytesIO()
+    stats = _optimize(pdf_bytes, out, min_gain)
+    stats["seconds"] = time.perf_counter() - start
+    return (pdf_bytes if stats["skipped"] else out.getvalue()), stats
+
+
+def _optimize(source, out, min_gain) -> dict:
+    size = len(source) if isinstance(source, (bytes, bytearray)) else os.path.getsize(source)
+    stats = {"original_bytes": size, "optimized_bytes": size, "duplicates": 0, "unreachable": 0,
+             "packed": 0, "skipped": True}
+    try:
+        part = PdfPart(source)
+    except ValueError as e:
+        print(f"[OPTIM] PDF laissé tel quel : {e}")
+        return stats
+    try:
+        plan = _Plan(part)
+        stats.update(duplicates=plan.duplicates, unreachable=plan.unreachable,
+                     packed=len(plan.order) - len(plan.streams))
+        gain = plan.estimated_gain()
+        if gain < min_gain * size:
+            print(f"[OPTIM] Gain estimé trop faible ({gain / 1024:.0f} Ko), PDF laissé tel quel")
+            return stats
+        stats["optimized_bytes"] = _write(plan, out)
+        stats["skipped"] = False
+    finally:
+        part.close()
+    print(f"[OPTIM] {size / 1024:.0f} Ko -> {stats['optimized_bytes'] / 1024:.0f} Ko "
+          f"({stats['duplicates']} doublons, {stats['unreachable']} objets inutilisés, "
+          f"{stats['packed']} objets en flux d'objets)")
+    return stats
@@ -0,0 +1,118 @@
+# pdf/spill_canvas.py
+"""
+Canvas ReportLab à mémoire bornée.
+
+Un Canvas garde toutes les pages terminées (contenus, images) en mémoire
+jusqu'à save(). SpillingCanvas écrit un PDF partiel sur disque toutes les
+`pages_per_spill` pages, au moment du showPage(), puis repart d'un canvas
+vide ; save() fusionne les fichiers partiels en flux (pdf.pdf_merge).
+Le pic de mémoire dépend donc de `pages_per_spill`, pas de la taille du catalogue.
+
+Le code de dessin n'a pas à changer : les autres méthodes sont déléguées au
+canvas courant. showPage() réinitialise déjà l'état graphique, la rotation
+à cet endroit ne change donc pas le rendu.
+"""
+
+import os
+import shutil
+import tempfile
+import weakref
+from typing import BinaryIO, Callable, Union
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from pdf.pdf_merge import merge_pdfs
+
+# Pages conservées en mémoire avant écriture d'un fichier partiel
+SPILL_PAGES = 25
+
+# Réglages du document, rejoués sur chaque canvas partiel
+_DOCUMENT_SETTERS = {"setTitle", "setAuthor", "setSubject", "setCreator", "setKeywords", "setProducer"}
+
+
+class SpillingCanvas:
+    """Canvas qui vide ses pages sur disque toutes les `pages_per_spill` pages
+
+    Args:
+        target: chemin du PDF final ou fichier binaire (BytesIO...)
+        pagesize: format des pages
+        pages_per_spill: pages par fichier partiel
+        spill_dir: dossier des fichiers partiels (temporaire par défaut)
+        **canvas_kwargs: transmis à chaque reportlab Canvas
+    """
+
+    def __init__(self, target: Union[str, BinaryIO], pagesize=A4, pages_per_spill: int = SPILL_PAGES,
+                 spill_dir: str = None, **canvas_kwargs):
+        self._target = target
+        self._pagesize = pagesize
+        self._pages_per_spill = max(1, int(pages_per_spill))
+        self._canvas_kwargs = canvas_kwargs
+        self._tmp = tempfile.mkdtemp(prefix="snapcatalog_spill_", dir=spill_dir)
+        # Nettoyage même si le rendu échoue avant save()
+        self._cleanup = weakref.finalize(self, shutil.rmtree, self._tmp, True)
+        self._spills = []
+        self._document_calls = []
+        self._setup_hooks = []
+        self._pages_done = 0        # pages déjà écrites dans des fichiers partiels
+        self._pages_in_canvas = 0
+        self._canvas = self._new_canvas()
+
+    def _new_canvas(self):
+        path = os.path.join(self._tmp, f"spill_{len(self._spills):05d}.pdf")
+        c = canvas.Canvas(path, pagesize=self._pagesize, **self._canvas_kwargs)
+        c._spill_path = path
+        for name, args, kwargs in self._document_calls:
+            getattr(c, name)(*args, **kwargs)
+        for hook in self._setup_hooks:
+            hook(c)
+        self._pages_in_canvas = 0
+        return c
+
+    def _flush(self):
+        """Écrit le canvas courant sur disque (s'il contient des pages)"""
+        c = self._canvas
+        if self._pages_in_canvas or len(c._code):
+            c.save()
+            self._spills.append(c._spill_path)
+
+    def add_setup_hook(self, hook: Callable):
+        """hook(canvas) appelé sur le canvas courant et sur chaque nouveau canvas partiel
+
+        Pour les ressources de document (formulaires, polices...) qui doivent
+        exister dans chaque fichier partiel.
+        """
+        self._setup_hooks.append(hook)
+        hook(self._canvas)
+
+    def showPage(self):
+        self._canvas.showPage()
+        self._pages_in_canvas += 1
+        if self._pages_in_canvas >= self._pages_per_spill:
+            self._flush()
+            self._pages_done += self._pages_in_canvas
+            self._canvas = self._new_canvas()
+
+    def getPageNumber(self):
+        return self._pages_done + self._canvas.getPageNumber()
+
+    def save(self):
+        """Termine le document : dernier fichier partiel puis fusion vers la cible"""
+        try:
+            self._flush()
+            if not self._spills:
+                # Document vide : ReportLab écrit un PDF sans page
+                self._canvas.save()
+                self._spills.append(self._canvas._spill_path)
+            merge_pdfs(self._spills, self._target)
+        finally:
+            self._cleanup()
+
+    def __getattr__(self, name):
+        attr = getattr(self._canvas, name)
+        if name in _DOCUMENT_SETTERS:
+            def replayed(*args, **kwargs):
+                self._document_calls.append((name, args, kwargs))
+                return attr(*args, **kwargs)
+            return replayed
+        return attr
@@ -1,34 +1,36 @@
+from reportlab import rl_config
 from reportlab.lib import colors
 from reportlab.lib.units import cm, mm
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.utils import ImageReader
 import os
-import textwrap
-from PIL import Image as PILImage
-import re
-from typing import Optional, Dict, Any
+import math
+import tempfile
+from collections.abc import Sequence
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from itertools import islice
+from multiprocessing import get_context
 
 # Import des fonctions utilitaires
-from utils.text_processing import _strip_spaces
-
-NBSP = "\u00A0"          # espace insécable
-NARROW_NBSP = "\u202F"   # espace fine insécable
+from utils.price_engine import normalize_price
+from utils.price_columns import normalize_price_column
+from utils.product_store import ProductRecord, as_record
+from utils.text_metrics import font_metrics, truncate_to_width, wrap_to_width
+from utils.image_preparation import (
+    QUALITY_TIERS, DocumentImageRegistry, prepare_cover, prepare_image, prepare_logo, prune_prepared_cache,
+)
+from pdf.pdf_merge import merge_pdfs
+from pdf.spill_canvas import SpillingCanvas, SPILL_PAGES
+from pdf.layout import DESCRIPTION_FONT, PRICE_DISPLAY_FIELD, TITLE_FONT, layout_card, layout_catalog, smart_truncate_description
+from pdf.page_cache import cover_key, file_digest, fragment_path, missing_keys, page_key, prune_page_cache
+
+# Flux binaires dans le PDF : sans rl_accel, l'encodage ASCII85 (en Python pur) des
+# JPEG domine le temps de rendu, et il grossit chaque flux de 25 %
+rl_config.useA85 = 0
 
 def truncate_text_to_fit(text, max_width, font_name, font_size):
     """Coupe le texte avec ... si trop long"""
-    from reportlab.pdfbase.pdfmetrics import stringWidth
-    
-    if stringWidth(text, font_name, font_size) <= max_width:
-        return text
-    
-    # Couper progressivement
-    for i in range(len(text), 0, -1):
-        truncated = text[:i] + "..."
-        if stringWidth(truncated, font_name, font_size) <= max_width:
-            return truncated
-    
-    return "..."
+    return truncate_to_width(text, max_width, font_name, font_size)
 
 # Constantes pour le bandeau d'en-tête
 BANNER_H = 24 * mm      # hauteur bandeau
@@ -36,306 +38,71 @@ BANNER_W = 210 * mm     # largeur A4 portrait
 TEXT_Y_FROM_TOP = 18 * mm  # distance baseline texte -> bord haut
 TEXT_LEFT_PAD = 10 * mm    # marge à gauche dans le bandeau
 
+# Formulaire PDF du décor des pages produits (fond, bandeau, filigrane)
+PAGE_CHROME_FORM = "snapcatalogPageChrome"
 
 
-def _detect_ttc_flag(s_low: str) -> Optional[bool]:
-    # True si TTC/T.V.A incluse détecté, False si HT détecté, None sinon
-    ttc_patterns = [
-        r"\bttc\b", r"\bt\.?t\.?c\.?\b", r"tva incl", r"tvaincluse", r"inclus[ea]? tva",
-        r"toutes taxes? (comprises?|incluse?s?)"
-    ]
-    ht_patterns = [
-        r"\bht\b", r"\bh\.?t\.?\b", r"hors taxe?s?\b", r"hors tva\b", r"sans tva\b"
-    ]
-    if any(re.search(p, s_low) for p in ttc_patterns):
-        return True
-    if any(re.search(p, s_low) for p in ht_patterns):
-        return False
-    return None
-
-# Certaines devises n'ont pas de décimales usuelles
-ZERO_DEC_CURRENCIES = {
-    "JPY", "KRW", "VND", "CLP", "ISK", "HUF"  # (HUF/ISK historiquement 0, gardez si ça vous convient)
-}
-
-# Base de connaissance devise: regex -> (code, symbole, position "prefix"/"suffix")
-# L'ordre compte: entrées plus spécifiques d'abord.
-CURRENCY_KB = [
-    (r"\b(xpf|cfp)\b",         ("XPF", "XPF", "suffix")),
-    (r"\b(xof|cfa)\b",         ("XOF", "CFA", "suffix")),
-    (r"\b(xaf|cfa)\b",         ("XAF", "CFA", "suffix")),
-    (r"\b(mad|dh)\b",          ("MAD", "DH",  "suffix")),
-    (r"\b(dzd)\b",             ("DZD", "DZD", "suffix")),
-    (r"\b(tnd)\b",             ("TND", "TND", "suffix")),
-    (r"\b(chf|sfr|fr\.)\b",    ("CHF", "CHF", "suffix")),
-    (r"\b(gbp|£)\b|£",         ("GBP", "£",   "prefix")),
-    (r"\b(usd)\b|\$",          ("USD", "$",   "prefix")),
-    (r"\b(cad)\b|cad\$",       ("CAD", "C$",  "prefix")),
-    (r"\b(aud)\b|au\$",        ("AUD", "A$",  "prefix")),
-    (r"\b(nzd)\b|nz\$",        ("NZD", "NZ$", "prefix")),
-    (r"\b(jpy|¥|￥)\b|¥|￥",   ("JPY", "¥",   "prefix")),
-    (r"\b(cny|rmb)\b|¥|￥",    ("CNY", "¥",   "prefix")),
-    (r"\b(hkd)\b",             ("HKD", "HK$", "prefix")),
-    (r"\b(sgd)\b",             ("SGD", "S$",  "prefix")),
-    (r"\b(sek)\b|kr\b",        ("SEK", "kr",  "suffix")),
-    (r"\b(nok)\b|kr\b",        ("NOK", "kr",  "suffix")),
-    (r"\b(dkk)\b|kr\b",        ("DKK", "kr",  "suffix")),
-    (r"\b(pln)\b|zł",          ("PLN", "zł",  "suffix")),
-    (r"\b(czk)\b|kč",          ("CZK", "Kč",  "suffix")),
-    (r"\b(huf)\b|ft\b",        ("HUF", "Ft",  "suffix")),
-    (r"\b(ron|lei|leu)\b",     ("RON", "lei", "suffix")),
-    (r"\b(bgn)\b|лв\.?",       ("BGN", "лв",  "suffix")),
-    (r"\b(try)\b|₺",           ("TRY", "₺",   "suffix")),
-    (r"\b(uah)\b|₴",           ("UAH", "₴",   "suffix")),
-    (r"\b(rub)\b|₽",           ("RUB", "₽",   "suffix")),
-    (r"\b(inr)\b|₹|rs\.?",     ("INR", "₹",   "prefix")),
-    (r"\b(aed)\b|د\.?إ\.?",    ("AED", "AED", "suffix")),
-    (r"\b(sar)\b|ر\.?س\.?",    ("SAR", "SAR", "suffix")),
-    (r"\b(qar)\b",             ("QAR", "QAR", "suffix")),
-    (r"\b(brl)\b|r\$",         ("BRL", "R$",  "prefix")),
-    (r"\b(mxn)\b",             ("MXN", "MX$", "prefix")),
-    (r"\b(ars)\b",             ("ARS", "AR$", "prefix")),
-    (r"\b(cop)\b",             ("COP", "COL$", "prefix")),
-    (r"\b(zar)\b|r\b",         ("ZAR", "R",   "prefix")),
-    (r"\b(ils|nis)\b|₪",       ("ILS", "₪",   "prefix")),
-    (r"\b(php)\b|₱",           ("PHP", "₱",   "prefix")),
-    (r"\b(thb)\b|฿",           ("THB", "฿",   "prefix")),
-    (r"\b(vnd)\b|₫",           ("VND", "₫",   "suffix")),
-    (r"\b(kwd)\b",             ("KWD", "KWD", "suffix")),
-    (r"\b(omr)\b",             ("OMR", "OMR", "suffix")),
-    (r"\b(bhd)\b",             ("BHD", "BHD", "suffix")),
-    # EUR en dernier (par défaut en contexte FR)
-    (r"€|\beur\b|\beuro?s?\b", ("EUR", "€",   "suffix")),
-]
-
-def _detect_currency(raw: str) -> tuple[str, str, str]:
-    """
-    Retourne (code, symbole, position) avec position in {"prefix","suffix"}.
-    Par défaut EUR si rien détecté (contexte FR).
-    """
-    s = raw.lower()
-    for pat, (code, symbol, pos) in CURRENCY_KB:
-        if re.search(pat, s, flags=re.UNICODE):
-            return code, symbol, pos
-    return "EUR", "€", "suffix"
-
-def _extract_unit(raw: str) -> str:
-    # Extrait un suffixe d'unité typique pour l'affichage
-    s = raw.lower()
-    # Ordre important: m² avant m2, etc.
-    unit_candidates = [
-        r"/\s*m²", r"/\s*m2", r"/\s*u", r"/\s*unité", r"/\s*kg", r"/\s*g",
-        r"/\s*l", r"/\s*litre?s?", r"/\s*pa?ck", r"/\s*lot", r"/\s*ml", r"/\s*pi[eè]ce"
-    ]
-    for pat in unit_candidates:
-        m = re.search(pat, s)
-        if m:
-            # Récupère exactement comme écrit dans la source (utilise l'index trouvé)
-            start, end = m.span()
-            return raw[start:end].strip()
-    return ""
-
-def _extract_prefix(raw: str) -> str:
-    s = raw.strip()
-    m = re.match(r"(?i)\s*(à\s*partir\s*de|dès|~|≈|env\.?|environ|à partir d')\s*", s, flags=re.UNICODE)
-    return m.group(0).strip() if m else ""
-
-def _find_numbers(raw: str):
-    # Capture nombres FR: mille: espace/point, décimale: virgule
-    # Ex: "1 234,56" "1.234,56" "1234,56" "12,5" "12"
-    # On autorise aussi le format US si clairement utilisé: "1,234.56"
-    s = raw
-    # Unifie espaces
-    s = s.replace(NBSP, " ").replace(NARROW_NBSP, " ")
-    # Deux patterns: FR et US
-    pat_fr = r"\d{1,3}(?:[ .]\d{3})*(?:,\d+)?|\d+(?:,\d+)?"
-    pat_us = r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?"
-    nums_fr = re.findall(pat_fr, s)
-    nums_us = re.findall(pat_us, s)
-    # Heuristique: si présence d'une virgule décimale, on privilégie FR
-    if any("," in n for n in nums_fr):
-        return nums_fr, "FR"
-    # Sinon si présence de points décimaux et virgules de milliers, on bascule US
-    if any(re.search(r"\d,\d{3}\.", n) or "." in n for n in nums_us):
-        return nums_us, "US"
-    # Par défaut FR
-    return nums_fr if nums_fr else nums_us, "FR"
-
-def _to_float(num_str: str, style: str) -> Optional[float]:
-    try:
-        s = num_str.replace(" ", "").replace(".", "") if style == "FR" else num_str.replace(",", "")
-        s = s.replace(",", ".")
-        return float(s)
-    except Exception:
-        return None
 
-def _format_eur_fr(value: float, decimals: int = 2) -> str:
-    if value is None:
-        return ""
-    s = f"{value:,.{decimals}f}"
-    s = s.replace(",", "X").replace(".", ",").replace("X", NARROW_NBSP)
-    if decimals > 0 and s.endswith(",00"):
-        s = s[:-3]
-    return f"{s} €"
-
-def _format_other_currency(value: float, code: str, symbol: str, pos: str, decimals: int) -> str:
-    if value is None:
-        return ""
-    # Format FR: séparateur milliers fine insécable, virgule décimale
-    s = f"{value:,.{decimals}f}".replace(",", "X").replace(".", ",").replace("X", NARROW_NBSP)
-    if decimals > 0 and s.endswith(",00"):
-        s = s[:-3]
-    if pos == "prefix":
-        return f"{symbol}{s}"
-    else:
-        # espace fine insécable avant un suffixe
-        return f"{s}{NARROW_NBSP}{symbol}"
-
-def normalize_price(
-    raw_price: Any,
-    *,
-    default_is_ttc: bool = True,
-    fx_to_eur: Optional[Dict[str, float]] = None,   # ex: {"USD": 0.92, "GBP": 1.17}
-    min_decimals: int = 0,
-    max_decimals: int = 2
-) -> Dict[str, Any]:
-    """
-    Normalise un prix pour affichage FR + valeur numérique en EUR.
-    - raw_price: str ou nombre
-    - default_is_ttc: si TTC/HT non détecté dans le texte
-    - fx_to_eur: taux (1 unité devise -> EUR). Si devise != EUR et taux absent: value_eur=None, display conservé.
-    - min/max_decimals: pour l'affichage (ex: 12,5 -> 12,50 si min_decimals=2)
-    """
-    # Cas numériques directs
-    if isinstance(raw_price, (int, float)):
-        value = float(raw_price)
-        display = _format_eur_fr(value, decimals=max_decimals)
-        return {
-            "value_eur": round(value, max_decimals),
-            "is_ttc": default_is_ttc,
-            "display": (display + (" TTC" if default_is_ttc else " HT"))
-        }
+def _price_display(raw_price) -> str:
+    """Prix affiché sur les cartes"""
+    return normalize_price(raw_price)['display']
 
-    raw = _strip_spaces(str(raw_price) if raw_price is not None else "")
-    if raw == "":
-        return {"value_eur": None, "is_ttc": default_is_ttc, "display": ""}
-
-    # Gratuit / Offert
-    if re.search(r"(?i)\b(gratuit|offert|inclus)\b", raw):
-        # On suppose TTC pour l'affichage si non spécifié
-        disp = "Gratuit"
-        return {"value_eur": 0.0, "is_ttc": True if _detect_ttc_flag(raw.lower()) is not False else False, "display": disp}
-
-    s_low = raw.lower()
-    is_ttc = _detect_ttc_flag(s_low)
-    if is_ttc is None:
-        is_ttc = default_is_ttc
-
-    currency_code, currency_symbol, currency_pos = _detect_currency(raw)
-    unit = _extract_unit(raw)
-    prefix = _extract_prefix(raw)
-
-    # Intervalles / "de … à …"
-    # On récupère tous les nombres, on garde le min comme value_eur
-    nums, style = _find_numbers(raw)
-    values = [_to_float(n, style) for n in nums if n is not None]
-    values = [v for v in values if v is not None]
-
-    value_num = None
-    is_range = False
-    if len(values) == 0:
-        # Rien de solide trouvé: on renvoie l'affichage nettoyé
-        return {"value_eur": None, "is_ttc": is_ttc, "display": raw}
-    elif len(values) == 1:
-        value_num = values[0]
-    else:
-        is_range = True
-        value_num = min(values)
+def _with_price_display(products, formats=None):
+    """Produits avec leur prix affiché, analysé colonne entière (dicts copiés, ProductRecord complétés)
 
-    # Conversion devise -> EUR si nécessaire
-    value_eur: Optional[float]
-    if currency_code == "EUR":
-        value_eur = value_num
-    else:
-        if fx_to_eur and currency_code in fx_to_eur:
-            value_eur = value_num * float(fx_to_eur[currency_code])
+    Le format de la colonne (style des nombres, devise, TTC/HT) est déduit une
+    fois sur tout le catalogue : le rendu par parties ou par pages en cache
+    affiche les mêmes prix que le rendu en un bloc.
+    formats: conventions partagées entre les fenêtres d'un flux de produits
+    """
+    if not products:
+        return products
+    records = [as_record(p) for p in products]
+    if all(r.price_display is not None for r in records):
+        return products
+    prices = [r.price if r.price is not None else 'Prix N/A' for r in records]
+    currencies = [r.currency for r in records]
+    if all(code is None for code in currencies):
+        currencies = None
+    displays = normalize_price_column(prices, currencies, formats=formats)["display"].tolist()
+    # ProductRecord complété sur place (produits propres au rendu) ; dicts copiés
+    result = []
+    for product, record, display in zip(products, records, displays):
+        if isinstance(product, ProductRecord):
+            product.price_display = display
+            result.append(product)
         else:
-            value_eur = None  # on ne sait pas convertir
+            result.append({**product, PRICE_DISPLAY_FIELD: display})
+    return result
 
-    # Décimales d'affichage: respecte min/max
-    # Détermine si l'original avait des décimales ou si la devise n'utilise pas de décimales
-    had_decimals = any(("," in n or "." in n) for n in nums)
-    if currency_code in ZERO_DEC_CURRENCIES:
-        decimals = 0
-    else:
-        decimals = max(min_decimals, 2 if had_decimals else 0)
-        decimals = min(decimals, max_decimals)
-
-    # Reconstruction de l'affichage
-    # Texte prix:
-    if currency_code == "EUR":
-        if is_range and len(values) >= 2:
-            txt = f"{_format_eur_fr(min(values), decimals)} – {_format_eur_fr(max(values), decimals)}"
-        else:
-            txt = _format_eur_fr(value_num, decimals)
-    else:
-        # Autre devise: utilise la nouvelle fonction de formatage
-        if is_range and len(values) >= 2:
-            txt = f"{_format_other_currency(min(values), currency_code, currency_symbol, currency_pos, decimals)} – {_format_other_currency(max(values), currency_code, currency_symbol, currency_pos, decimals)}"
-        else:
-            txt = _format_other_currency(value_num, currency_code, currency_symbol, currency_pos, decimals)
-
-    # Suffixes TTC/HT
-    tax_txt = "TTC" if is_ttc else "HT"
-
-    # Assemble display
-    parts = []
-    if prefix:
-        # Majuscule et apostrophe typographique
-        pref = prefix.strip().capitalize().replace("'", "'")
-        # Normalise quelques variantes
-        pref = pref.replace("Env.", "Environ")
-        parts.append(pref)
-    parts.append(txt)
-    if unit:
-        parts.append(unit.replace(" ", " ").replace("m2", "m²"))  # m2 -> m² pour l'esthétique
-    parts.append(tax_txt)
-    display = " ".join(p for p in parts if p).strip()
-
-    return {
-        "value_eur": round(value_eur, decimals) if value_eur is not None else None,
-        "is_ttc": is_ttc,
-        "display": display
-    }
-
-def draw_modern_cover(c, titre, sous_titre, logo_path=None, cover_path=None):
+def draw_modern_cover(c, titre, sous_titre, logo_path=None, cover_path=None, image_dpi=300, image_quality=95):
     page_width, page_height = A4
     
-    # Image de couverture
+    # Image de couverture (rééchantillonnée à la page pour le niveau, en cache)
     if cover_path and os.path.exists(cover_path):
         try:
-            cover_img = ImageReader(cover_path)
-            c.drawImage(cover_img, 0, 0, width=page_width, height=page_height)
+            cover = prepare_cover(cover_path, page_width, page_height, image_dpi, image_quality,
+                                  source_sha=file_digest(cover_path))
+            if cover:
+                c.drawImage(cover.path, 0, 0, width=page_width, height=page_height)
         except Exception as e:
             print(f"Erreur couverture : {e}")
 
     # Logo
     if logo_path and os.path.exists(logo_path):
         try:
-            logo = PILImage.open(logo_path)
-            if logo.mode != 'RGBA':
-                logo = logo.convert('RGBA')
-            logo_img = ImageReader(logo)
             max_logo_w, max_logo_h = 3.5 * cm, 3.5 * cm  # Augmenter la taille de 3cm à 3.5cm
-            c.drawImage(
-                logo_img,
-                page_width - max_logo_w - 1.5 * cm,  # Réduire la marge droite de 2.5cm à 1.5cm
-                page_height - max_logo_h - 1.5 * cm,  # Réduire la marge haute de 2.5cm à 1.5cm
-                width=max_logo_w,
-                height=max_logo_h,
-                preserveAspectRatio=True,
-                mask='auto',
-            )
+            logo = prepare_logo(logo_path, max_logo_w, max_logo_h, image_dpi, source_sha=file_digest(logo_path))
+            if logo:
+                c.drawImage(
+                    logo.path,
+                    page_width - max_logo_w - 1.5 * cm,  # Réduire la marge droite de 2.5cm à 1.5cm
+                    page_height - max_logo_h - 1.5 * cm,  # Réduire la marge haute de 2.5cm à 1.5cm
+                    width=max_logo_w,
+                    height=max_logo_h,
+                    preserveAspectRatio=True,
+                    mask='auto',
+                )
         except Exception as e:
             print(f"Erreur logo : {e}")
 
@@ -371,18 +138,10 @@ def draw_modern_cover(c, titre, sous_titre, logo_path=None, cover_path=None):
     c.roundRect(rect_x, rect_y, rect_width, rect_height, 15, fill=1, stroke=0)
     c.restoreState()
     
-    # Diviser le titre en lignes avec textwrap
-    import textwrap
-    # Calculer la largeur maximale en caractères (approximatif)
-    max_chars_per_line = int(rect_width / (font_size * 0.6))
-    title_lines = textwrap.wrap(titre, width=max_chars_per_line)
-    
-    # Limiter à 4 lignes maximum
-    if len(title_lines) > 4:
-        title_lines = title_lines[:4]
-        # Ajouter "..." si le titre est tronqué
-        if title_lines[-1]:
-            title_lines[-1] = title_lines[-1][:max_chars_per_line-3] + "..."
+    # Diviser le titre en lignes selon la largeur réelle du texte (marge = rayon des coins)
+    # Limiter à 4 lignes maximum, "..." si le titre est tronqué
+    title_lines = wrap_to_width(titre, rect_width - 2 * 15, "Helvetica-Bold", font_size,
+                                max_lines=4, ellipsis="...")
     
     # Ajuster la hauteur du rectangle si nécessaire
     actual_height = len(title_lines) * (font_size + 50) / 72 * cm  # Ajuster avec le nouvel interlignage de 50
@@ -409,7 +168,7 @@ def draw_modern_cover(c, titre, sous_titre, logo_path=None, cover_path=None):
     for i, line in enumerate(title_lines):
         y_pos = start_y - i * line_height
         # Centrer horizontalement chaque ligne
-        text_width = c.stringWidth(line, "Helvetica-Bold", font_size)
+        text_width = font_metrics("Helvetica-Bold", font_size).width(line)
         x_pos = rect_x + (rect_width - text_width) / 2
         c.drawString(x_pos, y_pos, line)
     
@@ -440,15 +199,9 @@ def draw_modern_cover(c, titre, sous_titre, logo_path=None, cover_path=None):
     c.roundRect(sub_rect_x, sub_rect_y, sub_rect_width, sub_rect_height, 12, fill=1, stroke=0)
     c.restoreState()
     
-    # Diviser le sous-titre en lignes
-    max_sub_chars = int(sub_rect_width / (sub_font_size * 0.6))
-    subtitle_lines = textwrap.wrap(sous_titre, width=max_sub_chars)
-    
-    # Limiter à 3 lignes maximum
-    if len(subtitle_lines) > 3:
-        subtitle_lines = subtitle_lines[:3]
-        if subtitle_lines[-1]:
-            subtitle_lines[-1] = subtitle_lines[-1][:max_sub_chars-3] + "..."
+    # Diviser le sous-titre en lignes (3 lignes maximum)
+    subtitle_lines = wrap_to_width(sous_titre, sub_rect_width - 2 * 12, "Helvetica", sub_font_size,
+                                   max_lines=3, ellipsis="...")
     
     # Dessiner le sous-titre
     c.setFont("Helvetica", sub_font_size)
@@ -463,7 +216,7 @@ def draw_modern_cover(c, titre, sous_titre, logo_path=None, cover_path=None):
     for i, line in enumerate(subtitle_lines):
         y_pos = sub_start_y - i * sub_line_height
         # Centrer horizontalement
-        text_width = c.stringWidth(line, "Helvetica", sub_font_size)
+        text_width = font_metrics("Helvetica", sub_font_size).width(line)
         x_pos = sub_rect_x + (sub_rect_width - text_width) / 2
         c.drawString(x_pos, y_pos, line)
 
@@ -570,147 +323,91 @@ class CatalogDesigner:
 
     def smart_truncate_description(self, text, max_chars=400):
         """Tronque intelligemment la description en respectant les phrases"""
-        if not text or len(text) <= max_chars:
-            return text or ""
+        return smart_truncate_description(text, max_chars)
 
-        # Tronquer à max_chars
-        truncated = text[:max_chars]
-        
-        # Chercher la fin de phrase la plus proche
-        last_sentence = truncated.rfind('.')
-        
-        if last_sentence > max_chars * 0.7:  # Si on trouve une phrase pas trop courte
-            return truncated[:last_sentence + 1]
-        else:
-            # Sinon, tronquer au dernier espace
-            last_space = truncated.rfind(' ')
-            if last_space > 0:
-                return truncated[:last_space] + "..."
-            return truncated[:max_chars - 3] + "..."
-
-    def draw_wrapped_text(self, c, text, x, y, max_width_chars=85, line_height=0.35 * cm, max_lines=6):
-        """Dessine du texte avec retour à la ligne automatique"""
+    def draw_wrapped_text(self, c, text, x, y, max_width=13.3 * cm, line_height=0.35 * cm, max_lines=6):
+        """Dessine du texte avec retour à la ligne selon la largeur réelle (police courante du canvas)"""
         if not text:
             return y
         
-        lines = textwrap.wrap(str(text), width=max_width_chars)
+        lines = wrap_to_width(str(text), max_width, c._fontname, c._fontsize, max_lines=max_lines)
         current_y = y
         
-        for line in lines[:max_lines]:
+        for line in lines:
             c.drawString(x, current_y, line)
             current_y -= line_height
         
         return current_y
 
-    def draw_product_card_premium(self, c, product, x, y, width=18 * cm, height=6.5 * cm, product_index=None, image_dpi=300, image_quality=95):
+    def draw_product_card_premium(self, c, product, x, y, width=18 * cm, height=6.5 * cm, product_index=None, image_dpi=300, image_quality=95, image_registry=None):
         """Dessine une carte produit avec style moderne"""
-        print(f"🖼️  [DRAW_CARD] Traitement image avec DPI={image_dpi}, Quality={image_quality}")
-        
+        image_file = get_local_image(product_index, "IMAGE 1") if product_index is not None else None
+        card = layout_card(product, product_index, x, y, width, height, _price_display, image_file)
+        self.paint_card(c, card, image_dpi, image_quality, image_registry)
+
+    def _paint_image_placeholder(self, c, card):
+        image_x, image_y, image_w, image_h = card.image_box
+        c.setFillColor(self.config["light_gray"])
+        c.rect(image_x, image_y, image_w, image_h, fill=1, stroke=0)
+        c.setFillColor(colors.HexColor("#9CA3AF"))
+        c.setFont("Helvetica", 8)
+        c.drawString(image_x + image_w / 2 - 15, card.y + card.height / 2, "IMAGE")
+
+    def paint_card(self, c, card, image_dpi=300, image_quality=95, image_registry=None):
+        """Dessine une carte déjà mise en page (pdf.layout.CardLayout)"""
         # Fond carte
         c.setFillColor(colors.white)
         c.setStrokeColor(colors.HexColor("#E5E7EB"))
-        c.rect(x, y, width, height, fill=1, stroke=1)
+        c.rect(card.x, card.y, card.width, card.height, fill=1, stroke=1)
 
         # Zone image
-        image_width = 4 * cm
-        image_file = None
-        
-        if product_index is not None:
-            image_file = get_local_image(product_index, "IMAGE 1")
-            if image_file and os.path.exists(image_file):
-                print(f"[OK] Image locale trouvée: {image_file}")
-
-        if image_file and os.path.exists(image_file):
+        image_x, image_y, image_w, image_h = card.image_box
+        if card.image_file and os.path.exists(card.image_file):
             try:
-                print(f"🖼️ [DRAW] Tentative d'affichage de l'image: {image_file}")
-                
-                # ✅ UTILISEZ LES PARAMÈTRES DE QUALITÉ :
+                # Image rééchantillonnée à sa zone réelle pour le DPI/qualité du niveau choisi
+                if image_registry is not None:
+                    # Une seule XObject par image distincte dans le document
+                    prepared = image_registry.get(card.image_file, image_w, image_h)
+                else:
+                    prepared = prepare_image(card.image_file, image_w, image_h, dpi=image_dpi, quality=image_quality)
+                if prepared is None:
+                    raise ValueError("image illisible")
                 c.drawImage(
-                    image_file,
-                    x + 0.3 * cm, y + 0.3 * cm,
-                    width=image_width, height=height - 0.6 * cm,
+                    prepared.path,
+                    image_x, image_y,
+                    width=image_w, height=image_h,
                     preserveAspectRatio=True,
                     mask='auto'
-                    # Note: dpi n'est pas un paramètre valide pour c.drawImage dans ReportLab
                 )
-                print(f"✅ [DRAW] Image affichée avec succès: {image_file}")
-                
-                # Debug: vérifier que l'image est bien dessinée
-                print(f"🖼️ [DRAW] Image dessinée aux coordonnées: x={x + 0.3 * cm}, y={y + 0.3 * cm}, w={image_width}, h={height - 0.6 * cm}")
-                    
             except Exception as e:
-                print(f"❌ [ERREUR] Erreur affichage image {image_file}: {e}")
-                print(f"❌ [ERREUR] Détails de l'erreur: {type(e).__name__}: {str(e)}")
+                print(f"❌ [ERREUR] Erreur affichage image {card.image_file}: {type(e).__name__}: {e}")
                 # Fallback: dessiner un rectangle gris avec texte
-                c.setFillColor(self.config["light_gray"])
-                c.rect(x + 0.3 * cm, y + 0.3 * cm, image_width, height - 0.6 * cm, fill=1, stroke=0)
-                c.setFillColor(colors.HexColor("#9CA3AF"))
-                c.setFont("Helvetica", 8)
-                c.drawString(x + 0.3 * cm + image_width / 2 - 15, y + height / 2, "IMAGE")
+                self._paint_image_placeholder(c, card)
         else:
-            print(f"[ATTENTION] Aucune image trouvée pour le produit {product_index}")
-            c.setFillColor(self.config["light_gray"])
-            c.rect(x + 0.3 * cm, y + 0.3 * cm, image_width, height - 0.6 * cm, fill=1, stroke=0)
-            c.setFillColor(colors.HexColor("#9CA3AF"))
-            c.setFont("Helvetica", 8)
-            c.drawString(x + 0.3 * cm + image_width / 2 - 15, y + height / 2, "IMAGE")
-
-        # Contenu
-        content_x = x + image_width + 0.8 * cm
-        current_y = y + height - 0.5 * cm
-
-        # Titre avec retour à la ligne si trop long
+            print(f"[ATTENTION] Aucune image trouvée pour le produit {card.index}")
+            self._paint_image_placeholder(c, card)
+
+        # Titre (lignes déjà coupées)
         c.setFillColor(self.config["text_color"])
-        c.setFont("Helvetica-Bold", 13)
-        title = str(product.get('title', product.get('TITRE', 'Produit sans nom')))
-        print(f"DEBUG - Titre: {title}")
-        
-        # Découper le titre si trop long (max 40 caractères par ligne)
-        title_lines = textwrap.wrap(title, width=40)
-        for line in title_lines[:2]:  # Maximum 2 lignes pour le titre
-            c.drawString(content_x, current_y, line)
-            current_y -= 0.6 * cm  # Augmentation de l'interlignage de 0.4 à 0.6 cm
-        current_y -= 0.4 * cm  # Espacement supplémentaire après le titre
+        c.setFont(*TITLE_FONT)
+        for line_x, line_y, line in card.title_lines:
+            c.drawString(line_x, line_y, line)
 
         # Prix
         c.setFillColor(self.config["accent_color"])
         c.setFont("Helvetica-Bold", 16)
-        raw_price = product.get('price', product.get('PRIX', 'Prix N/A'))
-        print(f"DEBUG - Prix brut: {raw_price}")
-        
-        # Normaliser le prix avec la nouvelle fonction
-        price_info = normalize_price(raw_price)
-        normalized_price = price_info['display']
-        print(f"DEBUG - Prix normalisé: {normalized_price}")
-        
-        # Ajouter un carré devant le prix
-        price_with_square = f"■ {normalized_price}"
-        c.drawString(content_x, current_y, price_with_square)
-        current_y -= 1 * cm
+        c.drawString(card.content_x, card.price_y, card.price_text)
 
         # Description
         c.setFillColor(self.config["text_color"])
-        c.setFont("Helvetica", 9)
-        description = self.smart_truncate_description(
-            product.get('description', product.get('DESCRIPTION', '')),
-            max_chars=400  # Augmentation de 250 à 400 caractères
-        )
-        print(f"DEBUG - Description: {description[:50]}...")
-        current_y = self.draw_wrapped_text(
-            c, description,
-            content_x, current_y,
-            max_width_chars=85,  # Augmentation de 70 à 85 caractères par ligne
-            max_lines=6  # Augmentation de 5 à 6 lignes
-        ) - 0.3 * cm
+        c.setFont(*DESCRIPTION_FONT)
+        for line_x, line_y, line in card.description_lines:
+            c.drawString(line_x, line_y, line)
 
         # Metadata
         c.setFillColor(colors.HexColor("#6B7280"))
         c.setFont("Helvetica", 8)
-        ref = product.get('Ref', product.get('ref', product.get('RÉFÉRENCE', 'N/A')))
-        qty = product.get('Quantité', product.get('quantity', product.get('QUANTITÉ', 'N/A')))
-        material = product.get('Matériaux', product.get('material', product.get('MATÉRIAUX', 'N/A')))
-        meta_text = f"■ Qté: {qty} • ■ Réf: {ref} • ■ {material}"
-        c.drawString(content_x, y + 0.3 * cm, meta_text)
+        c.drawString(card.content_x, card.y + 0.3 * cm, card.meta_text)
 
     def draw_catalog_header(self, c, page_num, total_pages, titre="Catalogue", sous_titre="", is_cover=False):
         # Ne pas afficher le header sur la couverture
@@ -720,15 +417,49 @@ class CatalogDesigner:
         # Utiliser la nouvelle fonction de bandeau avec la couleur principale configurée
         page_width, page_height = A4
         draw_header_banner_two_lines_with_color(c, page_width, page_height, titre, sous_titre, self.config["primary_color"])
+        self.draw_page_number(c, page_num)
 
+    def draw_page_number(self, c, page_num):
         # Numéro de page centré en bas de page en noir (commencer à 2)
         c.setFillColor(colors.black)
         c.setFont("Helvetica", 10)
         c.drawCentredString(21 * cm / 2, 1 * cm, f"Page {page_num + 1}")
 
-def generate_modern_catalog(products, filename="catalog_modern.pdf", titre="Catalogue", sous_titre="", logo_path=None, cover_path=None, products_per_page=4, bg_color="#F0F0F0", primary_color="#1976d2", return_bytes=False):
+    def define_page_chrome(self, c, titre="Catalogue", sous_titre="", bg_color="#F0F0F0"):
+        """Décor commun des pages produits (fond, bandeau, filigrane) en formulaire PDF
+
+        Défini une fois par document ; chaque page y fait référence (doForm) et
+        ne dessine elle-même que son numéro et ses cartes.
+        """
+        page_width, page_height = A4
+        c.beginForm(PAGE_CHROME_FORM)
+        c.setFillColor(colors.HexColor(bg_color))
+        c.rect(0, 0, page_width, page_height, fill=1, stroke=0)
+        draw_header_banner_two_lines_with_color(c, page_width, page_height, titre, sous_titre, self.config["primary_color"])
+        draw_snapcatalog_filigrane(c, 2, A4)  # identique sur toutes les pages produits
+        c.endForm()
+
+    def use_page_chrome(self, c, titre="Catalogue", sous_titre="", bg_color="#F0F0F0"):
+        """Définit le décor sur le canvas, et sur chaque fichier partiel d'un SpillingCanvas"""
+        if isinstance(c, SpillingCanvas):
+            c.add_setup_hook(lambda part: self.define_page_chrome(part, titre, sous_titre, bg_color))
+        else:
+            self.define_page_chrome(c, titre, sous_titre, bg_color)
+
+def _log_image_report(image_registry, report=None):
+    """Affiche (et recopie dans report) les statistiques de déduplication des images"""
+    stats = image_registry.report()
+    print(f"[IMAGES] {stats['images_drawn']} images dessinées, {stats['unique_images']} intégrées, "
+          f"{stats['bytes_saved'] / 1024:.0f} Ko économisés par déduplication")
+    if report is not None:
+        report.update(stats)
+
+def generate_modern_catalog(products, filename="catalog_modern.pdf", titre="Catalogue", sous_titre="", logo_path=None, cover_path=None, products_per_page=4, bg_color="#F0F0F0", primary_color="#1976d2", return_bytes=False, image_dpi=300, image_quality=95, report=None):
     print(f"[DEBUT] - {len(products)} produits")
+    prune_prepared_cache()
+    products = _with_price_display(products)
     designer = CatalogDesigner("modern", primary_color)
+    image_registry = DocumentImageRegistry(image_dpi, image_quality)
     
     if return_bytes:
         # Génération en mémoire
@@ -742,108 +473,35 @@ def generate_modern_catalog(products, filename="catalog_modern.pdf", titre="Cata
     
     # Couverture (sans fond coloré)
     print("[PAGE] Génération de la couverture...")
-    draw_modern_cover(c, titre, sous_titre, logo_path, cover_path)
+    draw_modern_cover(c, titre, sous_titre, logo_path, cover_path, image_dpi, image_quality)
     print("[OK] Couverture OK")
     draw_snapcatalog_filigrane(c, 1, A4)  # Page 1 (couverture)
     c.showPage()
 
-    # Produits
-    page_width, page_height = A4
+    # Produits : mise en page complète avant le dessin
+    layout = layout_catalog(products, products_per_page, _price_display)
+    geometry = layout.geometry
     current_page = 1
-    total_pages = (len(products) + products_per_page - 1) // products_per_page
+    designer.use_page_chrome(c, titre, sous_titre, bg_color)
 
     print(f"[PROG] Progression: 0% - Début du traitement des {len(products)} produits")
+    print(f"[LAYOUT] {layout.page_count} pages, cartes {geometry.card_width/cm:.1f}x{geometry.card_height/cm:.1f}cm "
+          f"({products_per_page} par page, aire utile {geometry.available_height/cm:.1f}cm)")
 
-    # Utiliser la même logique améliorée que generate_modern_catalog_with_progress
-    def paint_page_background():
-        c.setFillColor(colors.HexColor(bg_color))
-        c.rect(0, 0, page_width, page_height, fill=1, stroke=0)
+    def report_progress(card):
+        progress = int((card.index / max(1, len(products))) * 100)
+        print(f"[PROD] Produit {card.index + 1}/{len(products)} ({progress}%): {card.label}")
 
-    # Marges et paramètres d'empilement (comme dans la version améliorée)
-    left_margin = right_margin = 1.20 * cm
-    top_margin = 3.0 * cm      # un peu plus haut pour l'en-tête
-    bottom_margin = 2.0 * cm
-    GAP = 0.5 * cm             # écart fixe entre cartes
-
-    # Aire utile verticale
-    available_height = page_height - top_margin - bottom_margin
-
-    # Hauteur de carte: au moins 6.5 cm, sinon calculée pour tenir avec les gaps
-    if products_per_page > 0:
-        card_height_auto = (available_height - (products_per_page - 1) * GAP) / products_per_page
-        # FIXÉ: Suppression du minimum de 6.5cm qui causait les débordements
-        card_height = card_height_auto
-        # Sécurité: ne pas dépasser l'aire utile
-        card_height = min(card_height, available_height)
-    else:
-        card_height = 6.5 * cm  # fallback
-
-    card_width = page_width - left_margin - right_margin
-
-    # DEBUG: Afficher les calculs de hauteur
-    print(f"[DEBUG] Calculs de hauteur:")
-    print(f"  - page_height: {page_height/cm:.1f}cm")
-    print(f"  - top_margin: {top_margin/cm:.1f}cm")
-    print(f"  - bottom_margin: {bottom_margin/cm:.1f}cm")
-    print(f"  - available_height: {available_height/cm:.1f}cm")
-    print(f"  - products_per_page: {products_per_page}")
-    print(f"  - GAP: {GAP/cm:.1f}cm")
-    print(f"  - card_height_auto: {card_height_auto/cm:.1f}cm")
-    print(f"  - card_height_final: {card_height/cm:.1f}cm")
-    
-    # Vérification: est-ce que products_per_page cartes rentrent vraiment ?
-    total_needed = products_per_page * card_height + (products_per_page - 1) * GAP
-    print(f"  - Espace total nécessaire pour {products_per_page} cartes: {total_needed/cm:.1f}cm")
-    print(f"  - Espace disponible: {available_height/cm:.1f}cm")
-    print(f"  - Marge restante: {(available_height - total_needed)/cm:.1f}cm")
-
-    # Dessine en haut -> bas. y attendu par draw_product_card_premium = bas de la carte
-    def y_bottom_for_index_on_page(index_on_page: int) -> float:
-        y_top = page_height - top_margin
-        return y_top - index_on_page * (card_height + GAP) - card_height
-
-    for i, product in enumerate(products):
-        progress = int((i / max(1, len(products))) * 100)
-        print(f"[PROD] Produit {i + 1}/{len(products)} ({progress}%): {product.get('title', product.get('TITRE', 'NO NAME'))[:50]}")
-
-        # Début d'une nouvelle page produits ? (logique corrigée)
-        if i % products_per_page == 0:
-            if i > 0:
-                # Finir la page précédente, passer à la suivante
-                # Ajouter le filigrane avant de changer de page
-                draw_snapcatalog_filigrane(c, current_page + 1, A4)
-                c.showPage()
-                paint_page_background()
-                current_page += 1
-            # En-tête + filigrane de la page produits courante
-            designer.draw_catalog_header(c, current_page, total_pages, titre, sous_titre)
-
-        index_on_page = i % products_per_page
-        x = left_margin
-        y = y_bottom_for_index_on_page(index_on_page)
-
-        # Sécurité: si jamais ça déborde (ne devrait pas avec le calcul), on force un saut de page
-        if y < bottom_margin:
-            # Ajouter le filigrane avant de changer de page
-            draw_snapcatalog_filigrane(c, current_page + 1, A4)
+    for page in layout.pages:
+        if page.number > 1:
+            # Finir la page précédente, passer à la suivante
             c.showPage()
-            paint_page_background()
-            current_page += 1
-            designer.draw_catalog_header(c, current_page, total_pages, titre, sous_titre)
-            index_on_page = 0
-            y = y_bottom_for_index_on_page(index_on_page)
-
-        # Dessin de la carte
-        designer.draw_product_card_premium(
-            c, product, x, y,
-            width=card_width, height=card_height,
-            product_index=i,
-            image_dpi=image_dpi,      # ✅ Transmettre le DPI
-            image_quality=image_quality  # ✅ Transmettre la qualité
-        )
+        current_page = page.number
+        _paint_product_page(c, page, designer, image_registry, image_dpi, image_quality, on_card=report_progress)
 
     # Ajouter le filigrane sur la dernière page
     draw_snapcatalog_filigrane(c, current_page + 1, A4)
+    _log_image_report(image_registry, report)
     print("[SAVE] Sauvegarde du PDF...")
     c.save()
     print("[OK] FINI ! - 100%")
@@ -854,145 +512,428 @@ def generate_modern_catalog(products, filename="catalog_modern.pdf", titre="Cata
     else:
         return filename
 
+def _paint_product_page(c, page, designer, image_registry, image_dpi=300, image_quality=95, on_card=None):
+    """Dessine une page produits mise en page (décor, numéro de page, cartes)
+
+    Le décor (fond, bandeau, filigrane) est le formulaire défini par
+    CatalogDesigner.use_page_chrome sur ce canvas.
+    on_card: appelé avec chaque carte avant son dessin (progression)
+    """
+    c.doForm(PAGE_CHROME_FORM)
+    designer.draw_page_number(c, page.number)
+
+    for card in page.cards:
+        if on_card:
+            on_card(card)
+        designer.paint_card(c, card, image_dpi, image_quality, image_registry)
+
+def _draw_product_pages(c, products, designer, image_registry, titre="Catalogue", sous_titre="",
+                        products_per_page=4, bg_color="#F0F0F0", image_dpi=300, image_quality=95,
+                        progress_callback=None, first_index=0, total_products=None, is_last_part=True,
+                        define_chrome=True):
+    """Dessine les pages produits à partir de la page courante du canvas
+
+    first_index: index global du premier produit (rendu par parties) ; multiple de
+    products_per_page pour que numéros de page et filigrane restent continus.
+    total_products: nombre total de produits du catalogue (défaut: len(products))
+    is_last_part: filigrane de fin sur la dernière page (comme le rendu en un bloc)
+    define_chrome: définir le décor sur le canvas (False s'il l'est déjà : fenêtres suivantes d'un flux)
+    """
+    total_products = len(products) if total_products is None else total_products
+    layout = layout_catalog(products, products_per_page, _price_display,
+                            first_index=first_index, total_products=total_products)
+
+    # Pagination (1 = couverture)
+    current_page = 1 + first_index // max(1, products_per_page)
+    if define_chrome:
+        designer.use_page_chrome(c, titre, sous_titre, bg_color)
+
+    if first_index == 0:
+        print(f"[PROG] Progression: 0% - Début du traitement des {total_products} produits "
+              f"({layout.page_count} pages)")
+
+    def report_progress(card):
+        i = card.index
+        progress = int((i / max(1, total_products)) * 100)
+        print(f"[PROD] Produit {i + 1}/{total_products} ({progress}%): {card.label}")
+        if progress_callback:
+            progress_callback(i + 1, total_products, 1.0)
+
+            # Affichage des étapes intermédiaires
+            if i == 0:
+                print(f"[PROG] 🚀 Début du traitement des produits - 0%")
+            elif i == total_products // 4:
+                print(f"[PROG] 📦 25% des produits traités")
+            elif i == total_products // 2:
+                print(f"[PROG] ⚡ 50% des produits traités")
+            elif i == 3 * total_products // 4:
+                print(f"[PROG] 🔥 75% des produits traités")
+            elif i == total_products - 1:
+                print(f"[PROG] 🏁 Dernier produit en cours...")
+
+    if not layout.pages:
+        # Aucun produit : page produits vide (fond seul)
+        c.setFillColor(colors.HexColor(bg_color))
+        c.rect(0, 0, A4[0], A4[1], fill=1, stroke=0)
+
+    for n, page in enumerate(layout.pages):
+        if n > 0:
+            # Finir la page précédente, passer à la suivante
+            c.showPage()
+        current_page = page.number
+        _paint_product_page(c, page, designer, image_registry, image_dpi, image_quality, on_card=report_progress)
+
+    # Filigrane de la dernière page produits
+    if is_last_part:
+        draw_snapcatalog_filigrane(c, current_page + 1, A4)
+    return current_page
+
+# Rendu parallèle : pages minimum par partie (en deçà, le coût des processus domine)
+RENDER_PART_MIN_PAGES = 4
+
+# Produits par fenêtre de rendu d'un flux de produits (utils.product_stream)
+STREAM_WINDOW_PRODUCTS = 2000
+
+
+def _product_windows(products, products_per_page, formats, size=None):
+    """Fenêtres de produits alignées sur les pages : (index du premier, produits, dernière ?)
+
+    Une liste forme une seule fenêtre (sauf size) ; un flux de produits est lu
+    fenêtre par fenêtre, une seule d'avance. Le prix affiché est calculé par
+    fenêtre avec les conventions de colonne partagées (formats).
+    """
+    per_page = max(1, products_per_page)
+    if size is None:
+        size = len(products) if isinstance(products, Sequence) else STREAM_WINDOW_PRODUCTS
+    size = max(per_page, size // per_page * per_page)
+    iterator = iter(products)
+    window = list(islice(iterator, size))
+    if not window:
+        yield 0, [], True
+        return
+    start = 0
+    while window:
+        following = list(islice(iterator, size))
+        yield start, _with_price_display(window, formats), not following
+        start += len(window)
+        window = following
+
+
+def _new_canvas(target, spill_pages=SPILL_PAGES):
+    """Canvas A4 ; avec spill_pages > 0, les pages terminées sont vidées sur disque"""
+    if spill_pages:
+        return SpillingCanvas(target, pagesize=A4, pages_per_spill=spill_pages)
+    return canvas.Canvas(target, pagesize=A4)
+
+
+def _render_part(path, products, first_index, total_products, options, cover=False, is_last_part=False):
+    """Rend une partie du catalogue dans un fichier PDF (processus de travail)
+
+    cover=True : la partie ne contient que la couverture.
+    Retourne les statistiques d'images de la partie.
+    """
+    designer = CatalogDesigner("modern", options["primary_color"])
+    image_registry = DocumentImageRegistry(options["image_dpi"], options["image_quality"])
+    c = _new_canvas(path, options["spill_pages"])
+    if cover:
+        draw_modern_cover(c, options["titre"], options["sous_titre"], options["logo_path"], options["cover_path"],
+                          options["image_dpi"], options["image_quality"])
+        draw_snapcatalog_filigrane(c, 1, A4)
+        c.showPage()
+    else:
+        _draw_product_pages(
+            c, products, designer, image_registry,
+            titre=options["titre"], sous_titre=options["sous_titre"],
+            products_per_page=options["products_per_page"], bg_color=options["bg_color"],
+            image_dpi=options["image_dpi"], image_quality=options["image_quality"],
+            first_index=first_index, total_products=total_products, is_last_part=is_last_part
+        )
+    c.save()
+    return image_registry.report()
+
+
+def _generate_catalog_parallel(products, output, workers, options, progress_callback=None, report=None):
+    """Rend le catalogue par parties alignées sur les pages, dans un pool de processus
+
+    La couverture forme sa propre partie ; chaque partie produits connaît l'index
+    global de son premier produit (numéros de page, filigrane, images locales).
+    Les parties sont ensuite fusionnées en flux dans output (chemin ou fichier binaire).
+    Un flux de produits est lu partie par partie : au plus 2 parties en attente par processus.
+    """
+    per_page = max(1, options["products_per_page"])
+    total = len(products)
+    total_pages = math.ceil(total / per_page)
+    # ~2 parties par processus pour lisser les écarts de durée entre parties
+    part_pages = max(RENDER_PART_MIN_PAGES, math.ceil(total_pages / (workers * 2)))
+    step = part_pages * per_page
+    starts = list(range(0, total, step))
+    print(f"[PARALLELE] {len(starts)} parties de {part_pages} pages sur {workers} processus")
+
+    with tempfile.TemporaryDirectory(prefix="snapcatalog_parts_") as tmp:
+        # Parties réellement rendues (un flux peut en produire moins que prévu d'après sa longueur)
+        paths = [os.path.join(tmp, "part_0000.pdf")]
+        stats = []
+        done = 0
+
+        def collect(finished):
+            nonlocal done
+            for fut in finished:
+                stats.append(fut.result())
+                count = futures.pop(fut)
+                done += count
+                if progress_callback and count:
+                    progress_callback(done, total, 1.0)
+                    print(f"[PROG] {done}/{total} produits rendus")
+
+        # spawn : pas de fork d'un processus multi-thread (Streamlit)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            futures = {pool.submit(_render_part, paths[0], [], 0, total, options, cover=True): 0}
+            windows = _product_windows(products, per_page, {}, step)
+            for n, (start, chunk, is_last) in enumerate(windows, 1):
+                if not chunk:
+                    continue
+                paths.append(os.path.join(tmp, f"part_{n:04d}.pdf"))
+                fut = pool.submit(_render_part, paths[-1], chunk, start, total, options, is_last_part=is_last)
+                futures[fut] = len(chunk)
+                if len(futures) >= 2 * workers:
+                    collect(wait(futures, return_when=FIRST_COMPLETED).done)
+            collect(list(as_completed(futures)))
+
+        if progress_callback:
+            progress_callback(total + 1, total, 1.0)
+            print(f"[PROG] 🔧 Fusion des {len(paths)} parties...")
+        pages = merge_pdfs(paths, output)
+
+    merged = {key: sum(s[key] for s in stats) for key in stats[0]}
+    print(f"[IMAGES] {merged['images_drawn']} images dessinées, {merged['unique_images']} intégrées, "
+          f"{merged['bytes_saved'] / 1024:.0f} Ko économisés par déduplication")
+    print(f"[OK] FINI ! - {pages} pages")
+    if report is not None:
+        report.update(merged)
+        report.update({"render_workers": workers, "render_parts": len(paths)})
+    return output
+
+def _render_cover_fragment(key, options):
+    """Rend la couverture seule dans le cache des pages"""
+    path = fragment_path(key)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-", suffix=".pdf")
+    os.close(fd)
+    try:
+        c = canvas.Canvas(tmp_path, pagesize=A4)
+        draw_modern_cover(c, options["titre"], options["sous_titre"], options["logo_path"], options["cover_path"],
+                          options["image_dpi"], options["image_quality"])
+        draw_snapcatalog_filigrane(c, 1, A4)
+        c.showPage()
+        c.save()
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _render_page_fragments(jobs, options, on_page=None):
+    """Rend des pages produits, chacune dans son fragment du cache (processus de travail possible)
+
+    jobs: [(clé, PageLayout, dernière page ?)]
+    on_page: appelé avec chaque page rendue (progression)
+    Retourne les statistiques d'images des pages rendues.
+    """
+    designer = CatalogDesigner("modern", options["primary_color"])
+    image_registry = DocumentImageRegistry(options["image_dpi"], options["image_quality"])
+    for key, page, is_last in jobs:
+        path = fragment_path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-", suffix=".pdf")
+        os.close(fd)
+        try:
+            c = canvas.Canvas(tmp_path, pagesize=A4)
+            designer.use_page_chrome(c, options["titre"], options["sous_titre"], options["bg_color"])
+            _paint_product_page(c, page, designer, image_registry, options["image_dpi"], options["image_quality"])
+            if is_last:
+                # Filigrane de fin, comme le rendu en un bloc
+                draw_snapcatalog_filigrane(c, page.number + 1, A4)
+            c.showPage()
+            c.save()
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if on_page:
+            on_page(page)
+    return image_registry.report()
+
+
+def _generate_catalog_incremental(products, output, workers, options, progress_callback=None, report=None):
+    """Assemble le catalogue à partir des pages en cache ; seules les pages modifiées sont redessinées
+
+    Chaque page a une clé (pdf.page_cache) ; les pages absentes du cache sont rendues
+    dans leur fragment (en parallèle si workers > 1), puis tous les fragments sont
+    fusionnés en flux dans output (chemin ou fichier binaire). Un flux de produits
+    est mis en page et rendu fenêtre par fenêtre ; seules les clés des pages restent.
+    """
+    prune_page_cache()
+    total = len(products)
+    cover = cover_key(options)
+    if cover in missing_keys([cover]):
+        _render_cover_fragment(cover, options)
+
+    keys = []
+    rendered = 0
+    done = 0
+    stats = []
+    pool = None
+
+    def page_done(page):
+        nonlocal done
+        done += len(page.cards)
+        if progress_callback:
+            progress_callback(done, total, 1.0)
+        print(f"[PROG] {done}/{total} produits rendus")
+
+    try:
+        for start, window, is_last in _product_windows(products, options["products_per_page"], {}):
+            layout = layout_catalog(window, options["products_per_page"], _price_display,
+                                    first_index=start, total_products=total)
+            last = len(layout.pages) - 1 if is_last else -1
+            jobs = [(page_key(page, options, n == last), page, n == last)
+                    for n, page in enumerate(layout.pages)]
+            keys.extend(key for key, _, _ in jobs)
+            missing = missing_keys([key for key, _, _ in jobs])
+            todo = [job for job in jobs if job[0] in missing]
+            rendered += len(todo)
+
+            # Progression : les produits des pages en cache sont déjà faits
+            done += len(window) - sum(len(page.cards) for _, page, _ in todo)
+
+            parts = min(workers * 2, math.ceil(len(todo) / RENDER_PART_MIN_PAGES))
+            if workers > 1 and parts > 1:
+                step = math.ceil(len(todo) / parts)
+                if pool is None:
+                    # spawn : pas de fork d'un processus multi-thread (Streamlit)
+                    pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+                futures = {pool.submit(_render_page_fragments, todo[k:k + step], options):
+                           todo[k:k + step] for k in range(0, len(todo), step)}
+                for fut in as_completed(futures):
+                    stats.append(fut.result())
+                    for _, page, _ in futures[fut]:
+                        page_done(page)
+            elif todo:
+                stats.append(_render_page_fragments(todo, options, on_page=page_done))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    print(f"[CACHE] {len(keys) - rendered}/{len(keys)} pages produits réutilisées, {rendered} dessinées "
+          f"({len(keys) + 1} pages)")
+
+    if progress_callback:
+        progress_callback(total + 1, total, 1.0)
+        print(f"[PROG] 🔧 Assemblage des {len(keys) + 1} pages...")
+    pages = merge_pdfs([fragment_path(cover)] + [fragment_path(key) for key in keys], output)
+
+    merged = {key: sum(s[key] for s in stats) for key in stats[0]} if stats else \
+        {"images_drawn": 0, "unique_images": 0, "duplicates": 0, "bytes_saved": 0}
+    print(f"[OK] FINI ! - {pages} pages ({rendered} redessinées)")
+    if report is not None:
+        report.update(merged)
+        report.update({"pages_cached": len(keys) - rendered, "pages_rendered": rendered})
+    return output
+
 def generate_modern_catalog_with_progress(
     products, filename="catalog_modern.pdf", titre="Catalogue", sous_titre="",
     logo_path=None, cover_path=None, progress_callback=None,
     products_per_page=4, bg_color="#F0F0F0", primary_color="#1976d2", 
-    return_bytes=False, image_dpi=300, image_quality=95  # ✅ AJOUTEZ CES PARAMÈTRES
+    return_bytes=False, image_dpi=300, image_quality=95,  # ✅ AJOUTEZ CES PARAMÈTRES
+    report=None, workers=1, spill_pages=SPILL_PAGES, page_cache=False
 ):
-    """Version avec progression détaillée pour l'interface Streamlit"""
+    """Version avec progression détaillée pour l'interface Streamlit
+
+    products: liste de produits, ou flux de produits de longueur connue
+        (utils.product_stream.ProductStream) lu par fenêtres au fil du rendu
+    report: dict optionnel complété avec les statistiques de génération
+    workers: processus de rendu ; au-delà de 1, les gros catalogues sont rendus
+        par parties en parallèle puis fusionnés
+    spill_pages: pages gardées en mémoire avant écriture sur disque (0 = tout en mémoire)
+    page_cache: régénération incrémentale, seules les pages modifiées depuis un
+        rendu précédent sont redessinées (pages en cache disque)
+    """
+    if return_bytes and (spill_pages or workers > 1 or page_cache):
+        # Rendu vers un fichier temporaire lu une seule fois (pas de BytesIO + copie getvalue)
+        fd, tmp_path = tempfile.mkstemp(prefix="snapcatalog_", suffix=".pdf")
+        os.close(fd)
+        try:
+            generate_modern_catalog_with_progress(
+                products, filename=tmp_path, titre=titre, sous_titre=sous_titre,
+                logo_path=logo_path, cover_path=cover_path, progress_callback=progress_callback,
+                products_per_page=products_per_page, bg_color=bg_color, primary_color=primary_color,
+                return_bytes=False, image_dpi=image_dpi, image_quality=image_quality,
+                report=report, workers=workers, spill_pages=spill_pages, page_cache=page_cache
+            )
+            with open(tmp_path, "rb") as f:
+                return f.read()
+        finally:
+            os.remove(tmp_path)
+
     print(f"🎨 [PDF_DESIGNER] Paramètres reçus: DPI={image_dpi}, Quality={image_quality}")
     print(f"[DEBUT] - {len(products)} produits")
+    prune_prepared_cache()
+    if isinstance(products, Sequence):
+        products = _with_price_display(products)
+
+    options = dict(
+        titre=titre, sous_titre=sous_titre, logo_path=logo_path, cover_path=cover_path,
+        products_per_page=products_per_page, bg_color=bg_color, primary_color=primary_color,
+        image_dpi=image_dpi, image_quality=image_quality, spill_pages=spill_pages
+    )
+    if page_cache and products:
+        _generate_catalog_incremental(products, filename, workers, options, progress_callback, report)
+        return filename
+
+    if workers > 1 and len(products) > RENDER_PART_MIN_PAGES * max(1, products_per_page):
+        _generate_catalog_parallel(products, filename, workers, options, progress_callback, report)
+        return filename
+
     designer = CatalogDesigner("modern", primary_color)
+    image_registry = DocumentImageRegistry(image_dpi, image_quality)
 
-    # Canvas: mémoire ou fichier
+    # Canvas: mémoire ou fichier (pages vidées sur disque au fil du rendu)
     if return_bytes:
         from io import BytesIO
         buffer = BytesIO()
-        c = canvas.Canvas(buffer, pagesize=A4)
+        c = _new_canvas(buffer, spill_pages)
     else:
-        c = canvas.Canvas(filename, pagesize=A4)
+        c = _new_canvas(filename, spill_pages)
     print("[OK] Canvas créé")
 
     # 1) Couverture
     print("[PAGE] Génération de la couverture...")
-    draw_modern_cover(c, titre, sous_titre, logo_path, cover_path)
+    draw_modern_cover(c, titre, sous_titre, logo_path, cover_path, image_dpi, image_quality)
     print("[OK] Couverture OK")
     # Filigrane de la page 1 (couverture)
     draw_snapcatalog_filigrane(c, 1, A4)
     # Passe à la première page produits
     c.showPage()
 
-    # 2) Fond de page produits (appliqué page par page)
-    page_width, page_height = A4
-    def paint_page_background():
-        c.setFillColor(colors.HexColor(bg_color))
-        c.rect(0, 0, page_width, page_height, fill=1, stroke=0)
-
-    paint_page_background()
-
-    # Marges et paramètres d'empilement
-    left_margin = right_margin = 1.20 * cm
-    top_margin = 3.0 * cm      # un peu plus haut pour l'en-tête
-    bottom_margin = 2.0 * cm
-    GAP = 0.5 * cm             # écart fixe entre cartes
-
-    # Aire utile verticale
-    available_height = page_height - top_margin - bottom_margin
-
-    # Hauteur de carte: au moins 6.5 cm, sinon calculée pour tenir avec les gaps
-    if products_per_page > 0:
-        card_height_auto = (available_height - (products_per_page - 1) * GAP) / products_per_page
-        # FIXÉ: Suppression du minimum de 6.5cm qui causait les débordements
-        card_height = card_height_auto
-        # Sécurité: ne pas dépasser l'aire utile
-        card_height = min(card_height, available_height)
-    else:
-        card_height = 6.5 * cm  # fallback
-
-    card_width = page_width - left_margin - right_margin
-
-    # Pagination
-    current_page = 1  # 1 = couverture
-    total_pages = (len(products) + products_per_page - 1) // max(1, products_per_page)
-
-    print(f"[PROG] Progression: 0% - Début du traitement des {len(products)} produits")
-
-    # Dessine en haut -> bas. y attendu par draw_product_card_premium = bas de la carte
-    def y_bottom_for_index_on_page(index_on_page: int) -> float:
-        y_top = page_height - top_margin
-        return y_top - index_on_page * (card_height + GAP) - card_height
-
-    for i, product in enumerate(products):
-        # Progress callback amélioré avec plus de détails
-        if progress_callback:
-            # Appel du callback avec progression détaillée
-            progress_callback(i + 1, len(products), 1.0)
-            
-            # Affichage console détaillé
-            progress = int((i / max(1, len(products))) * 100)
-            print(f"[PROD] Produit {i + 1}/{len(products)} ({progress}%): {product.get('title', product.get('TITRE', 'NO NAME'))[:50]}")
-            
-            # Affichage des étapes intermédiaires
-            if i == 0:
-                print(f"[PROG] 🚀 Début du traitement des produits - 0%")
-            elif i == len(products) // 4:
-                print(f"[PROG] 📦 25% des produits traités")
-            elif i == len(products) // 2:
-                print(f"[PROG] ⚡ 50% des produits traités")
-            elif i == 3 * len(products) // 4:
-                print(f"[PROG] 🔥 75% des produits traités")
-            elif i == len(products) - 1:
-                print(f"[PROG] 🏁 Dernier produit en cours...")
-        else:
-            # Affichage console simple si pas de callback
-            progress = int((i / max(1, len(products))) * 100)
-            print(f"[PROD] Produit {i + 1}/{len(products)} ({progress}%): {product.get('title', product.get('TITRE', 'NO NAME'))[:50]}")
-
-        # Début d'une nouvelle page produits ?
-        if i % products_per_page == 0:
-            if i > 0:
-                # Finir la page précédente, passer à la suivante
-                c.showPage()
-                paint_page_background()
-                current_page += 1
-
-            # En-tête + filigrane de la page produits courante
-            designer.draw_catalog_header(c, current_page, total_pages, titre, sous_titre)
-            # current_page + 1 car current_page compte depuis la couverture
-            draw_snapcatalog_filigrane(c, current_page + 1, A4)
-
-        index_on_page = i % products_per_page
-        x = left_margin
-        y = y_bottom_for_index_on_page(index_on_page)
-
-        # Sécurité: si jamais ça déborde (ne devrait pas avec le calcul), on force un saut de page
-        if y < bottom_margin:
+    # 2) Pages produits (par fenêtres pour un flux de produits)
+    total = len(products)
+    for start, window, is_last in _product_windows(products, products_per_page, {}):
+        if start:
             c.showPage()
-            paint_page_background()
-            current_page += 1
-            designer.draw_catalog_header(c, current_page, total_pages, titre, sous_titre)
-            draw_snapcatalog_filigrane(c, current_page + 1, A4)
-            index_on_page = 0
-            y = y_bottom_for_index_on_page(index_on_page)
-
-        # Dessin de la carte
-        designer.draw_product_card_premium(
-            c, product, x, y,
-            width=card_width, height=card_height,
-            product_index=i,
-            image_dpi=image_dpi,      # ✅ Transmettre le DPI
-            image_quality=image_quality  # ✅ Transmettre la qualité
+        _draw_product_pages(
+            c, window, designer, image_registry,
+            titre=titre, sous_titre=sous_titre,
+            products_per_page=products_per_page, bg_color=bg_color,
+            image_dpi=image_dpi, image_quality=image_quality,
+            progress_callback=progress_callback,
+            first_index=start, total_products=total, is_last_part=is_last, define_chrome=not start
         )
 
-    # Filigrane de la dernière page produits
-    draw_snapcatalog_filigrane(c, current_page + 1, A4)
-
     # Progression finale avec callback
     if progress_callback:
         progress_callback(len(products) + 1, len(products), 1.0)  # Étape de finalisation
         print(f"[PROG] 🔧 Finalisation du PDF...")
 
+    _log_image_report(image_registry, report)
     print("[SAVE] Sauvegarde du PDF...")
     c.save()
     print("[OK] FINI ! - 100%")
@@ -1006,13 +947,14 @@ def generate_modern_catalog_with_progress(
 def generate_pdf_with_quality(
     products, filename="catalog_modern.pdf", titre="Catalogue", sous_titre="",
     logo_path=None, cover_path=None, quality="hd", products_per_page=4, 
-    bg_color="#F0F0F0", primary_color="#1976d2", output="file", progress_callback=None
+    bg_color="#F0F0F0", primary_color="#1976d2", output="file", progress_callback=None,
+    report=None, workers=1, page_cache=False
 ):
     """
     Génère un catalogue PDF avec différentes qualités d'image
     
     Args:
-        products: Liste des produits
+        products: Liste des produits (ou flux de produits, voir generate_modern_catalog_with_progress)
         filename: Nom du fichier de sortie
         titre: Titre du catalogue
         sous_titre: Sous-titre du catalogue
@@ -1024,19 +966,16 @@ def generate_pdf_with_quality(
         primary_color: Couleur principale
         output: Type de sortie ('file' ou 'bytes')
         progress_callback: Callback pour la progression (current, total, stage_percent)
+        report: dict optionnel complété avec les statistiques de génération
+        workers: processus de rendu (rendu parallèle par parties si > 1)
+        page_cache: ne redessiner que les pages modifiées depuis le dernier rendu
     
     Returns:
         Chemin du fichier ou bytes selon output
     """
     
     # Configuration de la qualité
-    quality_config = {
-        'hd': {'dpi': 300, 'image_quality': 95},
-        'medium': {'dpi': 150, 'image_quality': 75}, 
-        'bd': {'dpi': 72, 'image_quality': 50}
-    }
-    
-    config = quality_config.get(quality, quality_config['hd'])
+    config = QUALITY_TIERS.get(quality, QUALITY_TIERS['hd'])
     print(f"[QUALITE] Génération en qualité {quality.upper()}")
     print(f"[CONFIG] DPI: {config['dpi']}, Quality: {config['image_quality']}")
     
@@ -1057,5 +996,8 @@ def generate_pdf_with_quality(
         progress_callback=progress_callback,  # ✅ Transmettre le callback de progression
         # ✅ AJOUTEZ CES LIGNES :
         image_dpi=config['dpi'],
-        image_quality=config['image_quality']
+        image_quality=config['image_quality'],
+        report=report,
+        workers=workers,
+        page_cache=page_cache
     )
\ No newline at end of file
@@ -0,0 +1,50 @@
+# tests/test_csv_sniffer.py
+"""Détection du format et lecture des CSV irréguliers (utils.csv_sniffer)"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from utils import csv_sniffer
+from utils.csv_sniffer import read_csv_sniffed, sniff_csv
+
+RAGGED = b"TITRE,DESCRIPTION,PRIX,IMAGE 1,IMAGE 2\np0,d,1,u\np1,d,2,u\np2,d,3,u\n"
+TRAILING = b"a,b,c\n1,2,3,\n4,5,6,\n7,8,9,\n"
+
+
+@pytest.fixture(params=[True, False], ids=["pyarrow", "moteur C"])
+def engines(request, monkeypatch):
+    if request.param and not csv_sniffer.HAVE_PYARROW:
+        pytest.skip("pyarrow non installé")
+    monkeypatch.setattr(csv_sniffer, "HAVE_PYARROW", request.param)
+
+
+def test_ragged_rows_keep_header_and_all_products(engines):
+    assert sniff_csv(RAGGED).skiprows == 0
+    df, _ = read_csv_sniffed(RAGGED)
+    assert list(df.columns) == ["TITRE", "DESCRIPTION", "PRIX", "IMAGE 1", "IMAGE 2"]
+    assert df["TITRE"].tolist() == ["p0", "p1", "p2"]
+    assert df["IMAGE 2"].isna().all()
+
+
+def test_trailing_delimiter_keeps_header(engines):
+    dialect = sniff_csv(TRAILING)
+    assert dialect.skiprows == 0 and dialect.trailing_delimiter
+    df, _ = read_csv_sniffed(TRAILING)
+    assert list(df.columns) == ["a", "b", "c"]
+    assert df.to_numpy().tolist() == [[1, 2, 3], [4, 5, 6], [7, 8, 9]]
+
+
+def test_preamble_is_skipped(engines):
+    data = b"Export boutique\n\nTITRE;PRIX\nA;1\nB;2\n"
+    assert sniff_csv(data).skiprows == 2
+    df, _ = read_csv_sniffed(data)
+    assert list(df.columns) == ["TITRE", "PRIX"] and len(df) == 2
+
+
+def test_excel_sep_line(engines):
+    df, dialect = read_csv_sniffed(b"sep=;\nTITRE;PRIX\nA;1\n")
+    assert dialect.delimiter == ";" and list(df.columns) == ["TITRE", "PRIX"]
@@ -0,0 +1,125 @@
+# tests/test_pdf_merge.py
+"""Fusion en flux des parties ReportLab (pdf.pdf_merge) et optimisation du PDF final (pdf.pdf_optimize)"""
+
+import os
+import sys
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from PIL import Image
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from pdf.pdf_merge import merge_pdfs
+from pdf.pdf_optimize import optimize_pdf, optimize_pdf_bytes
+
+PyPDF2 = pytest.importorskip("PyPDF2")
+
+PAGES_PER_PART = 3
+
+
+@pytest.fixture
+def parts(tmp_path):
+    """Trois parties de PAGES_PER_PART pages, même image et même police sur chaque page"""
+    image = BytesIO()
+    Image.new("RGB", (64, 48), (30, 120, 200)).save(image, format="JPEG")
+    paths = []
+    for n in range(3):
+        path = str(tmp_path / f"part_{n:04d}.pdf")
+        c = canvas.Canvas(path, pagesize=A4)
+        for k in range(PAGES_PER_PART):
+            c.setFont("Helvetica", 12)
+            c.drawString(72, 760, f"Page {n * PAGES_PER_PART + k + 1}")
+            c.drawImage(ImageReader(BytesIO(image.getvalue())), 72, 600, width=64, height=48)
+            c.showPage()
+        c.save()
+        paths.append(path)
+    return paths
+
+
+def read_strict(data: bytes):
+    return PyPDF2.PdfReader(BytesIO(data), strict=True)
+
+
+def page_texts(reader):
+    return [page.extract_text().strip() for page in reader.pages]
+
+
+def shared_objects(reader, kind: str):
+    """Numéros des objets distincts référencés par les ressources des pages (/XObject, /Font)"""
+    numbers = set()
+    for page in reader.pages:
+        resources = page["/Resources"].get_object()
+        for ref in resources[kind].get_object().values():
+            numbers.add(ref.idnum)
+    return numbers
+
+
+def merged(paths) -> bytes:
+    out = BytesIO()
+    assert merge_pdfs(paths, out) == len(paths) * PAGES_PER_PART
+    return out.getvalue()
+
+
+def test_merge_keeps_pages_in_order(parts):
+    reader = read_strict(merged(parts))
+    assert len(reader.pages) == 3 * PAGES_PER_PART
+    assert page_texts(reader) == [f"Page {k}" for k in range(1, 3 * PAGES_PER_PART + 1)]
+
+
+def test_merge_writes_shared_image_once(parts):
+    reader = read_strict(merged(parts))
+    assert len(shared_objects(reader, "/XObject")) == 1
+
+
+def test_merge_to_path(parts, tmp_path):
+    path = str(tmp_path / "catalogue.pdf")
+    assert merge_pdfs(parts[:2], path) == 2 * PAGES_PER_PART
+    with open(path, "rb") as f:
+        assert len(read_strict(f.read()).pages) == 2 * PAGES_PER_PART
+
+
+def test_merge_without_parts_fails(tmp_path):
+    with pytest.raises(ValueError):
+        merge_pdfs([], BytesIO())
+
+
+def test_optimized_merge_keeps_pages_and_text(parts):
+    data = merged(parts)
+    optimized, stats = optimize_pdf_bytes(data, min_gain=0)
+    assert not stats["skipped"] and stats["optimized_bytes"] == len(optimized) < len(data)
+    reader = read_strict(optimized)
+    assert len(reader.pages) == 3 * PAGES_PER_PART
+    assert page_texts(reader) == page_texts(read_strict(data))
+
+
+def test_optimize_writes_shared_fonts_and_images_once(parts):
+    data = merged(parts)
+    # Chaque partie apporte sa propre police : dédoublonnées par l'optimisation seulement
+    assert len(shared_objects(read_strict(data), "/Font")) == 3
+    optimized, stats = optimize_pdf_bytes(data, min_gain=0)
+    reader = read_strict(optimized)
+    assert stats["duplicates"] > 0
+    assert len(shared_objects(reader, "/Font")) == 1
+    assert len(shared_objects(reader, "/XObject")) == 1
+
+
+def test_optimize_to_path(parts, tmp_path):
+    source = str(tmp_path / "catalogue.pdf")
+    merge_pdfs(parts, source)
+    path = str(tmp_path / "optimise.pdf")
+    stats = optimize_pdf(source, path, min_gain=0)
+    with open(path, "rb") as f:
+        data = f.read()
+    assert len(data) == stats["optimized_bytes"]
+    assert len(read_strict(data).pages) == 3 * PAGES_PER_PART
+
+
+def test_low_gain_leaves_pdf_unchanged(parts):
+    with open(parts[0], "rb") as f:
+        data = f.read()
+    optimized, stats = optimize_pdf_bytes(data, min_gain=1.0)
+    assert stats["skipped"] and optimized is data
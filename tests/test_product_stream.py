@@ -0,0 +1,38 @@
+# tests/test_product_stream.py
+"""Lecture en flux des exports (utils.product_stream)"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.product_stream import ProductStream
+
+HEADER = b"TITRE,DESCRIPTION,PRIX\n"
+ROWS = [b"p%d,d,%d\n" % (i, i) for i in range(10)]
+# Ligne à trop de champs au milieu de l'export
+OVERLONG = HEADER + b"".join(ROWS[:3]) + b"bad,d,1,x,y\n" + b"".join(ROWS[3:])
+
+
+def _titles(stream):
+    return [product.title for product in stream]
+
+
+def test_overlong_line_skipped_like_the_count():
+    stream = ProductStream(OVERLONG, chunk_rows=4)
+    assert len(stream) == 10
+    assert _titles(stream) == [f"p{i}" for i in range(10)]
+
+
+def test_selected_columns_skip_the_same_lines():
+    stream = ProductStream(OVERLONG, chunk_rows=4).select(["TITRE", "PRIX"])
+    assert len(stream) == 10
+    frames = list(stream.frames())
+    assert all(list(frame.columns) == ["TITRE", "PRIX"] for frame in frames)
+    assert _titles(stream) == [f"p{i}" for i in range(10)]
+
+
+def test_limit_keeps_first_rows():
+    stream = ProductStream(OVERLONG, chunk_rows=4).select(["TITRE"], limit=5)
+    assert len(stream) == 5
+    assert _titles(stream) == [f"p{i}" for i in range(5)]
@@ -4,6 +4,9 @@ import pandas as pd
 import os
 from pathlib import Path
 from utils.data_processing import detect_csv_type
+from utils.csv_sniffer import read_csv_sniffed
+from utils.product_stream import STREAM_CHUNK_ROWS, STREAM_MIN_BYTES, ProductStream
+from utils.upload_cache import ParsedUpload, cached_upload, store_upload, upload_digest, upload_key
 
 class UploadHandler:
     """Gestionnaire des uploads et validation des fichiers"""
@@ -18,92 +21,46 @@ class UploadHandler:
         return uploaded_file
     
     @staticmethod
-    def validate_csv_file(uploaded_file):
-        """Valide et charge le fichier CSV avec gestion intelligente des délimiteurs"""
-        if uploaded_file is None:
-            return None, None
-            
-        try:
-            # D'abord, essayer la détection automatique de pandas
-            uploaded_file.seek(0)
-            df = pd.read_csv(uploaded_file, engine='python')
-            
-            if len(df) > 0 and len(df.columns) > 1:
-                csv_type = detect_csv_type(df)
-                st.success("✅ Fichier CSV lu avec succès (détection automatique)")
-                st.info(f"📊 {len(df)} lignes, {len(df.columns)} colonnes détectées")
-                return df, csv_type
-                
-        except Exception as e:
-            st.warning(f"⚠️ Détection automatique échouée: {e}")
-            st.info("🔄 Tentative avec délimiteurs spécifiques...")
+    def read_upload(uploaded_file, stream=None):
+        """Lit le CSV uploadé une seule fois par contenu (cache entre réexécutions) : ParsedUpload ou None
         
-        # Si la détection automatique échoue, essayer des délimiteurs spécifiques
-        delimiters = [',', ';', '\t', '|', ':', ' ']
-        encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+        stream : lecture en flux (ProductStream) ; par défaut au-delà de STREAM_MIN_BYTES.
+        """
+        if uploaded_file is None:
+            return None
+        if stream is None:
+            stream = uploaded_file.size >= STREAM_MIN_BYTES
+        key = upload_key(upload_digest(uploaded_file), stream=stream, chunk_rows=STREAM_CHUNK_ROWS)
         
-        for encoding in encodings:
-            for delimiter in delimiters:
-                try:
-                    uploaded_file.seek(0)
-                    
-                    # Essayer avec le délimiteur actuel
-                    df = pd.read_csv(
-                        uploaded_file,
-                        delimiter=delimiter,
-                        encoding=encoding,
-                        on_bad_lines='skip',
-                        low_memory=False,
-                        engine='python'
-                    )
-                    
-                    if len(df) > 0 and len(df.columns) > 1:
-                        csv_type = detect_csv_type(df)
-                        st.success(f"✅ Fichier CSV lu avec succès ! Délimiteur: '{delimiter}', Encodage: {encoding}")
-                        st.info(f"📊 {len(df)} lignes, {len(df.columns)} colonnes détectées")
-                        return df, csv_type
-                        
-                except Exception as e:
-                    continue
+        parsed = cached_upload(key)
+        if parsed is None:
+            parsed = UploadHandler._read_stream(uploaded_file, key) if stream else UploadHandler._read_frame(uploaded_file, key)
+            if parsed is None:
+                return None
+            store_upload(parsed, uploaded_file.size)
         
-        # Dernière tentative : lecture brute et analyse manuelle
+        # Mêmes messages qu'à la première lecture
+        dialect = parsed.dialect
+        if parsed.stream is not None:
+            st.success(f"✅ Fichier CSV lu en flux ! Délimiteur: {dialect.delimiter!r}, Encodage: {dialect.encoding}")
+            st.info(f"📊 {len(parsed.stream)} lignes, {len(parsed.stream.columns)} colonnes détectées (lecture par blocs de {parsed.stream.chunk_rows} lignes)")
+        else:
+            st.success(f"✅ Fichier CSV lu avec succès ! Délimiteur: {dialect.delimiter!r}, Encodage: {dialect.encoding}")
+            st.info(f"📊 {len(parsed.frame)} lignes, {len(parsed.frame.columns)} colonnes détectées")
+        return parsed
+    
+    @staticmethod
+    def _read_frame(uploaded_file, key):
         try:
+            # Format déduit d'un échantillon (encodage, délimiteur, en-tête), puis une seule lecture
             uploaded_file.seek(0)
-            content = uploaded_file.read().decode('utf-8', errors='ignore')
-            lines = content.split('\n')
+            df, dialect = read_csv_sniffed(uploaded_file)
             
-            if len(lines) > 1:
-                # Analyser les premières lignes pour détecter le délimiteur
-                first_line = lines[0]
-                second_line = lines[1] if len(lines) > 1 else ""
-                
-                # Compter les occurrences de différents caractères
-                char_counts = {}
-                for char in [',', ';', '\t', '|', ':']:
-                    char_counts[char] = first_line.count(char)
+            if len(df) > 0 and len(df.columns) > 1:
+                return ParsedUpload(key, frame=df, csv_type=detect_csv_type(df), dialect=dialect)
                 
-                # Trouver le délimiteur le plus fréquent
-                if any(char_counts.values()):
-                    best_delimiter = max(char_counts, key=char_counts.get)
-                    
-                    # Essayer de lire avec ce délimiteur
-                    uploaded_file.seek(0)
-                    df = pd.read_csv(
-                        uploaded_file,
-                        delimiter=best_delimiter,
-                        encoding='utf-8',
-                        on_bad_lines='skip',
-                        engine='python'
-                    )
-                    
-                    if len(df) > 0 and len(df.columns) > 1:
-                        csv_type = detect_csv_type(df)
-                        st.success(f"✅ Fichier CSV lu avec analyse manuelle ! Délimiteur: '{best_delimiter}'")
-                        st.info(f"📊 {len(df)} lignes, {len(df.columns)} colonnes détectées")
-                        return df, csv_type
-                        
         except Exception as e:
-            st.error(f"❌ Analyse manuelle échouée: {e}")
+            st.error(f"❌ Lecture du CSV échouée: {e}")
         
         # Si rien ne fonctionne
         st.error("❌ Impossible de lire le fichier CSV. Vérifiez le format.")
@@ -117,7 +74,41 @@ class UploadHandler:
         except:
             pass
             
-        return None, None
+        return None
+    
+    @staticmethod
+    def _read_stream(uploaded_file, key):
+        try:
+            uploaded_file.seek(0)
+            stream = ProductStream(uploaded_file)
+            
+            if len(stream.head.columns) > 1:
+                # Gardé en cache sans le contenu de l'upload : rattaché à chaque réexécution
+                return ParsedUpload(key, stream=stream.with_source(None), csv_type=detect_csv_type(stream.head),
+                                    dialect=stream.dialect)
+                
+        except Exception as e:
+            st.error(f"❌ Lecture du CSV échouée: {e}")
+        
+        st.error("❌ Impossible de lire le fichier CSV. Vérifiez le format.")
+        return None
+    
+    @staticmethod
+    def validate_csv_file(uploaded_file):
+        """Valide et charge le fichier CSV avec gestion intelligente des délimiteurs"""
+        parsed = UploadHandler.read_upload(uploaded_file, stream=False)
+        if parsed is None:
+            return None, None
+        return parsed.view(), parsed.csv_type
+    
+    @staticmethod
+    def open_csv_stream(uploaded_file):
+        """Ouvre un gros CSV en flux (lu par blocs au fil du rendu) : (ProductStream, type de CSV)"""
+        parsed = UploadHandler.read_upload(uploaded_file, stream=True)
+        if parsed is None:
+            return None, None
+        uploaded_file.seek(0)
+        return parsed.stream.with_source(uploaded_file), parsed.csv_type
     
     @staticmethod
     def validate_image_path(path_or_url):
@@ -0,0 +1,264 @@
+# utils/csv_sniffer.py
+"""
+Détection du format d'un CSV sur un échantillon, puis une seule lecture.
+
+sniff_csv() lit quelques dizaines de Ko (début, milieu et fin du fichier) et
+en déduit l'encodage (BOM, UTF-8 valide, sinon cp1252 / latin-1), le
+délimiteur, le caractère de citation et les lignes à sauter avant l'en-tête
+(ligne "sep=;" d'Excel, préambule). read_csv_sniffed() fait ensuite une seule
+lecture avec le moteur pyarrow s'il est installé, sinon le moteur C de pandas.
+"""
+
+import codecs
+import csv
+import io
+import os
+from collections import Counter
+from typing import BinaryIO, Optional, Union
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    HAVE_PYARROW = True
+except ImportError:
+    HAVE_PYARROW = False
+
+# Octets lus pour l'échantillon de début (délimiteur, en-tête, encodage)
+SNIFF_BYTES = 65536
+
+# Octets lus au milieu et en fin de fichier (encodage seulement)
+ENCODING_PROBE_BYTES = 16384
+
+# Lignes de l'échantillon comparées pour choisir le délimiteur
+SNIFF_ROWS = 200
+
+DELIMITERS = (",", ";", "\t", "|")
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+# Octets non définis en cp1252 : leur présence désigne latin-1
+_CP1252_UNDEFINED = frozenset(b"\x81\x8d\x8f\x90\x9d")
+
+CsvSource = Union[str, bytes, BinaryIO]
+
+
+class CsvDialect:
+    """Format d'un CSV"""
+
+    __slots__ = ("encoding", "delimiter", "quotechar", "skiprows", "multiline", "trailing_delimiter")
+
+    def __init__(self, encoding: str = "utf-8", delimiter: str = ",", quotechar: str = '"', skiprows: int = 0,
+                 multiline: bool = False, trailing_delimiter: bool = False):
+        self.encoding = encoding
+        self.delimiter = delimiter
+        self.quotechar = quotechar
+        self.skiprows = skiprows        # lignes avant l'en-tête
+        self.multiline = multiline      # retours à la ligne dans des valeurs entre guillemets
+        self.trailing_delimiter = trailing_delimiter  # lignes de données terminées par le délimiteur
+
+    def read_options(self, engine: str = "c") -> dict:
+        """Options correspondantes de pd.read_csv pour le moteur donné"""
+        options = {"sep": self.delimiter, "quotechar": self.quotechar, "encoding": self.encoding}
+        if self.skiprows:
+            # pyarrow ignore skiprows mais compte les lignes physiques dans header
+            options["header" if engine == "pyarrow" else "skiprows"] = self.skiprows
+        if self.trailing_delimiter and engine != "pyarrow":
+            # Champ vide final ignoré (sinon la première colonne devient l'index)
+            options["index_col"] = False
+        return options
+
+    def __repr__(self):
+        return (f"CsvDialect({self.encoding}, {self.delimiter!r}, {self.quotechar!r}, skiprows={self.skiprows}, "
+                f"multiline={self.multiline}, trailing_delimiter={self.trailing_delimiter})")
+
+
+def _read_samples(source: CsvSource):
+    """(début, [milieu, fin], fichier complet ?) sans lire tout le fichier"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        data = bytes(source)
+        size = len(data)
+
+        def read_at(offset, length):
+            return data[offset:offset + length]
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return _read_samples(f)
+    else:
+        position = source.tell()
+        source.seek(0, os.SEEK_END)
+        size = source.tell() - position
+
+        def read_at(offset, length):
+            source.seek(position + offset)
+            return source.read(length)
+
+    head = read_at(0, SNIFF_BYTES)
+    probes = []
+    if size > SNIFF_BYTES:
+        for offset in (size // 2, max(SNIFF_BYTES, size - ENCODING_PROBE_BYTES)):
+            probes.append(read_at(offset, ENCODING_PROBE_BYTES))
+    if not isinstance(source, (bytes, bytearray, memoryview)):
+        source.seek(position)
+    return head, probes, size <= SNIFF_BYTES
+
+
+def _is_utf8(chunk: bytes, starts_file: bool, final: bool) -> bool:
+    if not starts_file:
+        # Début de l'extrait au milieu d'un caractère
+        chunk = chunk.lstrip(bytes(range(0x80, 0xC0)))
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(chunk, final=final)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def detect_encoding(head: bytes, probes=(), complete: bool = True) -> str:
+    """Encodage d'après le BOM, la validité UTF-8 des extraits, sinon cp1252 ou latin-1"""
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    if _is_utf8(head, True, complete) and all(_is_utf8(p, False, False) for p in probes):
+        return "utf-8"
+    if any(b in _CP1252_UNDEFINED for chunk in (head, *probes) for b in chunk):
+        return "latin-1"
+    return "cp1252"
+
+
+def _rows(text: str, delimiter: str, quotechar: str):
+    """(lignes physiques avant la ligne, lignes physiques de la ligne, nombre de champs), premières lignes"""
+    reader = csv.reader(io.StringIO(text), delimiter=delimiter, quotechar=quotechar)
+    rows = []
+    start = 0
+    try:
+        for row in reader:
+            if row:
+                rows.append((start, reader.line_num - start, len(row)))
+            start = reader.line_num
+            if len(rows) >= SNIFF_ROWS:
+                break
+    except csv.Error:
+        pass
+    return rows
+
+
+def _best_delimiter(text: str, quotechar: str):
+    """Délimiteur au nombre de champs le plus régulier (puis le plus grand), lignes de l'échantillon"""
+    best, best_score, best_rows = ",", None, []
+    for delimiter in DELIMITERS:
+        rows = _rows(text, delimiter, quotechar)
+        if not rows:
+            continue
+        fields, frequency = Counter(n for _, _, n in rows).most_common(1)[0]
+        if fields < 2:
+            continue
+        score = (frequency / len(rows), fields)
+        if best_score is None or score > best_score:
+            best, best_score, best_rows = delimiter, score, rows
+    return best, best_rows
+
+
+def _has_trailing_delimiter(text: str, rows, skiprows: int, delimiter: str) -> bool:
+    """Données à un champ de plus que l'en-tête, lignes terminées par le délimiteur"""
+    header = next((n for start, _, n in rows if start == skiprows), None)
+    data = [n for start, _, n in rows if start > skiprows]
+    if header is None or not data or Counter(data).most_common(1)[0][0] != header + 1:
+        return False
+    lines = [line.rstrip("\r") for line in text.split("\n")[skiprows + 1:] if line.strip()]
+    return sum(line.endswith(delimiter) for line in lines) > len(lines) / 2
+
+
+def sniff_csv(source: CsvSource) -> CsvDialect:
+    """Déduit le format d'un CSV (chemin, contenu ou fichier binaire) sur un échantillon"""
+    head, probes, complete = _read_samples(source)
+    encoding = detect_encoding(head, probes, complete)
+    text = head.decode(encoding, errors="replace")
+    if not complete:
+        # Dernière ligne de l'échantillon probablement tronquée
+        text = text[:text.rfind("\n") + 1] or text
+
+    # Ligne "sep=;" ajoutée par Excel
+    first_line = text.split("\n", 1)[0].strip()
+    if first_line.lower().startswith("sep=") and len(first_line) == 5:
+        return CsvDialect(encoding, first_line[4], '"', 1)
+
+    quotechar = '"'
+    if '"' not in text and sum(text.count(d + "'") for d in DELIMITERS) > 2:
+        quotechar = "'"
+    delimiter, rows = _best_delimiter(text, quotechar)
+
+    # En-tête : première ligne à plusieurs champs. Seul un préambule (lignes vides ou d'un seul
+    # champ) est sauté : un en-tête au nombre de champs différent des données reste l'en-tête
+    skiprows = next((start for start, _, n in rows if n > 1), 0)
+    # Ligne CSV sur plusieurs lignes physiques : valeur entre guillemets avec retour à la ligne
+    multiline = any(span > 1 for _, span, _ in rows)
+    return CsvDialect(encoding, delimiter, quotechar, skiprows, multiline,
+                      _has_trailing_delimiter(text, rows, skiprows, delimiter))
+
+
+def _has_binary_column(df: pd.DataFrame) -> bool:
+    """pyarrow rend en bytes les colonnes de texte non UTF-8 au lieu d'échouer"""
+    for name in df.columns[df.dtypes == object]:
+        column = df[name]
+        first = column.first_valid_index()
+        if first is not None and isinstance(column.at[first], bytes):
+            return True
+    return False
+
+
+def _skip_long_rows(row) -> str:
+    """Lignes invalides pour pyarrow : trop de champs -> sautée (comme le moteur C), trop peu -> erreur"""
+    return "skip" if row.actual_columns > row.expected_columns else "error"
+
+
+def _rewind(source: CsvSource, position: Optional[int]):
+    if position is not None:
+        source.seek(position)
+
+
+def read_csv_sniffed(source: CsvSource, dialect: Optional[CsvDialect] = None, **kwargs):
+    """Lit un CSV en une seule passe après détection de son format
+
+    kwargs complète ou remplace les options déduites (on_bad_lines="skip" par défaut).
+    Retourne (DataFrame, CsvDialect).
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    position = source.tell() if hasattr(source, "seek") else None
+    dialect = dialect or sniff_csv(source)
+
+    def read(engine):
+        options = dialect.read_options(engine)
+        # pyarrow saute aussi les lignes trop courtes, que le moteur C complète (NaN) :
+        # une ligne courte fait échouer pyarrow, relecture par le moteur C
+        options["on_bad_lines"] = _skip_long_rows if engine == "pyarrow" else "skip"
+        options.update(kwargs)
+        df = pd.read_csv(source, engine=engine, **options)
+        if engine == "pyarrow" and _has_binary_column(df):
+            raise UnicodeError("colonne non UTF-8")
+        return df
+
+    # pandas ne permet ni d'activer newlines_in_values de pyarrow, ni de lui faire ignorer un champ
+    # vide final : moteur C pour les valeurs multilignes et les lignes terminées par le délimiteur
+    engines = ("pyarrow", "c") if HAVE_PYARROW and not (dialect.multiline or dialect.trailing_delimiter) else ("c",)
+    for engine in engines:
+        try:
+            return read(engine), dialect
+        except UnicodeError:
+            if dialect.encoding != "utf-8":
+                raise
+            # Octets non UTF-8 au-delà des extraits examinés
+            _rewind(source, position)
+            dialect.encoding = "cp1252"
+            return read(engine), dialect
+        except Exception as e:
+            if engine == engines[-1]:
+                raise
+            # Fichier que pyarrow refuse (dont lignes trop courtes) : moteur C
+            print(f"[CSV] Lecture pyarrow impossible ({type(e).__name__}), moteur C")
+            _rewind(source, position)
@@ -3,11 +3,13 @@ import pandas as pd
 import streamlit as st
 from io import BytesIO
 
+from utils.csv_sniffer import read_csv_sniffed
+
 def load_data_from_file(uploaded_file):
     """Charge les données depuis un fichier uploadé"""
     try:
         if uploaded_file.name.endswith('.csv'):
-            df = pd.read_csv(uploaded_file, encoding='utf-8')
+            df, _ = read_csv_sniffed(uploaded_file)
         elif uploaded_file.name.endswith(('.xlsx', '.xls')):
             df = pd.read_excel(uploaded_file)
         else:
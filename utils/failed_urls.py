@@ -0,0 +1,137 @@
+# utils/failed_urls.py
+"""
+Cache négatif des URLs d'images en échec.
+
+Une URL qui a échoué (404, image trop lourde, timeout...) est mémorisée avec
+sa classe d'échec jusqu'à une date d'expiration. Tant qu'elle n'a pas expiré,
+le rendu passe directement au visuel de remplacement sans requête réseau.
+Le délai double à chaque nouvel échec ; les erreurs permanentes partent d'un
+délai bien plus long que les erreurs passagères. Partagé entre sessions via SQLite.
+"""
+
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from utils.image_cache import cache_dir, canonicalize_url
+
+NOT_FOUND, TOO_LARGE, REJECTED, BLOCKED, TRANSIENT = "not_found", "too_large", "rejected", "blocked", "transient"
+
+# Classe d'échec -> (délai initial, délai maximum) en secondes
+FAILURE_BACKOFF = {
+    NOT_FOUND: (6 * 3600, 7 * 24 * 3600),   # 404 / 410 : l'image n'existe plus
+    TOO_LARGE: (24 * 3600, 7 * 24 * 3600),  # dépasse la taille maximale autorisée
+    REJECTED: (3600, 24 * 3600),            # autre erreur 4xx
+    BLOCKED: (300, 6 * 3600),               # 403 (accès bloqué)
+    TRANSIENT: (60, 3600),                  # timeout, erreur réseau, 5xx
+}
+
+FORGET_AFTER = 30 * 24 * 3600
+
+
+class FailedUrl:
+    """Échec mémorisé pour une URL"""
+
+    __slots__ = ("url", "failure_class", "failures", "retry_at", "last_error")
+
+    def __init__(self, url, failure_class, failures, retry_at, last_error):
+        self.url = url
+        self.failure_class = failure_class
+        self.failures = failures
+        self.retry_at = retry_at
+        self.last_error = last_error
+
+    @property
+    def active(self) -> bool:
+        """Vrai tant que l'URL ne doit pas être retentée"""
+        return time.time() < self.retry_at
+
+
+class FailedUrlRegistry:
+    """URLs d'images en échec, avec expiration exponentielle par classe d'échec
+
+    Args:
+        db_path: base SQLite partagée (par défaut dans le cache SnapCatalog)
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(cache_dir("failed_urls"), "failed.sqlite")
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS failures (
+                    url TEXT PRIMARY KEY,
+                    failure_class TEXT NOT NULL,
+                    failures INTEGER NOT NULL DEFAULT 0,
+                    retry_at REAL NOT NULL,
+                    last_error TEXT,
+                    updated REAL
+                )
+            ''')
+            # Échecs expirés depuis longtemps : la récidive ne compte plus
+            conn.execute("DELETE FROM failures WHERE retry_at < ?", (time.time() - FORGET_AFTER,))
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, url: str) -> Optional[FailedUrl]:
+        """Échec mémorisé pour cette URL (actif ou expiré), ou None"""
+        key = canonicalize_url(url)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT url, failure_class, failures, retry_at, last_error FROM failures WHERE url = ?", (key,)
+            ).fetchone()
+        return FailedUrl(*row) if row else None
+
+    def record(self, url: str, failure_class: str, error: str = None):
+        """Mémorise un échec ; le délai avant nouvel essai double à chaque récidive"""
+        key = canonicalize_url(url)
+        now = time.time()
+        base, maximum = FAILURE_BACKOFF.get(failure_class, FAILURE_BACKOFF[TRANSIENT])
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT failures FROM failures WHERE url = ?", (key,)).fetchone()
+            failures = (row[0] if row else 0) + 1
+            retry_at = now + min(maximum, base * (2 ** (failures - 1)))
+            conn.execute('''
+                INSERT INTO failures (url, failure_class, failures, retry_at, last_error, updated)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET failure_class = excluded.failure_class,
+                    failures = excluded.failures, retry_at = excluded.retry_at,
+                    last_error = excluded.last_error, updated = excluded.updated
+            ''', (key, failure_class, failures, retry_at, (error or "")[:200], now))
+
+    def clear(self, url: str = None):
+        """Oublie l'échec d'une URL (ou de toutes si url est None)"""
+        with self._connect() as conn:
+            if url is None:
+                conn.execute("DELETE FROM failures")
+            else:
+                conn.execute("DELETE FROM failures WHERE url = ?", (canonicalize_url(url),))
+
+    def active(self, limit: int = 500) -> list[dict]:
+        """URLs actuellement ignorées (diagnostic), les plus récentes d'abord"""
+        now = time.time()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT url, failure_class, failures, retry_at, last_error FROM failures "
+                "WHERE retry_at > ? ORDER BY updated DESC LIMIT ?", (now, limit)
+            ).fetchall()
+        return [
+            {
+                "url": url,
+                "failure_class": failure_class,
+                "failures": failures,
+                "retry_in": int(retry_at - now),
+                "last_error": last_error or "",
+            }
+            for url, failure_class, failures, retry_at, last_error in rows
+        ]
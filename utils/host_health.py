@@ -0,0 +1,137 @@
+# utils/host_health.py
+"""
+Registre persistant de l'état de santé des hôtes d'images (disjoncteur).
+
+Partagé entre sessions et processus via SQLite. Trois états par hôte :
+- closed : requêtes normales ;
+- open : hôte considéré hors service, échec immédiat jusqu'à la fin du délai ;
+- half_open : délai écoulé, une seule requête "sonde" est autorisée ; si elle
+  réussit l'hôte repasse en closed, sinon il repart en open avec un délai doublé.
+"""
+
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from utils.image_cache import cache_dir
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class HostUnavailable(RuntimeError):
+    """Hôte en panne connu : on échoue sans requête réseau"""
+
+
+class HostHealthRegistry:
+    """Disjoncteur par hôte, persistant
+
+    Args:
+        db_path: base SQLite partagée (par défaut dans le cache SnapCatalog)
+        threshold: échecs consécutifs avant ouverture
+        base_cooldown: délai (s) de la première ouverture, doublé à chaque sonde ratée
+        max_cooldown: délai maximum (s)
+        probe_timeout: au-delà, une sonde sans réponse est considérée perdue
+    """
+
+    def __init__(self, db_path=None, threshold=3, base_cooldown=120, max_cooldown=3600, probe_timeout=60):
+        self.db_path = db_path or os.path.join(cache_dir("health"), "hosts.sqlite")
+        self.threshold = threshold
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.probe_timeout = probe_timeout
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS hosts (
+                    host TEXT PRIMARY KEY,
+                    state TEXT NOT NULL DEFAULT 'closed',
+                    failures INTEGER NOT NULL DEFAULT 0,
+                    open_count INTEGER NOT NULL DEFAULT 0,
+                    open_until REAL NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    updated REAL
+                )
+            ''')
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def check(self, host: str):
+        """Lève HostUnavailable si l'hôte est ouvert (ou si une sonde est déjà en cours)"""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT state, open_until FROM hosts WHERE host = ?", (host,)).fetchone()
+            if not row or row[0] == CLOSED:
+                return
+            state, open_until = row
+            if state == OPEN:
+                if now < open_until:
+                    raise HostUnavailable(f"Hôte {host} indisponible, nouvel essai dans {int(open_until - now)} s.")
+                # Délai écoulé : un seul appelant obtient le droit de sonder
+                claimed = conn.execute(
+                    "UPDATE hosts SET state = ?, updated = ? WHERE host = ? AND state = ? AND open_until <= ?",
+                    (HALF_OPEN, now, host, OPEN, now)
+                ).rowcount
+            else:
+                # Sonde en cours ; on la reprend seulement si elle semble perdue
+                claimed = conn.execute(
+                    "UPDATE hosts SET updated = ? WHERE host = ? AND state = ? AND updated < ?",
+                    (now, host, HALF_OPEN, now - self.probe_timeout)
+                ).rowcount
+        if not claimed:
+            raise HostUnavailable(f"Hôte {host} en cours de vérification, réessayez plus tard.")
+
+    def record(self, host: str, ok: bool, error: str = None):
+        """Enregistre le résultat d'une requête vers cet hôte"""
+        now = time.time()
+        with self._connect() as conn:
+            if ok:
+                conn.execute('''
+                    INSERT INTO hosts (host, state, failures, open_count, open_until, last_error, updated)
+                    VALUES (?, ?, 0, 0, 0, NULL, ?)
+                    ON CONFLICT(host) DO UPDATE SET state = excluded.state, failures = 0, open_count = 0,
+                        open_until = 0, last_error = NULL, updated = excluded.updated
+                ''', (host, CLOSED, now))
+                return
+            conn.execute("BEGIN IMMEDIATE")  # lecture-modification-écriture atomique entre processus
+            row = conn.execute("SELECT state, failures, open_count FROM hosts WHERE host = ?", (host,)).fetchone()
+            state, failures, open_count = row if row else (CLOSED, 0, 0)
+            failures += 1
+            if state == HALF_OPEN or (state == CLOSED and failures >= self.threshold):
+                cooldown = min(self.max_cooldown, self.base_cooldown * (2 ** open_count))
+                state, open_until, open_count = OPEN, now + cooldown, open_count + 1
+            else:
+                open_until = 0 if state == CLOSED else None
+            conn.execute('''
+                INSERT INTO hosts (host, state, failures, open_count, open_until, last_error, updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(host) DO UPDATE SET state = excluded.state, failures = excluded.failures,
+                    open_count = excluded.open_count, open_until = COALESCE(?, hosts.open_until),
+                    last_error = excluded.last_error, updated = excluded.updated
+            ''', (host, state, failures, open_count, open_until or 0, (error or "")[:200], now, open_until))
+
+    def states(self) -> list[dict]:
+        """État de chaque hôte connu (diagnostic)"""
+        now = time.time()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT host, state, failures, open_until, last_error, updated FROM hosts ORDER BY updated DESC"
+            ).fetchall()
+        return [
+            {
+                "host": host,
+                "state": state,
+                "failures": failures,
+                "retry_in": max(0, int(open_until - now)) if state == OPEN else 0,
+                "last_error": last_error or "",
+                "updated": updated,
+            }
+            for host, state, failures, open_until, last_error, updated in rows
+        ]
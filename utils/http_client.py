@@ -0,0 +1,150 @@
+# utils/http_client.py
+"""
+Client HTTP partagé par tout le processus.
+
+Une seule `requests.Session` (thread-safe pour des GET simples) avec des pools
+de connexions keep-alive par hôte, dimensionnés sur la concurrence des
+téléchargements. Des compteurs indiquent combien de connexions ont été
+ouvertes et combien de requêtes ont réutilisé une connexion existante.
+"""
+
+import threading
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+USER_AGENT = "SnapCatalog/1.0 (+contact@example.com)"
+
+
+class ConnectionStats:
+    """Compteurs (thread-safe) de connexions ouvertes / requêtes émises"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.requests = 0
+
+    def add_opened(self):
+        with self._lock:
+            self.opened += 1
+
+    def add_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "opened": self.opened,
+                "requests": self.requests,
+                "reused": max(0, self.requests - self.opened),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.opened = 0
+            self.requests = 0
+
+
+stats = ConnectionStats()
+
+# Compteurs supplémentaires du thread courant (counting()), en plus des compteurs du processus
+_local = threading.local()
+
+
+@contextmanager
+def counting(counter: ConnectionStats):
+    """Compte aussi dans counter les connexions et requêtes du thread courant pendant le bloc
+
+    Les compteurs du processus (stats) mêlent toutes les sessions Streamlit ; un
+    catalogue passe son propre ConnectionStats autour de ses téléchargements.
+    """
+    previous = getattr(_local, "counter", None)
+    _local.counter = counter
+    try:
+        yield counter
+    finally:
+        _local.counter = previous
+
+
+class _CountingMixin:
+    def _new_conn(self):
+        stats.add_opened()
+        counter = getattr(_local, "counter", None)
+        if counter is not None:
+            counter.add_opened()
+        return super()._new_conn()
+
+    def urlopen(self, *args, **kwargs):
+        stats.add_request()
+        counter = getattr(_local, "counter", None)
+        if counter is not None:
+            counter.add_request()
+        return super().urlopen(*args, **kwargs)
+
+
+class CountingHTTPConnectionPool(_CountingMixin, HTTPConnectionPool):
+    pass
+
+
+class CountingHTTPSConnectionPool(_CountingMixin, HTTPSConnectionPool):
+    pass
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter dont les pools comptent connexions ouvertes et requêtes"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool,
+        }
+
+
+def build_session(pool_size=8, max_hosts=32) -> requests.Session:
+    """Construit une session avec retries et pools keep-alive
+
+    Args:
+        pool_size: connexions conservées par hôte (≈ concurrence des téléchargements)
+        max_hosts: nombre d'hôtes dont le pool est conservé
+    """
+    s = requests.Session()
+    # 429/503 ne sont pas rejoués ici (ni mis en pause sur Retry-After, qui bloquerait le thread) :
+    # ils remontent au limiteur adaptatif (utils.rate_control), qui met la file de l'hôte en pause
+    r = Retry(
+        total=2, backoff_factor=0.8,
+        status_forcelist=[500, 502, 504],
+        allowed_methods=["GET", "HEAD"],
+        respect_retry_after_header=False,
+    )
+    adapter = CountingHTTPAdapter(
+        pool_connections=max_hosts, pool_maxsize=pool_size,
+        max_retries=r, pool_block=False
+    )
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    s.headers.update({"User-Agent": USER_AGENT})
+    return s
+
+
+_shared_session = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_session(pool_size=8) -> requests.Session:
+    """Session unique du processus (créée au premier appel)"""
+    global _shared_session
+    if _shared_session is None:
+        with _shared_lock:
+            if _shared_session is None:
+                _shared_session = build_session(pool_size=pool_size)
+    return _shared_session
+
+
+def connection_stats() -> dict:
+    """Retourne {'opened', 'requests', 'reused'} depuis le démarrage (ou le dernier reset), tout le processus"""
+    return stats.snapshot()
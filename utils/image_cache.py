@@ -0,0 +1,238 @@
+# utils/image_cache.py
+"""
+Cache disque persistant des images téléchargées.
+
+- Index SQLite (partagé entre sessions et processus) : URL canonique -> empreinte
+  du contenu + validateurs HTTP (ETag / Last-Modified).
+- Contenu stocké une seule fois par empreinte SHA-256 (deux URLs servant la même
+  image partagent le même fichier).
+- Écritures atomiques (fichier temporaire + os.replace), éviction LRU par taille.
+"""
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+CACHE_ROOT = os.getenv("SNAPCATALOG_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "snapcatalog_cache")
+
+
+def cache_dir(name: str) -> str:
+    """Retourne (et crée si besoin) un sous-dossier du cache SnapCatalog"""
+    path = os.path.join(CACHE_ROOT, name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalise une URL pour servir de clé de cache (schéma/hôte en minuscules, port par défaut, fragment, ordre des paramètres)"""
+    url = (url or "").strip()
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def atomic_write_bytes(path: str, data: bytes):
+    """Écrit un fichier de façon atomique (sûr entre processus)"""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def prune_directory(path: str, max_bytes: int):
+    """Supprime les fichiers les moins récemment utilisés (mtime) au-delà de max_bytes"""
+    try:
+        files = []
+        for entry in os.scandir(path):
+            if entry.is_file() and not entry.name.startswith(".tmp-"):
+                st_ = entry.stat()
+                files.append((st_.st_mtime, st_.st_size, entry.path))
+    except OSError:
+        return
+    total = sum(size for _, size, _ in files)
+    if total <= max_bytes:
+        return
+    for _, size, file_path in sorted(files):
+        if total <= max_bytes * 0.9:
+            break
+        try:
+            os.remove(file_path)
+            total -= size
+        except OSError:
+            pass
+
+
+class CacheEntry:
+    """Entrée d'index : validateurs HTTP + empreinte du contenu"""
+
+    __slots__ = ("url", "sha256", "etag", "last_modified", "fetched_at", "path")
+
+    def __init__(self, url, sha256, etag, last_modified, fetched_at, path):
+        self.url = url
+        self.sha256 = sha256
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        self.path = path
+
+    def is_fresh(self, ttl: float) -> bool:
+        return (time.time() - self.fetched_at) < ttl
+
+    def conditional_headers(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def read(self) -> Optional[bytes]:
+        try:
+            with open(self.path, "rb") as f:
+                return f.read()
+        except OSError:
+            # Contenu évincé entre-temps par un autre processus
+            return None
+
+
+class DiskImageCache:
+    """Cache disque adressé par contenu, avec revalidation conditionnelle
+
+    Args:
+        root: dossier du cache (par défaut CACHE_ROOT/images)
+        max_bytes: taille maximale du contenu stocké (éviction LRU au-delà)
+        ttl: durée (s) pendant laquelle une entrée est servie sans revalidation
+    """
+
+    def __init__(self, root=None, max_bytes=500_000_000, ttl=3600):
+        self.root = root or cache_dir("images")
+        self.blob_dir = os.path.join(self.root, "blobs")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.db_path = os.path.join(self.root, "index.sqlite")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._evict_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS entries (
+                    url_key TEXT PRIMARY KEY,
+                    url TEXT,
+                    sha256 TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS blobs (
+                    sha256 TEXT PRIMARY KEY,
+                    size INTEGER,
+                    last_access REAL
+                )
+            ''')
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _url_key(url: str) -> str:
+        return hashlib.sha256(canonicalize_url(url).encode("utf-8")).hexdigest()
+
+    def _blob_path(self, sha: str) -> str:
+        return os.path.join(self.blob_dir, sha[:2], sha)
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """Retourne l'entrée d'index pour cette URL (fraîche ou non), ou None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT url, sha256, etag, last_modified, fetched_at FROM entries WHERE url_key = ?",
+                (self._url_key(url),)
+            ).fetchone()
+            if not row:
+                return None
+            conn.execute("UPDATE blobs SET last_access = ? WHERE sha256 = ?", (time.time(), row[1]))
+        return CacheEntry(row[0], row[1], row[2], row[3], row[4], self._blob_path(row[1]))
+
+    def get_fresh(self, url: str) -> Optional[bytes]:
+        """Contenu en cache s'il est encore frais (aucune requête réseau nécessaire)"""
+        entry = self.lookup(url)
+        if entry is None or not entry.is_fresh(self.ttl):
+            return None
+        return entry.read()
+
+    def store(self, url: str, data: bytes, etag=None, last_modified=None) -> str:
+        """Enregistre le contenu téléchargé et retourne son empreinte SHA-256"""
+        sha = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(sha)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            atomic_write_bytes(path, data)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO blobs (sha256, size, last_access) VALUES (?, ?, ?)",
+                (sha, len(data), now)
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (url_key, url, sha256, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (self._url_key(url), url, sha, etag, last_modified, now)
+            )
+        self._evict_if_needed()
+        return sha
+
+    def mark_revalidated(self, url: str, etag=None, last_modified=None):
+        """Réponse 304 : l'entrée redevient fraîche sans retransfert"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE entries SET fetched_at = ?, etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE url_key = ?",
+                (time.time(), etag, last_modified, self._url_key(url))
+            )
+
+    def _evict_if_needed(self):
+        if not self._evict_lock.acquire(blocking=False):
+            return
+        try:
+            with self._connect() as conn:
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+                if total <= self.max_bytes:
+                    return
+                # Éviction LRU jusqu'à 90% de la taille max
+                target = int(self.max_bytes * 0.9)
+                for sha, size in conn.execute("SELECT sha256, size FROM blobs ORDER BY last_access ASC").fetchall():
+                    if total <= target:
+                        break
+                    conn.execute("DELETE FROM entries WHERE sha256 = ?", (sha,))
+                    conn.execute("DELETE FROM blobs WHERE sha256 = ?", (sha,))
+                    try:
+                        os.remove(self._blob_path(sha))
+                    except OSError:
+                        pass
+                    total -= size
+        finally:
+            self._evict_lock.release()
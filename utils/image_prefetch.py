@@ -0,0 +1,111 @@
+# utils/image_prefetch.py
+"""
+Pré-chargement concurrent des images (mode images URL).
+
+Les URLs de tout le catalogue sont connues avant le rendu : on les télécharge
+en avance dans un pool de threads borné, en alternant les hôtes pour qu'un
+CDN lent ne bloque pas les autres. Le rendu consomme les images ligne par
+ligne, dans l'ordre du DataFrame, au fur et à mesure de leur arrivée.
+"""
+
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Iterable, Iterator, List, Optional
+from urllib.parse import urlparse
+
+
+class ImagePrefetcher:
+    """Télécharge les images en avance sur le rendu, avec mémoire bornée
+
+    Args:
+        fetch: fonction url -> bytes | None (doit gérer ses propres erreurs)
+        max_workers: nombre maximum de téléchargements simultanés
+        per_host: nombre maximum de téléchargements simultanés par hôte
+        window: nombre de lignes d'avance autorisées sur le rendu
+    """
+
+    def __init__(self, fetch: Callable[[str], Optional[bytes]], max_workers=6, per_host=2, window=24):
+        self.fetch = fetch
+        self.max_workers = max(1, int(max_workers))
+        self.per_host = max(1, int(per_host))
+        self.window = max(1, int(window))
+
+    def _safe_fetch(self, url):
+        try:
+            return self.fetch(url)
+        except Exception:
+            return None
+
+    def iter_rows(self, url_rows: Iterable[List[str]]) -> Iterator[List[Optional[bytes]]]:
+        """Itère sur les lignes dans l'ordre et renvoie pour chacune la liste des images (bytes ou None)"""
+        rows = iter(url_rows)
+        exhausted = False
+        next_enqueue = 0            # prochaine ligne à planifier
+        next_yield = 0              # prochaine ligne à rendre
+        results = {}                # ligne -> [bytes | None, ...]
+        remaining = {}              # ligne -> nb d'images encore attendues
+        pending = OrderedDict()     # hôte -> deque[(ligne, slot, url)] (ordre = tourniquet)
+        inflight_by_host = {}       # hôte -> nb de téléchargements en cours
+        inflight = {}               # future -> (ligne, slot, hôte)
+
+        def enqueue_rows():
+            nonlocal exhausted, next_enqueue
+            while not exhausted and next_enqueue < next_yield + self.window:
+                try:
+                    urls = list(next(rows) or [])
+                except StopIteration:
+                    exhausted = True
+                    return
+                row = next_enqueue
+                next_enqueue += 1
+                results[row] = [None] * len(urls)
+                remaining[row] = len(urls)
+                for slot, url in enumerate(urls):
+                    host = urlparse(url).netloc
+                    pending.setdefault(host, deque()).append((row, slot, url))
+
+        def submit_jobs(executor):
+            # Tourniquet sur les hôtes : un job par hôte et par tour
+            while len(inflight) < self.max_workers and pending:
+                submitted = False
+                for host in list(pending.keys()):
+                    if len(inflight) >= self.max_workers:
+                        break
+                    if inflight_by_host.get(host, 0) >= self.per_host:
+                        continue
+                    row, slot, url = pending[host].popleft()
+                    if not pending[host]:
+                        del pending[host]
+                    else:
+                        pending.move_to_end(host)
+                    fut = executor.submit(self._safe_fetch, url)
+                    inflight[fut] = (row, slot, host)
+                    inflight_by_host[host] = inflight_by_host.get(host, 0) + 1
+                    submitted = True
+                if not submitted:
+                    break
+
+        def collect(done):
+            for fut in done:
+                row, slot, host = inflight.pop(fut)
+                inflight_by_host[host] -= 1
+                results[row][slot] = fut.result()
+                remaining[row] -= 1
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="img-prefetch") as executor:
+            while True:
+                enqueue_rows()
+                submit_jobs(executor)
+                if next_yield >= next_enqueue:
+                    if exhausted:
+                        break
+                    continue
+                # Attendre que la ligne courante soit complète
+                while remaining[next_yield] > 0:
+                    done, _ = wait(list(inflight), return_when=FIRST_COMPLETED)
+                    collect(done)
+                    submit_jobs(executor)
+                images = results.pop(next_yield)
+                del remaining[next_yield]
+                next_yield += 1
+                yield images
@@ -0,0 +1,310 @@
+# utils/image_preparation.py
+"""
+Préparation des images avant insertion dans le PDF.
+
+Chaque image est rééchantillonnée à la taille réelle de sa zone (en points PDF)
+pour le DPI du niveau de qualité, puis ré-encodée en JPEG avec la qualité du
+niveau. Le résultat est mis en cache sur disque, par (empreinte source, zone, niveau).
+ReportLab insère ensuite le JPEG tel quel (DCTDecode), sans re-décoder les pixels.
+
+Couverture et logo suivent le même chemin (prepare_cover, prepare_logo) : une
+même charte graphique n'est décodée et ré-encodée qu'une fois par niveau.
+"""
+
+import hashlib
+import os
+from io import BytesIO
+from typing import Optional, Union
+
+from PIL import Image as PILImage
+
+from utils.image_cache import cache_dir, atomic_write_bytes, prune_directory
+
+# Niveaux de qualité PDF
+QUALITY_TIERS = {
+    'hd': {'dpi': 300, 'image_quality': 95},
+    'medium': {'dpi': 150, 'image_quality': 75},
+    'bd': {'dpi': 72, 'image_quality': 50}
+}
+
+
+PREPARED_CACHE_MAX_BYTES = 300_000_000
+
+# Budget de pixels décodés par image (après réduction DCT) : au-delà, l'image est refusée
+MAX_DECODE_PIXELS = 40_000_000
+
+
+def prune_prepared_cache(max_bytes: int = PREPARED_CACHE_MAX_BYTES):
+    """Borne la taille du cache des images préparées (LRU)"""
+    prune_directory(cache_dir("prepared"), max_bytes)
+
+
+class PreparedImage:
+    """Image prête à insérer : chemin du JPEG + dimensions en pixels"""
+
+    __slots__ = ("path", "width", "height", "source_sha")
+
+    def __init__(self, path, width, height, source_sha):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.source_sha = source_sha
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+
+def target_pixels(box_w_pt: float, box_h_pt: float, dpi: int) -> tuple[int, int]:
+    """Taille en pixels d'une zone exprimée en points PDF (1 pt = 1/72 pouce)"""
+    return max(1, int(round(box_w_pt * dpi / 72.0))), max(1, int(round(box_h_pt * dpi / 72.0)))
+
+
+def _read_source(source: Union[str, bytes]) -> Optional[bytes]:
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    try:
+        with open(source, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def image_size(source: Union[str, bytes]) -> Optional[tuple[int, int]]:
+    """Dimensions en pixels lues dans l'en-tête du fichier (pas de décodage)"""
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+    try:
+        with PILImage.open(source) as img:
+            return img.size
+    except Exception:
+        return None
+
+
+def _has_transparency(img: PILImage.Image) -> bool:
+    """Vrai si au moins un pixel n'est pas totalement opaque"""
+    if img.mode in ("RGBA", "LA"):
+        return img.getchannel("A").getextrema()[0] < 255
+    return img.mode == "P" and "transparency" in img.info
+
+
+def _flatten_to_rgb(img: PILImage.Image) -> PILImage.Image:
+    """Aplatit la transparence sur fond blanc (les cartes produit sont blanches)"""
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        img = img.convert("RGBA")
+        background = PILImage.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        return background
+    if img.mode != "RGB":
+        return img.convert("RGB")
+    return img
+
+
+def open_image_for_box(source: Union[str, bytes, BytesIO], target_px: tuple[int, int],
+                       max_pixels: int = MAX_DECODE_PIXELS, cover: bool = False) -> PILImage.Image:
+    """Décode une image directement à une résolution proche de sa zone cible
+
+    - JPEG : mise à l'échelle DCT au décodage (draft), 1/2, 1/4 ou 1/8 ;
+    - autres formats : réduction entière (Image.reduce) juste après décodage.
+    La taille obtenue reste >= celle de l'image ajustée dans target_px (proportions
+    gardées, comme thumbnail) ; cover=True : chaque dimension reste >= celle de
+    target_px (image étirée sur la zone, couverture). Le redimensionnement final
+    est fait par l'appelant. Lève ValueError si le budget de pixels est dépassé.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+    img = PILImage.open(source)
+    target_w, target_h = max(1, target_px[0]), max(1, target_px[1])
+    if cover:
+        # Chaque dimension réduite indépendamment vers celle de la zone
+        needed = (min(img.width, target_w), min(img.height, target_h))
+    else:
+        # Image contenue dans la zone : la dimension la plus contraignante fixe l'échelle
+        scale = max(img.width / target_w, img.height / target_h)
+        needed = (max(1, int(img.width / scale)), max(1, int(img.height / scale))) if scale > 1 else img.size
+    if img.format == "JPEG":
+        img.draft("RGB", needed)
+    if img.width * img.height > max_pixels:
+        img.close()
+        raise ValueError(f"Image trop grande à décoder ({img.width}x{img.height} px)")
+    img.load()
+    if img.mode == "P":
+        # Palette : ni reduce ni LANCZOS, on passe en couleurs directes
+        img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+    factor = min(img.width // needed[0], img.height // needed[1])
+    if factor >= 2:
+        img = img.reduce(factor)
+    return img
+
+
+def prepare_image(source: Union[str, bytes], box_w_pt: float, box_h_pt: float,
+                  dpi: int = 300, quality: int = 95, source_sha: Optional[str] = None) -> Optional[PreparedImage]:
+    """Rééchantillonne et ré-encode une image pour sa zone d'affichage
+
+    Args:
+        source: chemin de fichier ou contenu brut de l'image
+        box_w_pt, box_h_pt: dimensions de la zone dans le PDF (points)
+        dpi: résolution cible du niveau de qualité
+        quality: qualité JPEG du niveau
+        source_sha: empreinte SHA-256 du contenu si déjà calculée
+
+    Returns:
+        PreparedImage, ou None si l'image est illisible
+    """
+    data = _read_source(source)
+    if not data:
+        return None
+    source_sha = source_sha or hashlib.sha256(data).hexdigest()
+    box_px = target_pixels(box_w_pt, box_h_pt, dpi)
+    key = hashlib.sha256(f"{source_sha}:{box_px[0]}x{box_px[1]}:{dpi}:{quality}".encode()).hexdigest()
+    path = os.path.join(cache_dir("prepared"), f"{key}.jpg")
+
+    if os.path.exists(path):
+        try:
+            os.utime(path)  # LRU : marque l'entrée comme récemment utilisée
+            with PILImage.open(path) as cached:
+                return PreparedImage(path, cached.width, cached.height, source_sha)
+        except Exception:
+            pass  # fichier corrompu : on le régénère
+
+    try:
+        # Décodage à résolution réduite (DCT/reduce), puis ajustement fin.
+        # Jamais d'agrandissement : on ne fait que réduire vers la zone
+        with open_image_for_box(data, box_px) as img:
+            img.thumbnail(box_px, PILImage.LANCZOS)
+            out_img = _flatten_to_rgb(img)
+            out = BytesIO()
+            out_img.save(out, format="JPEG", quality=quality, optimize=True)
+            width, height = out_img.size
+    except Exception as e:
+        print(f"⚠️ [PREPARE] Image illisible ({source_sha[:8]}): {e}")
+        return None
+
+    atomic_write_bytes(path, out.getvalue())
+    return PreparedImage(path, width, height, source_sha)
+
+
+def _cached_asset(kind: str, source_sha: str, box_px: tuple[int, int], dpi: int, quality: int,
+                  extension: str) -> tuple[str, Optional[PreparedImage]]:
+    """Chemin en cache d'une image de charte et l'image déjà préparée si présente"""
+    key = hashlib.sha256(f"{kind}:{source_sha}:{box_px[0]}x{box_px[1]}:{dpi}:{quality}".encode()).hexdigest()
+    path = os.path.join(cache_dir("prepared"), f"{key}.{extension}")
+    if os.path.exists(path):
+        try:
+            os.utime(path)
+            with PILImage.open(path) as cached:
+                return path, PreparedImage(path, cached.width, cached.height, source_sha)
+        except Exception:
+            pass
+    return path, None
+
+
+def prepare_cover(source: Union[str, bytes], page_w_pt: float, page_h_pt: float,
+                  dpi: int = 300, quality: int = 95, source_sha: Optional[str] = None) -> Optional[PreparedImage]:
+    """Couverture pleine page : rééchantillonnée à la page pour le DPI du niveau, JPEG
+
+    L'image est étirée sur toute la page au dessin : chaque dimension est réduite
+    indépendamment vers celle de la page (jamais agrandie). La transparence est
+    aplatie sur fond blanc, comme la page. Un JPEG déjà à la bonne taille n'est
+    pas ré-encodé.
+    """
+    data = _read_source(source)
+    if not data:
+        return None
+    source_sha = source_sha or hashlib.sha256(data).hexdigest()
+    page_px = target_pixels(page_w_pt, page_h_pt, dpi)
+    path, prepared = _cached_asset("cover", source_sha, page_px, dpi, quality, "jpg")
+    if prepared:
+        return prepared
+    try:
+        with open_image_for_box(data, page_px, cover=True) as img:
+            size = (min(img.width, page_px[0]), min(img.height, page_px[1]))
+            if size == image_size(data) and img.format == "JPEG" and img.mode in ("RGB", "L"):
+                # Déjà à la taille de la page : le JPEG d'origine est gardé tel quel
+                out = BytesIO(data)
+            else:
+                out_img = _flatten_to_rgb(img.resize(size, PILImage.LANCZOS) if size != img.size else img)
+                out = BytesIO()
+                out_img.save(out, format="JPEG", quality=quality, optimize=True)
+            width, height = size
+    except Exception as e:
+        print(f"⚠️ [PREPARE] Couverture illisible ({source_sha[:8]}): {e}")
+        return None
+    atomic_write_bytes(path, out.getvalue())
+    return PreparedImage(path, width, height, source_sha)
+
+
+def prepare_logo(source: Union[str, bytes], box_w_pt: float, box_h_pt: float,
+                 dpi: int = 300, source_sha: Optional[str] = None) -> Optional[PreparedImage]:
+    """Logo : réduit à sa zone pour le DPI du niveau, PNG (net sur les aplats)
+
+    La couche alpha n'est gardée que si le logo a réellement des pixels transparents.
+    """
+    data = _read_source(source)
+    if not data:
+        return None
+    source_sha = source_sha or hashlib.sha256(data).hexdigest()
+    box_px = target_pixels(box_w_pt, box_h_pt, dpi)
+    path, prepared = _cached_asset("logo", source_sha, box_px, dpi, 0, "png")
+    if prepared:
+        return prepared
+    try:
+        with open_image_for_box(data, box_px) as img:
+            img.thumbnail(box_px, PILImage.LANCZOS)
+            out_img = img.convert("RGBA") if _has_transparency(img) else _flatten_to_rgb(img)
+            out = BytesIO()
+            out_img.save(out, format="PNG", optimize=True)
+            width, height = out_img.size
+    except Exception as e:
+        print(f"⚠️ [PREPARE] Logo illisible ({source_sha[:8]}): {e}")
+        return None
+    atomic_write_bytes(path, out.getvalue())
+    return PreparedImage(path, width, height, source_sha)
+
+
+class DocumentImageRegistry:
+    """Images d'un même PDF : chaque contenu distinct n'est préparé et intégré qu'une fois
+
+    Deux images identiques (même contenu, même servies sous des URLs différentes)
+    donnent le même fichier préparé ; ReportLab réutilise alors la même XObject
+    image pour toutes les occurrences.
+    """
+
+    def __init__(self, dpi: int = 300, quality: int = 95):
+        self.dpi = dpi
+        self.quality = quality
+        self._prepared = {}     # (empreinte source, zone px) -> PreparedImage | None
+        self._embedded = {}     # chemin préparé -> taille en octets
+        self.references = 0
+        self.bytes_saved = 0
+
+    def get(self, source: Union[str, bytes], box_w_pt: float, box_h_pt: float) -> Optional[PreparedImage]:
+        """Retourne l'image préparée pour cette zone (partagée si déjà vue dans le document)"""
+        data = _read_source(source)
+        if not data:
+            return None
+        source_sha = hashlib.sha256(data).hexdigest()
+        key = (source_sha, target_pixels(box_w_pt, box_h_pt, self.dpi))
+        if key in self._prepared:
+            prepared = self._prepared[key]
+        else:
+            prepared = prepare_image(data, box_w_pt, box_h_pt, dpi=self.dpi,
+                                     quality=self.quality, source_sha=source_sha)
+            self._prepared[key] = prepared
+        if prepared is None:
+            return None
+        self.references += 1
+        if prepared.path in self._embedded:
+            self.bytes_saved += self._embedded[prepared.path]
+        else:
+            self._embedded[prepared.path] = os.path.getsize(prepared.path)
+        return prepared
+
+    def report(self) -> dict:
+        """Statistiques de déduplication pour le rapport de génération"""
+        return {
+            "images_drawn": self.references,
+            "unique_images": len(self._embedded),
+            "duplicates": self.references - len(self._embedded),
+            "bytes_saved": self.bytes_saved,
+        }
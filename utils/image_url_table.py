@@ -0,0 +1,73 @@
+# utils/image_url_table.py
+"""
+Extraction vectorisée des URLs d'images des colonnes IMAGE 1..10.
+
+Les cellules des colonnes image sont empilées en une seule colonne de texte,
+réparées (";ps://" laissé par certains exports à la place de "https://"),
+puis les URLs y sont cherchées en une passe : str.extract pour les cellules
+à une seule URL possible (cas courant), str.extractall pour les autres. Le résultat est
+une table compacte (row, slot, url) : row = position de la ligne dans le
+DataFrame, slot = rang de l'URL dans la ligne (colonnes dans l'ordre, puis
+ordre dans la cellule). Les étapes suivantes (liste par ligne, filtrage des
+lignes sans image) partent de cette table.
+"""
+
+import re
+from typing import List, Optional, Sequence
+
+import pandas as pd
+
+# URL d'image (extension connue, paramètres éventuels) n'importe où dans la cellule
+IMG_URL_PATTERN = r"https?://[^\s\"']+?\.(?:png|jpe?g|webp|gif|bmp|tiff)(?:\?[^\s\"']*)?"
+
+# Cellule entière = une URL (espaces autour ignorés)
+CELL_URL_PATTERN = r"^\s*(https?://[^\s\"']+)\s*$"
+
+
+def image_url_table(frame: pd.DataFrame, columns: Sequence[str], pattern: str = IMG_URL_PATTERN,
+                    max_slots: Optional[int] = None) -> pd.DataFrame:
+    """Table (row, slot, url) des URLs trouvées dans les colonnes données
+
+    Une URL répétée dans une même cellule n'est gardée qu'une fois. max_slots :
+    nombre maximum d'URLs par ligne (les premières).
+    """
+    columns = [c for c in columns if c in frame.columns]
+    if not columns or frame.empty:
+        return pd.DataFrame({"row": pd.Series(dtype="int64"), "slot": pd.Series(dtype="int64"),
+                             "url": pd.Series(dtype=str)})
+    cells = frame[columns].set_axis(range(len(frame)), axis=0).set_axis(range(len(columns)), axis=1)
+    # Ligne par ligne, colonnes dans l'ordre ; cellules vides ignorées
+    stacked = cells.stack()
+    stacked = stacked[stacked.notna()].astype(str).str.replace(";ps://", "https://", regex=False)
+    if not re.compile(pattern).groups:
+        pattern = f"({pattern})"
+    pattern = f"(?i){pattern}"
+    # Cas courant : une seule URL possible dans la cellule -> première correspondance (str.extract) ;
+    # plusieurs -> toutes (str.extractall, plus lent)
+    schemes = stacked.str.count("://")
+    single = stacked[schemes == 1].str.extract(pattern, expand=False).dropna()
+    several = stacked[schemes > 1].str.extractall(pattern)[0]
+    several.index = several.index.droplevel(-1)
+    found = pd.concat([single, several]) if len(several) else single
+    if found.empty:
+        return image_url_table(frame.iloc[:0], columns)
+    table = pd.DataFrame({
+        "row": found.index.get_level_values(0).astype("int64"),
+        "column": found.index.get_level_values(1),
+        "url": found.to_numpy(),
+    })
+    # Ordre des URLs : ligne, colonne, puis ordre dans la cellule (tri stable)
+    table = table.sort_values(["row", "column"], kind="stable")
+    table = table.drop_duplicates(["row", "column", "url"])
+    table["slot"] = table.groupby("row").cumcount()
+    if max_slots is not None:
+        table = table[table["slot"] < max_slots]
+    return table[["row", "slot", "url"]].reset_index(drop=True)
+
+
+def row_url_lists(table: pd.DataFrame, rows: int) -> List[List[str]]:
+    """Liste des URLs de chaque ligne (vide sans image), d'après image_url_table"""
+    lists = [[] for _ in range(rows)]
+    for row, url in zip(table["row"].tolist(), table["url"].tolist()):
+        lists[row].append(url)
+    return lists
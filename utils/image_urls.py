@@ -0,0 +1,72 @@
+# utils/image_urls.py
+"""
+Réécriture des URLs d'images avant téléchargement.
+
+Le CDN d'Etsy encode la déclinaison de l'image dans le chemin
+(`il_570xN`, `il_fullxfull`, ...). Les CSV listent souvent l'original pleine
+taille (plusieurs Mo) : on demande plutôt la plus petite déclinaison assez
+large pour la zone de la carte au DPI du niveau de qualité, avec repli sur
+les déclinaisons plus grandes si elle n'est pas disponible.
+"""
+
+import re
+from typing import Callable, List, Optional
+from urllib.parse import urlparse
+
+ETSY_HOST_RE = re.compile(r"(^|\.)etsystatic\.com$", re.I)
+ETSY_VARIANT_RE = re.compile(r"/il_(fullxfull|\d+x(?:\d+|N))\.", re.I)
+
+# Déclinaisons non recadrées (largeur imposée, hauteur proportionnelle), de la plus petite
+# à la plus grande. Les vignettes fixes (il_75x75, il_340x270...) sont recadrées : exclues.
+ETSY_VARIANTS = [
+    ("570xN", 570),
+    ("794xN", 794),
+    ("1140xN", 1140),
+    ("1588xN", 1588),
+    ("fullxfull", None),
+]
+
+
+def is_etsy_image_url(url: str) -> bool:
+    """URL d'image du CDN Etsy avec une déclinaison reconnue dans le chemin"""
+    return bool(ETSY_HOST_RE.search(urlparse(url).netloc) and ETSY_VARIANT_RE.search(url))
+
+
+def image_url_candidates(url: str, box_px: tuple[int, int]) -> List[str]:
+    """URLs à essayer dans l'ordre pour afficher cette image dans une zone de box_px pixels
+
+    L'image tient dans la zone sans être agrandie : sa largeur affichée ne dépasse
+    jamais la largeur de la zone, quelle que soit son orientation. La première
+    déclinaison au moins aussi large suffit donc ; les suivantes servent de repli.
+    Pour une URL non reconnue, renvoie [url].
+    """
+    if not is_etsy_image_url(url):
+        return [url]
+    needed_w = max(1, int(box_px[0]))
+    match = ETSY_VARIANT_RE.search(url)
+    current = match.group(1)
+    candidates = []
+    started = False
+    for name, width in ETSY_VARIANTS:
+        if not started and width is not None and width < needed_w:
+            continue
+        started = True
+        candidate = url[:match.start(1)] + name + url[match.end(1):]
+        if candidate not in candidates:
+            candidates.append(candidate)
+        if name.lower() == current.lower():
+            # La déclinaison fournie par le CSV suffit : inutile d'aller au-delà
+            break
+    if url not in candidates:
+        candidates.append(url)
+    return candidates
+
+
+def fetch_best_variant(url: str, box_px: tuple[int, int],
+                       fetch: Callable[[str], Optional[bytes]]) -> Optional[bytes]:
+    """Télécharge la plus petite déclinaison suffisante, puis les plus grandes en cas d'échec"""
+    for candidate in image_url_candidates(url, box_px):
+        data = fetch(candidate)
+        if data:
+            return data
+    return None
@@ -0,0 +1,231 @@
+# utils/price_columns.py
+"""
+Normalisation des prix colonne par colonne.
+
+Un export Shopify/Etsy suit une seule convention par colonne (style des
+nombres, devise, TTC/HT, unité), souvent avec une colonne CODE_DEVISE à part.
+infer_price_format() déduit cette convention une fois, à partir d'un
+échantillon ; normalize_price_column() analyse ensuite toute la colonne avec
+quelques opérations pandas (extraction, conversion numérique) et ne repasse
+par normalize_price, cellule par cellule, que pour les valeurs atypiques
+(fourchettes, texte libre, autre devise...).
+
+Le style de la colonne lève les ambiguïtés que l'analyse isolée d'une cellule
+tranche mal : "1234 €" vaut 1 234 €, "1.234,50" et "1,234.50" sont lus selon
+la convention de la colonne.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, Optional
+
+import pandas as pd
+
+from utils.price_engine import (
+    CURRENCY_KB, ZERO_DEC_CURRENCIES, _format_eur_fr, _format_other_currency, normalize_price,
+)
+from utils.text_processing import NBSP, NARROW_NBSP
+
+# Cellules examinées pour déduire la convention d'une colonne
+PRICE_SAMPLE_SIZE = 200
+
+# Nombre entier (tous chiffres) selon le style, décimales comprises
+NUMBER_PATTERNS = {
+    "FR": r"\d{1,3}(?:[ .]\d{3})+(?:,\d+)?|\d+(?:,\d+)?",
+    "US": r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?",
+}
+DECIMAL_SEPARATOR = {"FR": ",", "US": "."}
+
+_PREFIX = r"à\s*partir\s*de|dès|~|≈|env\.?|environ|à partir d'"
+_UNIT = r"/\s*(?:m²|m2|unité|u|kg|g|ml|l|litres?|pa?ck|lot|pi[eè]ce)"
+_TAX = r"t\.?t\.?c\.?|h\.?t\.?"
+
+# Jetons de devise (codes ISO, symboles) -> (code, symbole, position), premier de CURRENCY_KB prioritaire
+CURRENCY_TOKENS = {}
+for _pat, (_code, _symbol, _pos) in CURRENCY_KB:
+    for _token in (_code.lower(), _symbol.lower()):
+        CURRENCY_TOKENS.setdefault(_token, (_code, _symbol, _pos))
+for _token in ("euro", "euros"):
+    CURRENCY_TOKENS[_token] = CURRENCY_TOKENS["eur"]
+CURRENCY_BY_CODE = {info[0]: info for _, info in CURRENCY_KB}
+
+# Cellule quelconque : repérage des jetons pour l'inférence sur l'échantillon
+_TOKEN_ALT = "|".join(re.escape(t) for t in sorted(CURRENCY_TOKENS, key=len, reverse=True))
+_SCAN_RE = re.compile(
+    rf"^(?P<prefix>{_PREFIX})?\s*(?P<cur1>{_TOKEN_ALT})?\s*(?P<num>\d[\d .,]*\d|\d)\s*(?P<cur2>{_TOKEN_ALT})?"
+    rf"\s*(?P<unit>{_UNIT})?\s*(?P<tax>{_TAX})?$",
+    re.IGNORECASE,
+)
+_FR_EVIDENCE = re.compile(r",\d{1,2}$|\d\.\d{3}(?:[.,]|$)")
+_US_EVIDENCE = re.compile(r"\.\d{1,2}$|\d,\d{3}(?:[.,]|$)")
+
+
+class PriceColumnFormat:
+    """Convention d'une colonne de prix"""
+
+    __slots__ = ("style", "currency", "is_ttc", "unit", "pattern")
+
+    def __init__(self, style: str, currency: tuple, is_ttc: bool, unit: Optional[str]):
+        self.style = style              # "FR" ou "US"
+        self.currency = currency        # (code, symbole, position)
+        self.is_ttc = is_ttc            # quand la cellule ne dit rien
+        self.unit = unit                # unité de la colonne ("/kg"...) ou None
+        tokens = [t for t, info in CURRENCY_TOKENS.items() if info[0] == currency[0]]
+        token_alt = "|".join(re.escape(t) for t in sorted(tokens, key=len, reverse=True))
+        unit_alt = rf"/\s*{re.escape(unit[1:].strip())}" if unit else "(?!)"
+        self.pattern = re.compile(
+            rf"^(?P<prefix>{_PREFIX})?\s*(?:{token_alt})?\s*(?P<num>{NUMBER_PATTERNS[style]})\s*(?:{token_alt})?"
+            rf"\s*(?P<unit>{unit_alt})?\s*(?P<tax>{_TAX})?$",
+            re.IGNORECASE,
+        )
+
+    def __repr__(self):
+        return f"PriceColumnFormat({self.style}, {self.currency[0]}, {'TTC' if self.is_ttc else 'HT'}, {self.unit})"
+
+
+def _clean(values: pd.Series) -> pd.Series:
+    """Même nettoyage que normalize_price (espaces insécables, espaces multiples)"""
+    s = values.astype(str).str.replace(NBSP, " ", regex=False).str.replace(NARROW_NBSP, " ", regex=False)
+    return s.str.strip().str.replace(r"\s+", " ", regex=True)
+
+
+def _mode(counter: Counter, default):
+    return counter.most_common(1)[0][0] if counter else default
+
+
+def infer_price_format(values: pd.Series, currency_code: Optional[str] = None, default_is_ttc: bool = True,
+                       sample_size: int = PRICE_SAMPLE_SIZE) -> PriceColumnFormat:
+    """Déduit la convention d'une colonne de prix à partir d'un échantillon
+
+    currency_code: devise de la colonne si connue (colonne CODE_DEVISE)
+    """
+    sample = _clean(values.dropna())
+    sample = sample[sample != ""]
+    if len(sample) > sample_size:
+        sample = sample.sample(sample_size, random_state=0)
+    parts = sample.str.extract(_SCAN_RE)
+    parts = parts[parts["num"].notna()]
+
+    fr = parts["num"].str.contains(_FR_EVIDENCE).sum()
+    us = parts["num"].str.contains(_US_EVIDENCE).sum()
+    style = "US" if us > fr else "FR"
+
+    if currency_code and currency_code.upper() in CURRENCY_BY_CODE:
+        currency = CURRENCY_BY_CODE[currency_code.upper()]
+    else:
+        tokens = pd.concat([parts["cur1"], parts["cur2"]]).dropna().str.lower()
+        currency = CURRENCY_TOKENS[_mode(Counter(tokens), "€")]
+
+    taxes = parts["tax"].dropna().str.lower().str.startswith("t")
+    is_ttc = bool(_mode(Counter(taxes), default_is_ttc)) if len(taxes) * 2 >= len(parts) > 0 else default_is_ttc
+
+    units = parts["unit"].dropna().str.replace(" ", "", regex=False).str.lower()
+    unit = _mode(Counter(units), None)
+    return PriceColumnFormat(style, currency, is_ttc, unit)
+
+
+def _format_value(value: float, currency: tuple, decimals: int) -> str:
+    code, symbol, pos = currency
+    if code == "EUR":
+        return _format_eur_fr(value, decimals)
+    return _format_other_currency(value, code, symbol, pos, decimals)
+
+
+def _normalize_group(values: pd.Series, fmt: PriceColumnFormat, fx_to_eur, min_decimals, max_decimals) -> pd.DataFrame:
+    parts = _clean(values).str.extract(fmt.pattern)
+    matched = parts["num"].notna() & values.map(lambda v: isinstance(v, str)).astype(bool)
+    parts = parts[matched]
+
+    # Nombres : séparateurs de milliers retirés, décimale -> "."
+    num = parts["num"]
+    if fmt.style == "FR":
+        num_clean = num.str.replace(r"[ .]", "", regex=True).str.replace(",", ".", regex=False)
+    else:
+        num_clean = num.str.replace(",", "", regex=False)
+    value = pd.to_numeric(num_clean, errors="coerce").astype(float)
+
+    code = fmt.currency[0]
+    if code in ZERO_DEC_CURRENCIES:
+        decimals = pd.Series(0, index=parts.index)
+    else:
+        had_decimals = num.str.contains(DECIMAL_SEPARATOR[fmt.style], regex=False)
+        decimals = had_decimals.map({True: 2, False: 0}).clip(lower=min_decimals).clip(upper=max_decimals)
+
+    tax = parts["tax"].str.lower().str.startswith("t")
+    is_ttc = tax.where(parts["tax"].notna(), fmt.is_ttc).astype(bool)
+
+    prefix = parts["prefix"].fillna("").str.strip().str.capitalize().str.replace("Env.", "Environ", regex=False)
+    unit = parts["unit"].fillna("").str.strip().str.replace("m2", "m²", regex=False)
+
+    # Mise en forme : une fois par couple (valeur, décimales) distinct
+    formatted = {}
+    texts = []
+    for v, d in zip(value.tolist(), decimals.tolist()):
+        key = (v, d)
+        text = formatted.get(key)
+        if text is None:
+            text = formatted[key] = _format_value(v, fmt.currency, d)
+        texts.append(text)
+    tax_txt = is_ttc.map({True: "TTC", False: "HT"})
+    display = (prefix + " " + pd.Series(texts, index=parts.index, dtype=str) + " " + unit + " " + tax_txt)
+    display = display.str.replace(r"\s+", " ", regex=True).str.strip()
+
+    if code == "EUR":
+        value_eur = value
+    elif fx_to_eur and code in fx_to_eur:
+        value_eur = value * float(fx_to_eur[code])
+    else:
+        value_eur = pd.Series(None, index=parts.index, dtype=object)
+    value_eur = [round(v, d) if v is not None and v == v else None
+                 for v, d in zip(value_eur.tolist(), decimals.tolist())]
+
+    result = pd.DataFrame({"value_eur": value_eur, "is_ttc": is_ttc, "display": display}, index=parts.index)
+    # Valeurs atypiques : analyse cellule par cellule (cellules vides -> None)
+    outliers = values[~matched]
+    outliers = outliers.where(outliers.notna(), None)
+    if len(outliers):
+        fallback = [normalize_price(v, default_is_ttc=fmt.is_ttc, fx_to_eur=fx_to_eur,
+                                    min_decimals=min_decimals, max_decimals=max_decimals)
+                    for v in outliers.tolist()]
+        result = pd.concat([result, pd.DataFrame(fallback, index=outliers.index)])
+    return result
+
+
+def normalize_price_column(
+    values: pd.Series,
+    currencies: Optional[pd.Series] = None,
+    *,
+    default_is_ttc: bool = True,
+    fx_to_eur: Optional[Dict[str, float]] = None,
+    min_decimals: int = 0,
+    max_decimals: int = 2,
+    formats: Optional[Dict[Optional[str], PriceColumnFormat]] = None
+) -> pd.DataFrame:
+    """Normalise une colonne de prix (mêmes champs que normalize_price)
+
+    currencies: colonne CODE_DEVISE alignée sur values (facultative) ; chaque
+        devise est traitée comme une colonne à part.
+    formats: conventions déjà déduites par devise, complétées au fil des appels
+        (colonne lue par blocs : une seule convention pour tous les blocs).
+    Retourne un DataFrame value_eur / is_ttc / display indexé comme values.
+    """
+    values = pd.Series(values, dtype=object) if not isinstance(values, pd.Series) else values.astype(object)
+    if values.empty:
+        return pd.DataFrame(columns=["value_eur", "is_ttc", "display"], index=values.index)
+    if currencies is None:
+        groups = [(None, values)]
+    else:
+        codes = pd.Series(currencies, index=values.index).fillna("").astype(str).str.strip().str.upper()
+        groups = [(code or None, group) for code, group in values.groupby(codes, sort=False)]
+
+    results = []
+    for code, group in groups:
+        fmt = formats.get(code) if formats is not None else None
+        if fmt is None:
+            fmt = infer_price_format(group, code, default_is_ttc)
+            if formats is not None:
+                formats[code] = fmt
+        results.append(_normalize_group(group, fmt, fx_to_eur, min_decimals, max_decimals))
+    result = pd.concat(results).reindex(values.index)
+    result["value_eur"] = result["value_eur"].astype(object).where(result["value_eur"].notna(), None)
+    return result
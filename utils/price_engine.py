@@ -0,0 +1,350 @@
+# utils/price_engine.py
+"""
+Normalisation des prix pour l'affichage FR (valeur en EUR, TTC/HT, devise, unité).
+
+Tous les motifs sont compilés une fois au chargement : TTC et HT forment
+chacun une seule alternative ; devises et unités restent des listes ordonnées
+(le premier motif présent l'emporte). Les résultats sont mémorisés par
+(texte, options) et normalize_prices() n'analyse qu'une fois chaque texte
+distinct d'une colonne.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional
+
+from utils.text_processing import NBSP, NARROW_NBSP, _strip_spaces
+
+# Taille du mémo des prix normalisés (valeurs distinctes)
+PRICE_MEMO_SIZE = 8192
+
+TTC_PATTERNS = [
+    r"\bttc\b", r"\bt\.?t\.?c\.?\b", r"tva incl", r"tvaincluse", r"inclus[ea]? tva",
+    r"toutes taxes? (comprises?|incluse?s?)"
+]
+HT_PATTERNS = [
+    r"\bht\b", r"\bh\.?t\.?\b", r"hors taxe?s?\b", r"hors tva\b", r"sans tva\b"
+]
+
+# Ordre important: m² avant m2, etc.
+UNIT_PATTERNS = [
+    r"/\s*m²", r"/\s*m2", r"/\s*u", r"/\s*unité", r"/\s*kg", r"/\s*g",
+    r"/\s*l", r"/\s*litre?s?", r"/\s*pa?ck", r"/\s*lot", r"/\s*ml", r"/\s*pi[eè]ce"
+]
+
+# Certaines devises n'ont pas de décimales usuelles
+ZERO_DEC_CURRENCIES = {
+    "JPY", "KRW", "VND", "CLP", "ISK", "HUF"  # (HUF/ISK historiquement 0, gardez si ça vous convient)
+}
+
+# Base de connaissance devise: regex -> (code, symbole, position "prefix"/"suffix")
+# L'ordre compte: entrées plus spécifiques d'abord.
+CURRENCY_KB = [
+    (r"\b(xpf|cfp)\b",         ("XPF", "XPF", "suffix")),
+    (r"\b(xof|cfa)\b",         ("XOF", "CFA", "suffix")),
+    (r"\b(xaf|cfa)\b",         ("XAF", "CFA", "suffix")),
+    (r"\b(mad|dh)\b",          ("MAD", "DH",  "suffix")),
+    (r"\b(dzd)\b",             ("DZD", "DZD", "suffix")),
+    (r"\b(tnd)\b",             ("TND", "TND", "suffix")),
+    (r"\b(chf|sfr|fr\.)\b",    ("CHF", "CHF", "suffix")),
+    (r"\b(gbp|£)\b|£",         ("GBP", "£",   "prefix")),
+    (r"\b(usd)\b|\$",          ("USD", "$",   "prefix")),
+    (r"\b(cad)\b|cad\$",       ("CAD", "C$",  "prefix")),
+    (r"\b(aud)\b|au\$",        ("AUD", "A$",  "prefix")),
+    (r"\b(nzd)\b|nz\$",        ("NZD", "NZ$", "prefix")),
+    (r"\b(jpy|¥|￥)\b|¥|￥",   ("JPY", "¥",   "prefix")),
+    (r"\b(cny|rmb)\b|¥|￥",    ("CNY", "¥",   "prefix")),
+    (r"\b(hkd)\b",             ("HKD", "HK$", "prefix")),
+    (r"\b(sgd)\b",             ("SGD", "S$",  "prefix")),
+    (r"\b(sek)\b|kr\b",        ("SEK", "kr",  "suffix")),
+    (r"\b(nok)\b|kr\b",        ("NOK", "kr",  "suffix")),
+    (r"\b(dkk)\b|kr\b",        ("DKK", "kr",  "suffix")),
+    (r"\b(pln)\b|zł",          ("PLN", "zł",  "suffix")),
+    (r"\b(czk)\b|kč",          ("CZK", "Kč",  "suffix")),
+    (r"\b(huf)\b|ft\b",        ("HUF", "Ft",  "suffix")),
+    (r"\b(ron|lei|leu)\b",     ("RON", "lei", "suffix")),
+    (r"\b(bgn)\b|лв\.?",       ("BGN", "лв",  "suffix")),
+    (r"\b(try)\b|₺",           ("TRY", "₺",   "suffix")),
+    (r"\b(uah)\b|₴",           ("UAH", "₴",   "suffix")),
+    (r"\b(rub)\b|₽",           ("RUB", "₽",   "suffix")),
+    (r"\b(inr)\b|₹|rs\.?",     ("INR", "₹",   "prefix")),
+    (r"\b(aed)\b|د\.?إ\.?",    ("AED", "AED", "suffix")),
+    (r"\b(sar)\b|ر\.?س\.?",    ("SAR", "SAR", "suffix")),
+    (r"\b(qar)\b",             ("QAR", "QAR", "suffix")),
+    (r"\b(brl)\b|r\$",         ("BRL", "R$",  "prefix")),
+    (r"\b(mxn)\b",             ("MXN", "MX$", "prefix")),
+    (r"\b(ars)\b",             ("ARS", "AR$", "prefix")),
+    (r"\b(cop)\b",             ("COP", "COL$", "prefix")),
+    (r"\b(zar)\b|r\b",         ("ZAR", "R",   "prefix")),
+    (r"\b(ils|nis)\b|₪",       ("ILS", "₪",   "prefix")),
+    (r"\b(php)\b|₱",           ("PHP", "₱",   "prefix")),
+    (r"\b(thb)\b|฿",           ("THB", "฿",   "prefix")),
+    (r"\b(vnd)\b|₫",           ("VND", "₫",   "suffix")),
+    (r"\b(kwd)\b",             ("KWD", "KWD", "suffix")),
+    (r"\b(omr)\b",             ("OMR", "OMR", "suffix")),
+    (r"\b(bhd)\b",             ("BHD", "BHD", "suffix")),
+    # EUR en dernier (par défaut en contexte FR)
+    (r"€|\beur\b|\beuro?s?\b", ("EUR", "€",   "suffix")),
+]
+
+
+
+_TTC_RE = re.compile("|".join(f"(?:{p})" for p in TTC_PATTERNS))
+_HT_RE = re.compile("|".join(f"(?:{p})" for p in HT_PATTERNS))
+# Devises et unités : le premier motif de la liste présent l'emporte (ordre = priorité)
+_CURRENCY_RES = [(re.compile(pat, re.UNICODE), info) for pat, info in CURRENCY_KB]
+_UNIT_RES = [re.compile(pat) for pat in UNIT_PATTERNS]
+_PREFIX_RE = re.compile(r"(?i)\s*(à\s*partir\s*de|dès|~|≈|env\.?|environ|à partir d')\s*", re.UNICODE)
+_FREE_RE = re.compile(r"(?i)\b(gratuit|offert|inclus)\b")
+# Nombres FR: mille: espace/point, décimale: virgule ; US: "1,234.56"
+_NUM_FR_RE = re.compile(r"\d{1,3}(?:[ .]\d{3})*(?:,\d+)?|\d+(?:,\d+)?")
+_NUM_US_RE = re.compile(r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?")
+_US_THOUSANDS_RE = re.compile(r"\d,\d{3}\.")
+
+
+def _detect_ttc_flag(s_low: str) -> Optional[bool]:
+    # True si TTC/T.V.A incluse détecté, False si HT détecté, None sinon
+    if _TTC_RE.search(s_low):
+        return True
+    if _HT_RE.search(s_low):
+        return False
+    return None
+
+def _detect_currency(raw: str) -> tuple[str, str, str]:
+    """
+    Retourne (code, symbole, position) avec position in {"prefix","suffix"}.
+    Par défaut EUR si rien détecté (contexte FR).
+    """
+    s = raw.lower()
+    for pattern, info in _CURRENCY_RES:
+        if pattern.search(s):
+            return info
+    return "EUR", "€", "suffix"
+
+def _extract_unit(raw: str) -> str:
+    # Extrait un suffixe d'unité typique pour l'affichage
+    s = raw.lower()
+    for pattern in _UNIT_RES:
+        m = pattern.search(s)
+        if m:
+            # Récupère exactement comme écrit dans la source (utilise l'index trouvé)
+            start, end = m.span()
+            return raw[start:end].strip()
+    return ""
+
+def _extract_prefix(raw: str) -> str:
+    m = _PREFIX_RE.match(raw.strip())
+    return m.group(0).strip() if m else ""
+
+def _find_numbers(raw: str):
+    # Capture nombres FR: mille: espace/point, décimale: virgule
+    # Ex: "1 234,56" "1.234,56" "1234,56" "12,5" "12"
+    # On autorise aussi le format US si clairement utilisé: "1,234.56"
+    s = raw.replace(NBSP, " ").replace(NARROW_NBSP, " ")
+    nums_fr = _NUM_FR_RE.findall(s)
+    # Heuristique: si présence d'une virgule décimale, on privilégie FR
+    if any("," in n for n in nums_fr):
+        return nums_fr, "FR"
+    # Sinon si présence de points décimaux et virgules de milliers, on bascule US
+    nums_us = _NUM_US_RE.findall(s)
+    if any(_US_THOUSANDS_RE.search(n) or "." in n for n in nums_us):
+        return nums_us, "US"
+    # Par défaut FR
+    return nums_fr if nums_fr else nums_us, "FR"
+
+def _to_float(num_str: str, style: str) -> Optional[float]:
+    try:
+        s = num_str.replace(" ", "").replace(".", "") if style == "FR" else num_str.replace(",", "")
+        s = s.replace(",", ".")
+        return float(s)
+    except Exception:
+        return None
+
+def _format_eur_fr(value: float, decimals: int = 2) -> str:
+    if value is None:
+        return ""
+    s = f"{value:,.{decimals}f}"
+    s = s.replace(",", "X").replace(".", ",").replace("X", NARROW_NBSP)
+    if decimals > 0 and s.endswith(",00"):
+        s = s[:-3]
+    return f"{s} €"
+
+def _format_other_currency(value: float, code: str, symbol: str, pos: str, decimals: int) -> str:
+    if value is None:
+        return ""
+    # Format FR: séparateur milliers fine insécable, virgule décimale
+    s = f"{value:,.{decimals}f}".replace(",", "X").replace(".", ",").replace("X", NARROW_NBSP)
+    if decimals > 0 and s.endswith(",00"):
+        s = s[:-3]
+    if pos == "prefix":
+        return f"{symbol}{s}"
+    else:
+        # espace fine insécable avant un suffixe
+        return f"{s}{NARROW_NBSP}{symbol}"
+
+def _normalize_price(
+    raw_price: Any,
+    *,
+    default_is_ttc: bool = True,
+    fx_to_eur: Optional[Dict[str, float]] = None,   # ex: {"USD": 0.92, "GBP": 1.17}
+    min_decimals: int = 0,
+    max_decimals: int = 2
+) -> Dict[str, Any]:
+    """
+    Normalise un prix pour affichage FR + valeur numérique en EUR.
+    - raw_price: str ou nombre
+    - default_is_ttc: si TTC/HT non détecté dans le texte
+    - fx_to_eur: taux (1 unité devise -> EUR). Si devise != EUR et taux absent: value_eur=None, display conservé.
+    - min/max_decimals: pour l'affichage (ex: 12,5 -> 12,50 si min_decimals=2)
+    """
+    # Cas numériques directs
+    if isinstance(raw_price, (int, float)):
+        value = float(raw_price)
+        display = _format_eur_fr(value, decimals=max_decimals)
+        return {
+            "value_eur": round(value, max_decimals),
+            "is_ttc": default_is_ttc,
+            "display": (display + (" TTC" if default_is_ttc else " HT"))
+        }
+
+    raw = _strip_spaces(str(raw_price) if raw_price is not None else "")
+    if raw == "":
+        return {"value_eur": None, "is_ttc": default_is_ttc, "display": ""}
+
+    # Gratuit / Offert
+    if _FREE_RE.search(raw):
+        # On suppose TTC pour l'affichage si non spécifié
+        disp = "Gratuit"
+        return {"value_eur": 0.0, "is_ttc": True if _detect_ttc_flag(raw.lower()) is not False else False, "display": disp}
+
+    s_low = raw.lower()
+    is_ttc = _detect_ttc_flag(s_low)
+    if is_ttc is None:
+        is_ttc = default_is_ttc
+
+    currency_code, currency_symbol, currency_pos = _detect_currency(raw)
+    unit = _extract_unit(raw)
+    prefix = _extract_prefix(raw)
+
+    # Intervalles / "de … à …"
+    # On récupère tous les nombres, on garde le min comme value_eur
+    nums, style = _find_numbers(raw)
+    values = [_to_float(n, style) for n in nums if n is not None]
+    values = [v for v in values if v is not None]
+
+    value_num = None
+    is_range = False
+    if len(values) == 0:
+        # Rien de solide trouvé: on renvoie l'affichage nettoyé
+        return {"value_eur": None, "is_ttc": is_ttc, "display": raw}
+    elif len(values) == 1:
+        value_num = values[0]
+    else:
+        is_range = True
+        value_num = min(values)
+
+    # Conversion devise -> EUR si nécessaire
+    value_eur: Optional[float]
+    if currency_code == "EUR":
+        value_eur = value_num
+    else:
+        if fx_to_eur and currency_code in fx_to_eur:
+            value_eur = value_num * float(fx_to_eur[currency_code])
+        else:
+            value_eur = None  # on ne sait pas convertir
+
+    # Décimales d'affichage: respecte min/max
+    # Détermine si l'original avait des décimales ou si la devise n'utilise pas de décimales
+    had_decimals = any(("," in n or "." in n) for n in nums)
+    if currency_code in ZERO_DEC_CURRENCIES:
+        decimals = 0
+    else:
+        decimals = max(min_decimals, 2 if had_decimals else 0)
+        decimals = min(decimals, max_decimals)
+
+    # Reconstruction de l'affichage
+    # Texte prix:
+    if currency_code == "EUR":
+        if is_range and len(values) >= 2:
+            txt = f"{_format_eur_fr(min(values), decimals)} – {_format_eur_fr(max(values), decimals)}"
+        else:
+            txt = _format_eur_fr(value_num, decimals)
+    else:
+        # Autre devise: utilise la nouvelle fonction de formatage
+        if is_range and len(values) >= 2:
+            txt = f"{_format_other_currency(min(values), currency_code, currency_symbol, currency_pos, decimals)} – {_format_other_currency(max(values), currency_code, currency_symbol, currency_pos, decimals)}"
+        else:
+            txt = _format_other_currency(value_num, currency_code, currency_symbol, currency_pos, decimals)
+
+    # Suffixes TTC/HT
+    tax_txt = "TTC" if is_ttc else "HT"
+
+    # Assemble display
+    parts = []
+    if prefix:
+        # Majuscule et apostrophe typographique
+        pref = prefix.strip().capitalize().replace("'", "'")
+        # Normalise quelques variantes
+        pref = pref.replace("Env.", "Environ")
+        parts.append(pref)
+    parts.append(txt)
+    if unit:
+        parts.append(unit.replace(" ", " ").replace("m2", "m²"))  # m2 -> m² pour l'esthétique
+    parts.append(tax_txt)
+    display = " ".join(p for p in parts if p).strip()
+
+    return {
+        "value_eur": round(value_eur, decimals) if value_eur is not None else None,
+        "is_ttc": is_ttc,
+        "display": display
+    }
+
+
+@lru_cache(maxsize=PRICE_MEMO_SIZE)
+def _normalize_memo(raw_price, default_is_ttc, fx_items, min_decimals, max_decimals):
+    result = _normalize_price(raw_price, default_is_ttc=default_is_ttc, fx_to_eur=dict(fx_items) if fx_items else None,
+                              min_decimals=min_decimals, max_decimals=max_decimals)
+    return result["value_eur"], result["is_ttc"], result["display"]
+
+def normalize_price(
+    raw_price: Any,
+    *,
+    default_is_ttc: bool = True,
+    fx_to_eur: Optional[Dict[str, float]] = None,   # ex: {"USD": 0.92, "GBP": 1.17}
+    min_decimals: int = 0,
+    max_decimals: int = 2
+) -> Dict[str, Any]:
+    """
+    Normalise un prix pour affichage FR + valeur numérique en EUR.
+    - raw_price: str ou nombre
+    - default_is_ttc: si TTC/HT non détecté dans le texte
+    - fx_to_eur: taux (1 unité devise -> EUR). Si devise != EUR et taux absent: value_eur=None, display conservé.
+    - min/max_decimals: pour l'affichage (ex: 12,5 -> 12,50 si min_decimals=2)
+
+    Les textes sont mémorisés par (texte, options) ; chaque appel renvoie un nouveau dict.
+    """
+    if not isinstance(raw_price, str):
+        # Nombres, None : pas d'analyse de texte, rien à mémoriser
+        return _normalize_price(raw_price, default_is_ttc=default_is_ttc, fx_to_eur=fx_to_eur,
+                                min_decimals=min_decimals, max_decimals=max_decimals)
+    fx_items = tuple(sorted(fx_to_eur.items())) if fx_to_eur else None
+    value_eur, is_ttc, display = _normalize_memo(str(raw_price), default_is_ttc, fx_items, min_decimals, max_decimals)
+    return {"value_eur": value_eur, "is_ttc": is_ttc, "display": display}
+
+def normalize_prices(values: Iterable[Any], **options) -> list:
+    """normalize_price sur une colonne (Series, liste...) : chaque texte distinct n'est analysé qu'une fois
+
+    options: mêmes paramètres nommés que normalize_price.
+    Retourne la liste des résultats (nouveaux dicts), dans l'ordre des valeurs.
+    """
+    seen = {}
+    results = []
+    for value in values:
+        if isinstance(value, str):
+            result = seen.get(value)
+            if result is None:
+                result = seen[value] = normalize_price(value, **options)
+            results.append(dict(result))
+        else:
+            results.append(normalize_price(value, **options))
+    return results
@@ -0,0 +1,110 @@
+# utils/product_store.py
+"""
+Produits prêts pour le rendu, sous forme compacte.
+
+Les cartes n'affichent que quelques champs (titre, prix, description,
+référence, quantité, matière) ; selon l'export ils viennent de colonnes aux
+noms différents ("title" ou "TITRE", "Ref" ou "RÉFÉRENCE"...). Plutôt qu'un
+dict par produit avec toutes les colonnes choisies, chaque produit est un
+ProductRecord à __slots__ : la colonne de chaque champ est résolue une fois
+pour tout le DataFrame (PRODUCT_FIELDS), les textes sont tronqués colonne
+entière, et les autres colonnes ne sont pas gardées.
+"""
+
+from itertools import repeat
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+# Caractères maximum par champ de produit (au-delà : tronqué avec "...")
+PRODUCT_MAX_CHARS = 800
+
+# Prix déjà mis en forme pour toute la colonne (utils.price_columns), prioritaire sur le prix brut
+PRICE_DISPLAY_FIELD = "_prix_affiche"
+
+# Champ -> colonnes possibles, par ordre de priorité
+PRODUCT_FIELDS = {
+    "title": ("title", "TITRE"),
+    "price": ("price", "PRIX"),
+    "currency": ("CODE_DEVISE", "currency"),
+    "description": ("description", "DESCRIPTION"),
+    "ref": ("Ref", "ref", "RÉFÉRENCE"),
+    "quantity": ("Quantité", "quantity", "QUANTITÉ"),
+    "material": ("Matériaux", "material", "MATÉRIAUX"),
+    "price_display": (PRICE_DISPLAY_FIELD,),
+}
+
+
+class ProductRecord:
+    """Champs affichés d'un produit (None : colonne absente)"""
+
+    __slots__ = tuple(PRODUCT_FIELDS)
+
+    def __init__(self, title=None, price=None, currency=None, description=None, ref=None, quantity=None,
+                 material=None, price_display=None):
+        self.title = title
+        self.price = price
+        self.currency = currency
+        self.description = description
+        self.ref = ref
+        self.quantity = quantity
+        self.material = material
+        self.price_display = price_display
+
+    @classmethod
+    def from_dict(cls, product: dict) -> "ProductRecord":
+        """Produit dict (colonnes de l'export) -> champs affichés"""
+        values = []
+        for names in PRODUCT_FIELDS.values():
+            value = None
+            for name in names:
+                if name in product:
+                    value = product[name]
+                    break
+            values.append(value)
+        return cls(*values)
+
+    def values(self) -> list:
+        return [getattr(self, name) for name in self.__slots__]
+
+    def __getstate__(self):
+        return self.values()
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return f"ProductRecord({self.title!r}, {self.price!r})"
+
+
+def as_record(product) -> ProductRecord:
+    """ProductRecord tel quel, dict converti"""
+    return product if isinstance(product, ProductRecord) else ProductRecord.from_dict(product)
+
+
+def product_columns(columns) -> Dict[str, Optional[str]]:
+    """Champ -> colonne du DataFrame qui le fournit (None si aucune)"""
+    present = set(columns)
+    return {field: next((name for name in names if name in present), None)
+            for field, names in PRODUCT_FIELDS.items()}
+
+
+def text_frame(frame: pd.DataFrame, max_chars: int = PRODUCT_MAX_CHARS) -> pd.DataFrame:
+    """Colonnes en texte : cellules vides -> "", champs tronqués avec "..." """
+    frame = frame.fillna("").astype(str)
+    for name in frame.columns:
+        column = frame[name]
+        too_long = column.str.len() > max_chars
+        if too_long.any():
+            frame[name] = column.mask(too_long, column.str[:max_chars - 3] + "...")
+    return frame
+
+
+def product_store(frame: pd.DataFrame, max_chars: int = PRODUCT_MAX_CHARS) -> List[ProductRecord]:
+    """Lignes -> produits compacts pour le rendu (seules les colonnes affichées sont lues)"""
+    columns = product_columns(frame.columns)
+    used = [name for name in columns.values() if name is not None]
+    text = text_frame(frame[used], max_chars)
+    arrays = [text[name].tolist() if name is not None else repeat(None) for name in columns.values()]
+    return [ProductRecord(*values) for values in zip(*arrays)] if used else [ProductRecord() for _ in range(len(frame))]
@@ -0,0 +1,145 @@
+# utils/product_stream.py
+"""
+Lecture en flux des gros exports produits.
+
+ProductStream lit l'export par blocs de lignes (moteur C de pandas, format
+déduit par utils.csv_sniffer) : seul le premier bloc reste en mémoire, pour
+l'aperçu et la détection des colonnes. Itérer sur le flux relit le fichier
+bloc par bloc et rend des produits prêts pour le rendu (utils.product_store) ;
+le rendu (pdf_designer) les consomme par fenêtres de pages.
+
+Les valeurs sont lues comme texte, telles qu'écrites dans l'export : le type
+d'une colonne ne dépend pas du bloc (pas de "12" dans un bloc, "12.0" dans le
+suivant).
+"""
+
+import copy
+import io
+import os
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+from utils.csv_sniffer import CsvDialect, CsvSource, sniff_csv
+from utils.product_store import PRODUCT_MAX_CHARS, ProductRecord, product_store
+
+# Taille d'upload à partir de laquelle l'export est lu en flux
+STREAM_MIN_BYTES = 20_000_000
+
+# Lignes par bloc lu
+STREAM_CHUNK_ROWS = 5000
+
+class ProductStream:
+    """Export produits lu par blocs ; itérable plusieurs fois (produits), de longueur connue"""
+
+    def __init__(self, source: CsvSource, dialect: Optional[CsvDialect] = None,
+                 chunk_rows: int = STREAM_CHUNK_ROWS, max_chars: int = PRODUCT_MAX_CHARS):
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = bytes(source)
+        self.source = source
+        self._start = source.tell() if hasattr(source, "seek") else None
+        self.dialect = dialect or sniff_csv(source)
+        self.chunk_rows = chunk_rows
+        self.max_chars = max_chars
+        self.columns_selected = None
+        self.limit = 0
+        self.head, self._rows = self._scan()
+
+    def _open(self):
+        if isinstance(self.source, bytes):
+            return io.BytesIO(self.source)
+        if isinstance(self.source, (str, os.PathLike)):
+            return open(self.source, "rb")
+        self.source.seek(self._start)
+        return self.source
+
+    def _reader(self):
+        handle = self._open()
+        options = self.dialect.read_options("c")
+        reader = pd.read_csv(handle, engine="c", dtype=str, on_bad_lines="skip", chunksize=self.chunk_rows, **options)
+        return handle, reader
+
+    def _close(self, handle):
+        if handle is not self.source:
+            handle.close()
+
+    def _scan(self):
+        """Premier bloc (toutes colonnes) et nombre de lignes"""
+        try:
+            return self._scan_once()
+        except UnicodeDecodeError:
+            if self.dialect.encoding != "utf-8":
+                raise
+            # Octets non UTF-8 au-delà des extraits examinés par le sniffer
+            self.dialect.encoding = "cp1252"
+            return self._scan_once()
+
+    def _first_chunk(self):
+        handle, reader = self._reader()
+        try:
+            with reader:
+                return next(iter(reader), None)
+        finally:
+            self._close(handle)
+
+    def _scan_once(self):
+        head = self._first_chunk()
+        if head is None or head.empty:
+            raise ValueError("Export vide : aucune ligne de produit")
+        # Comptage avec les mêmes options que frames() : les lignes invalides sautées à la lecture
+        # ne sont pas comptées
+        handle, reader = self._reader()
+        rows = 0
+        try:
+            with reader:
+                for chunk in reader:
+                    rows += len(chunk)
+        finally:
+            self._close(handle)
+        print(f"[CSV] Export lu en flux : {rows} lignes, {len(head.columns)} colonnes ({self.dialect})")
+        return head, rows
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.columns_selected or self.head.columns)
+
+    def select(self, columns: Optional[List[str]] = None, limit: int = 0) -> "ProductStream":
+        """Vue du flux limitée à des colonnes et aux limit premières lignes (0 = toutes)"""
+        view = copy.copy(self)
+        view.columns_selected = list(columns) if columns else self.columns_selected
+        view.limit = limit or self.limit
+        return view
+
+    def with_source(self, source: Optional[CsvSource]) -> "ProductStream":
+        """Même flux (format, premier bloc et nombre de lignes connus) sur une source au contenu identique"""
+        view = copy.copy(self)
+        view.source = bytes(source) if isinstance(source, (bytearray, memoryview)) else source
+        view._start = source.tell() if hasattr(source, "seek") else None
+        return view
+
+    def __len__(self):
+        return min(self._rows, self.limit) if self.limit else self._rows
+
+    def frames(self) -> Iterator[pd.DataFrame]:
+        """Blocs de lignes (colonnes choisies, limite appliquée)"""
+        remaining = len(self)
+        # Toutes les colonnes, puis projection : avec usecols, pandas ne sauterait plus les lignes
+        # à trop de champs, que _scan_once n'a pas comptées
+        handle, reader = self._reader()
+        try:
+            with reader:
+                for chunk in reader:
+                    if self.columns_selected:
+                        chunk = chunk[self.columns_selected]
+                    if len(chunk) > remaining:
+                        chunk = chunk.head(remaining)
+                    remaining -= len(chunk)
+                    yield chunk
+                    if remaining <= 0:
+                        break
+        finally:
+            self._close(handle)
+
+    def __iter__(self) -> Iterator[ProductRecord]:
+        for frame in self.frames():
+            yield from product_store(frame, self.max_chars)
@@ -0,0 +1,159 @@
+# utils/rate_control.py
+"""
+Limiteur de débit adaptatif, par hôte.
+
+AIMD : le débit d'un hôte augmente d'un pas fixe tant que ses réponses sont
+saines, et il est divisé dès qu'il renvoie 429/503 ou que sa latence s'envole.
+Un Retry-After ne met en pause que la file de cet hôte ; les autres continuent.
+Les débits appris sont sauvegardés entre deux exécutions.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from utils.image_cache import atomic_write_bytes
+
+THROTTLE_STATUSES = (429, 503)
+STATE_MAX_AGE = 7 * 24 * 3600  # on oublie les débits appris il y a plus d'une semaine
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """Retry-After en secondes (entier ou date HTTP), ou None"""
+    if not value:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateLimiter:
+    """Débit par hôte ajusté selon les réponses du serveur (thread-safe)
+
+    Args:
+        initial_rate: débit (req/s) d'un hôte inconnu
+        min_rate, max_rate: bornes du débit
+        increase: pas additif après une réponse saine
+        decrease: facteur multiplicatif après 429/503 ou latence anormale
+        latency_factor: latence > facteur x moyenne = signe de saturation
+        state_path: fichier JSON de persistance des débits appris
+    """
+
+    def __init__(self, initial_rate=1.0, min_rate=0.1, max_rate=8.0, increase=0.25,
+                 decrease=0.5, latency_factor=3.0, state_path=None):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self._rate = {}          # hôte -> req/s
+        self._latency = {}       # hôte -> moyenne mobile de la latence (s)
+        self._next_slot = {}     # hôte -> prochain instant d'envoi autorisé
+        self._paused_until = {}  # hôte -> fin de pause (Retry-After)
+        self._dirty = 0
+        self._load()
+
+    def rate_for(self, host: str) -> float:
+        with self._lock:
+            return self._rate.get(host, self.initial_rate)
+
+    def wait(self, host: str):
+        """Bloque jusqu'au prochain créneau de cet hôte (n'affecte pas les autres hôtes)"""
+        with self._lock:
+            now = time.time()
+            rate = self._rate.get(host, self.initial_rate)
+            start = max(now, self._next_slot.get(host, 0.0), self._paused_until.get(host, 0.0))
+            self._next_slot[host] = start + 1.0 / rate
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay + random.uniform(0, 0.05))
+
+    def record(self, host: str, status: Optional[int] = None, latency: Optional[float] = None,
+               retry_after: Optional[float] = None):
+        """Retour d'expérience d'une requête : status None = erreur réseau/timeout"""
+        with self._lock:
+            rate = self._rate.get(host, self.initial_rate)
+            avg = self._latency.get(host)
+            throttled = status in THROTTLE_STATUSES or status is None
+            slow = latency is not None and avg is not None and latency > max(0.5, self.latency_factor * avg)
+
+            if throttled or slow:
+                rate = max(self.min_rate, rate * self.decrease)
+            elif status is not None and status < 400:
+                rate = min(self.max_rate, rate + self.increase)
+            self._rate[host] = rate
+
+            if latency is not None and not throttled:
+                self._latency[host] = latency if avg is None else 0.8 * avg + 0.2 * latency
+            if retry_after:
+                # Pause de cet hôte uniquement
+                self._paused_until[host] = max(self._paused_until.get(host, 0.0), time.time() + retry_after)
+            self._dirty += 1
+            should_save = self._dirty >= 20
+        if should_save:
+            self.save()
+
+    def snapshot(self) -> dict:
+        """État courant par hôte (diagnostic)"""
+        with self._lock:
+            now = time.time()
+            return {
+                host: {
+                    "rate": round(rate, 3),
+                    "latency": round(self._latency.get(host, 0.0), 3),
+                    "paused_for": round(max(0.0, self._paused_until.get(host, 0.0) - now), 1),
+                }
+                for host, rate in self._rate.items()
+            }
+
+    def _load(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for host, entry in state.items():
+            if now - entry.get("updated", 0) > STATE_MAX_AGE:
+                continue
+            self._rate[host] = min(self.max_rate, max(self.min_rate, float(entry.get("rate", self.initial_rate))))
+            if entry.get("latency"):
+                self._latency[host] = float(entry["latency"])
+
+    def save(self):
+        """Sauvegarde atomique des débits appris"""
+        if not self.state_path:
+            return
+        # Fusion avec l'état écrit par les autres processus (hôtes que l'on n'a pas vus)
+        state = {}
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            pass
+        with self._lock:
+            now = time.time()
+            state.update({
+                host: {"rate": rate, "latency": self._latency.get(host), "updated": now}
+                for host, rate in self._rate.items()
+            })
+            self._dirty = 0
+        try:
+            atomic_write_bytes(self.state_path, json.dumps(state).encode("utf-8"))
+        except OSError:
+            pass
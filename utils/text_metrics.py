@@ -0,0 +1,135 @@
+# utils/text_metrics.py
+"""
+Mesure de texte à partir des métriques des polices ReportLab.
+
+Les largeurs de glyphes sont mises en cache par police (en millièmes de
+cadratin, comme dans les fichiers AFM) puis mises à l'échelle par taille :
+mesurer un texte revient à sommer des entrées de dictionnaire, sans appeler
+stringWidth sur des chaînes entières à répétition.
+
+- truncate : sommes préfixes + recherche dichotomique de la coupure
+- wrap : retour à la ligne par largeur réelle, en un seul passage sur les mots
+"""
+
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from typing import Optional
+
+from reportlab.pdfbase import pdfmetrics
+
+ELLIPSIS = "..."
+
+_glyph_widths = {}      # police -> {caractère: largeur pour une taille de 1000}
+
+
+def _font_table(font_name: str) -> dict:
+    table = _glyph_widths.get(font_name)
+    if table is None:
+        table = _glyph_widths[font_name] = {}
+    return table
+
+
+class FontMetrics:
+    """Largeurs de texte pour une police et une taille données"""
+
+    __slots__ = ("font_name", "font_size", "_table", "_scale")
+
+    def __init__(self, font_name: str, font_size: float):
+        self.font_name = font_name
+        self.font_size = font_size
+        self._table = _font_table(font_name)
+        self._scale = font_size / 1000.0
+
+    def _units(self, ch: str) -> float:
+        w = self._table.get(ch)
+        if w is None:
+            w = self._table[ch] = pdfmetrics.stringWidth(ch, self.font_name, 1000)
+        return w
+
+    def width(self, text: str) -> float:
+        """Largeur du texte en points"""
+        table = self._table
+        units = 0.0
+        for ch in text:
+            w = table.get(ch)
+            units += w if w is not None else self._units(ch)
+        return units * self._scale
+
+    def prefix_widths(self, text: str) -> list:
+        """Largeurs (points) des préfixes text[:1], text[:2], ..."""
+        scale = self._scale
+        return [u * scale for u in accumulate(self._units(ch) for ch in text)]
+
+    def fit(self, text: str, max_width: float) -> int:
+        """Nombre de caractères du plus long préfixe qui tient dans max_width"""
+        return bisect_right(self.prefix_widths(text), max_width)
+
+    def truncate(self, text: str, max_width: float, ellipsis: str = ELLIPSIS) -> str:
+        """Texte inchangé s'il tient, sinon le plus long préfixe suivi de ellipsis"""
+        prefix = self.prefix_widths(text)
+        if not prefix or prefix[-1] <= max_width:
+            return text
+        room = max_width - self.width(ellipsis)
+        if room < 0:
+            return ellipsis
+        return text[:bisect_right(prefix, room)].rstrip() + ellipsis
+
+    def wrap(self, text: str, max_width: float, max_lines: Optional[int] = None,
+             ellipsis: Optional[str] = None) -> list:
+        """Découpe le texte en lignes de largeur <= max_width (coupure aux espaces)
+
+        Un mot plus large qu'une ligne est coupé. Au-delà de max_lines, le reste
+        est abandonné ; avec ellipsis, la dernière ligne se termine alors par ellipsis.
+        """
+        space = self.width(" ")
+        lines = []
+        cur, cur_width = [], 0.0
+        words = text.split()
+        for n, word in enumerate(words):
+            w = self.width(word)
+            if cur and cur_width + space + w <= max_width:
+                cur.append(word)
+                cur_width += space + w
+                continue
+            if cur:
+                lines.append(" ".join(cur))
+                if max_lines is not None and len(lines) >= max_lines:
+                    return self._close(lines, words[n:], max_width, ellipsis)
+            # Mot trop long : coupé en morceaux qui tiennent sur une ligne
+            while w > max_width and len(word) > 1:
+                cut = max(1, self.fit(word, max_width))
+                lines.append(word[:cut])
+                if max_lines is not None and len(lines) >= max_lines:
+                    return self._close(lines, [word[cut:]] + words[n + 1:], max_width, ellipsis)
+                word = word[cut:]
+                w = self.width(word)
+            cur, cur_width = [word], w
+        if cur:
+            lines.append(" ".join(cur))
+        return lines
+
+    def _close(self, lines, rest, max_width, ellipsis):
+        if ellipsis is not None and rest:
+            lines[-1] = self.truncate(f"{lines[-1]} {rest[0]}", max_width, ellipsis)
+        return lines
+
+
+@lru_cache(maxsize=64)
+def font_metrics(font_name: str, font_size: float) -> FontMetrics:
+    """FontMetrics partagé par (police, taille)"""
+    return FontMetrics(font_name, font_size)
+
+
+def string_width(text: str, font_name: str, font_size: float) -> float:
+    return font_metrics(font_name, font_size).width(text)
+
+
+def truncate_to_width(text: str, max_width: float, font_name: str, font_size: float,
+                      ellipsis: str = ELLIPSIS) -> str:
+    return font_metrics(font_name, font_size).truncate(text, max_width, ellipsis)
+
+
+def wrap_to_width(text: str, max_width: float, font_name: str, font_size: float,
+                  max_lines: Optional[int] = None, ellipsis: Optional[str] = None) -> list:
+    return font_metrics(font_name, font_size).wrap(text, max_width, max_lines, ellipsis)
@@ -0,0 +1,167 @@
+# utils/upload_cache.py
+"""
+Cache des uploads déjà lus, partagé entre les réexécutions Streamlit.
+
+Chaque interaction (couleur, colonnes, limite...) relance app.py du début :
+sans cache, le CSV uploadé est relu et analysé à chaque fois. Les résultats
+sont rangés sous une clé = empreinte SHA-256 du contenu + options de lecture :
+
+- en mémoire (LRU de quelques uploads) : DataFrame partagé, rendu en copie
+  superficielle (copy-on-write de pandas : les modifications de l'appelant ne
+  touchent jamais la version en cache), ProductStream déjà parcouru (nombre
+  de lignes, premier bloc) et valeurs dérivées (type d'images...) ;
+- sur disque pour les gros fichiers (Parquet sous CACHE_ROOT/uploads, si
+  pyarrow est installé) : relu en quelques dizaines de ms après éviction de la
+  mémoire ou redémarrage du serveur, sans nouvelle analyse du CSV.
+
+L'empreinte elle-même est mémorisée par identifiant d'upload Streamlit (les
+UPLOAD_DIGEST_ENTRIES derniers) : une réexécution ne relit pas le contenu. Les
+deux mémoires sont partagées par toutes les sessions et protégées par un verrou.
+"""
+
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import pandas as pd
+
+from utils.csv_sniffer import HAVE_PYARROW, CsvDialect
+from utils.image_cache import atomic_write_bytes, cache_dir, prune_directory
+
+# À incrémenter quand la lecture d'un upload change (invalide les entrées existantes)
+UPLOAD_PARSE_VERSION = 2
+
+# Uploads gardés en mémoire
+UPLOAD_MEMO_ENTRIES = 4
+
+# Empreintes d'upload mémorisées
+UPLOAD_DIGEST_ENTRIES = 64
+
+# Taille d'upload à partir de laquelle le DataFrame lu est aussi écrit en Parquet
+UPLOAD_SPILL_BYTES = 2_000_000
+
+UPLOAD_CACHE_MAX_BYTES = 1_000_000_000
+
+# Partagés par les sessions Streamlit (un thread par réexécution) : accès sous _lock
+_upload_digests = OrderedDict()     # (identifiant d'upload, taille) -> sha256 du contenu
+_memo = OrderedDict()               # clé -> ParsedUpload
+_lock = threading.Lock()
+
+
+class ParsedUpload:
+    """Upload lu : DataFrame (ou flux), type de CSV, format, valeurs dérivées"""
+
+    __slots__ = ("key", "frame", "stream", "csv_type", "dialect", "derived")
+
+    def __init__(self, key: str, frame: Optional[pd.DataFrame] = None, stream=None,
+                 csv_type: Optional[str] = None, dialect: Optional[CsvDialect] = None):
+        self.key = key
+        self.frame = frame
+        self.stream = stream
+        self.csv_type = csv_type
+        self.dialect = dialect
+        self.derived = {}
+
+    def view(self) -> pd.DataFrame:
+        """DataFrame partagé, en copie superficielle (l'appelant peut la modifier)"""
+        return self.frame.copy(deep=False)
+
+    def derive(self, name: str, compute: Callable):
+        """Valeur calculée une seule fois par upload (compute() au premier appel)"""
+        if name not in self.derived:
+            self.derived[name] = compute()
+        return self.derived[name]
+
+
+def upload_digest(uploaded_file) -> str:
+    """Empreinte SHA-256 du contenu d'un upload (mémorisée par identifiant d'upload)"""
+    file_id = getattr(uploaded_file, "file_id", None)
+    stamp = (file_id, getattr(uploaded_file, "size", None))
+    if file_id:
+        with _lock:
+            digest = _upload_digests.get(stamp)
+            if digest is not None:
+                _upload_digests.move_to_end(stamp)
+                return digest
+    # Empreinte calculée hors du verrou (lecture de tout le contenu)
+    digest = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+    if file_id:
+        with _lock:
+            _lru_put(_upload_digests, stamp, digest, UPLOAD_DIGEST_ENTRIES)
+    return digest
+
+
+def upload_key(digest: str, **options) -> str:
+    """Clé d'un upload lu avec les options données"""
+    payload = [UPLOAD_PARSE_VERSION, pd.__version__, digest, sorted(options.items())]
+    return hashlib.sha256(json.dumps(payload, default=str).encode()).hexdigest()
+
+
+def _spill_paths(key: str):
+    folder = cache_dir("uploads")
+    return os.path.join(folder, f"{key}.parquet"), os.path.join(folder, f"{key}.json")
+
+
+def _lru_put(memo: OrderedDict, key, value, max_entries: int):
+    """Range value sous key ; les entrées les moins récemment utilisées au-delà de max_entries sont retirées"""
+    memo[key] = value
+    memo.move_to_end(key)
+    while len(memo) > max_entries:
+        memo.popitem(last=False)
+
+
+def _remember(parsed: ParsedUpload):
+    with _lock:
+        _lru_put(_memo, parsed.key, parsed, UPLOAD_MEMO_ENTRIES)
+
+
+def _load_spill(key: str) -> Optional[ParsedUpload]:
+    frame_path, meta_path = _spill_paths(key)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        frame = pd.read_parquet(frame_path)
+    except Exception:
+        return None
+    return ParsedUpload(key, frame=frame, csv_type=meta["csv_type"], dialect=CsvDialect(**meta["dialect"]))
+
+
+def cached_upload(key: str) -> Optional[ParsedUpload]:
+    """Upload déjà lu sous cette clé (mémoire, sinon Parquet), ou None"""
+    with _lock:
+        parsed = _memo.get(key)
+        if parsed is not None:
+            _memo.move_to_end(key)
+            return parsed
+    if not HAVE_PYARROW:
+        return None
+    parsed = _load_spill(key)
+    if parsed is not None:
+        print(f"[CACHE] Upload relu depuis Parquet ({len(parsed.frame)} lignes)")
+        _remember(parsed)
+    return parsed
+
+
+def store_upload(parsed: ParsedUpload, size: int = 0) -> ParsedUpload:
+    """Range un upload lu ; DataFrame aussi écrit en Parquet au-delà de UPLOAD_SPILL_BYTES"""
+    _remember(parsed)
+    if parsed.frame is None or size < UPLOAD_SPILL_BYTES or not HAVE_PYARROW:
+        return parsed
+    frame_path, meta_path = _spill_paths(parsed.key)
+    try:
+        buffer = io.BytesIO()
+        parsed.frame.to_parquet(buffer, index=True)
+        atomic_write_bytes(frame_path, buffer.getvalue())
+        dialect = {name: getattr(parsed.dialect, name) for name in CsvDialect.__slots__}
+        meta = {"csv_type": parsed.csv_type, "dialect": dialect}
+        atomic_write_bytes(meta_path, json.dumps(meta).encode("utf-8"))
+    except Exception as e:
+        # Colonnes que Parquet ne sait pas écrire (types mélangés) : cache mémoire seulement
+        print(f"[CACHE] Upload non écrit en Parquet ({type(e).__name__}: {e})")
+        return parsed
+    prune_directory(cache_dir("uploads"), UPLOAD_CACHE_MAX_BYTES)
+    return parsed